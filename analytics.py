@@ -1,14 +1,44 @@
-from neo4j import GraphDatabase
 import logging
+from queries import QueryExecutor
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 
+# Tabele wypisywane w konsoli: (nagłówek sekcji, tytuł tabeli, kolumny, wiersze z wyników rejestru)
+ANALYTICS_TABLES = [
+    # 1. Filtr po wartości liczbowej (np. cena < 20)
+    ("1. FILTR PO CENIE (Cena < 20)", "Książki tańsze niż £20", ["Tytul", "Cena"],
+     lambda r: [{"Tytul": row["title"], "Cena": row["price"]} for row in r["cheap_books"]]),
+    # 2. Filtr po dacie (np. książki wydane po 2015)
+    ("2. FILTR PO ROKU (Wydane po 2015)", "Nowsze książki (>2015)", ["Tytul", "Rok"],
+     lambda r: [{"Tytul": row["title"], "Rok": row["year"]} for row in r["recent_books"][:5]]),
+    # 3. Ranking / Top (Top 5 najtańszych książek)
+    ("3. RANKING (Top 5 najtańszych)", "Top 5 najtańszych", ["Tytul", "Cena"],
+     lambda r: [{"Tytul": row["title"], "Cena": row["price"]} for row in r["cheapest_books"][:5]]),
+    # 4. Agregacja (średnia cena i liczba książek per autor)
+    ("4. AGREGACJA (Statystyki cenowe per Autor)", "Statystyki wg. Autora", ["Autor", "Srednia_Cena", "Liczba_Ksiazek"],
+     lambda r: [{"Autor": row["author"], "Srednia_Cena": row["avg_price"], "Liczba_Ksiazek": row["book_count"]}
+                for row in sorted(r["author_stats"], key=lambda row: (-row["avg_price"], row["author"]))]),
+    # 5. Zapytanie relacyjne (Książki z wydawnictwami i autorami)
+    ("5. ZAPYTANIE RELACYJNE (Książki z wydawnictwami i autorami)", "Książki - Autor - Wydawnictwo",
+     ["Autor", "Tytul", "Wydawnictwo"],
+     lambda r: [{"Autor": row["author"], "Tytul": row["title"], "Wydawnictwo": row["publisher"]}
+                for row in r["relations"]]),
+]
+
+
 class GraphAnalytics:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri=None, user=None, password=None, driver=None):
+        # Można przekazać gotowy sterownik (współdzielony z raportem) - wtedy nie zamykamy go w close().
+        # Bez sterownika i adresu działa tylko na podanych wynikach (np. z local_analytics.py).
+        self.owns_driver = driver is None and uri is not None
+        if self.owns_driver:
+            from neo4j import GraphDatabase  # Import dopiero tutaj - sama analityka z wyników go nie wymaga
+            driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.driver = driver
 
     def close(self):
-        self.driver.close()
+        if self.owns_driver:
+            self.driver.close()
 
     def print_table(self, title, columns, records):
         """Pomocnicza funkcja do ładnego wypisywania tabeli w konsoli."""
@@ -21,46 +51,26 @@ class GraphAnalytics:
             print(row)
         print("-" * len(header))
 
-    def run_queries(self):
-        with self.driver.session() as session:
-            
-            # 1. Filtr po wartości liczbowej (np. cena < 20)
-            print("\n1. FILTR PO CENIE (Cena < 20)")
-            result_1 = session.run("MATCH (b:Book) WHERE b.price < 20 RETURN b.title AS Tytul, b.price AS Cena LIMIT 5")
-            self.print_table("Książki tańsze niż £20", ["Tytul", "Cena"], result_1.data())
-
-            # 2. Filtr po dacie (np. książki wydane po 2015)
-            print("\n2. FILTR PO ROKU (Wydane po 2015)")
-            result_2 = session.run("MATCH (b:Book) WHERE b.year > 2015 RETURN b.title AS Tytul, b.year AS Rok LIMIT 5")
-            self.print_table("Nowsze książki (>2015)", ["Tytul", "Rok"], result_2.data())
-
-            # 3. Ranking / Top (Top 5 najtańszych książek)
-            print("\n3. RANKING (Top 5 najtańszych)")
-            result_3 = session.run("MATCH (b:Book) RETURN b.title AS Tytul, b.price AS Cena ORDER BY b.price ASC LIMIT 5")
-            self.print_table("Top 5 najtańszych", ["Tytul", "Cena"], result_3.data())
+    def run_queries(self, results=None, plan_mode=None):
+        """Wypisuje tabele analityczne. `results` (QueryResults) pozwala użyć wyników
+        pobranych już dla raportu - bez ponownego odpytywania bazy.
+        `plan_mode` ("EXPLAIN"/"PROFILE") dopisuje tabelę planów zapytań (przy EXPLAIN tabele są puste)."""
+        if results is None:
+            results = QueryExecutor(self.driver, plan_mode=plan_mode).run()
 
-            # 4. Agregacja (średnia, min i max cena per autor)
-            print("\n4. AGREGACJA (Statystyki cenowe per Autor)")
-            query_4 = """
-            MATCH (a:Author)-[:WROTE]->(b:Book) 
-            RETURN a.name AS Autor, 
-                   round(avg(b.price), 2) AS Srednia_Cena, 
-                   count(b) AS Liczba_Ksiazek
-            ORDER BY Srednia_Cena DESC
-            """
-            result_4 = session.run(query_4)
-            self.print_table("Statystyki wg. Autora", ["Autor", "Srednia_Cena", "Liczba_Ksiazek"], result_4.data())
+        for section, title, columns, rows in ANALYTICS_TABLES:
+            print(f"\n{section}")
+            self.print_table(title, columns, rows(results))
+        if results.plans:
+            self.print_plans(results.plans)
+        return results
 
-            # 5. Zapytanie relacyjne (Jakie książki wydał "Znak" napisane przez konkretnego autora?)
-            # Uwaga: Używamy LIMIT, by pokazać próbkę relacyjną
-            print("\n5. ZAPYTANIE RELACYJNE (Książki z wydawnictwami i autorami)")
-            query_5 = """
-            MATCH (a:Author)-[:WROTE]->(b:Book)-[:PUBLISHED_BY]->(p:Publisher)
-            RETURN a.name AS Autor, b.title AS Tytul, p.name AS Wydawnictwo
-            LIMIT 5
-            """
-            result_5 = session.run(query_5)
-            self.print_table("Książki - Autor - Wydawnictwo", ["Autor", "Tytul", "Wydawnictwo"], result_5.data())
+    def print_plans(self, plans):
+        """Tabela planów: db hits i łańcuch operatorów każdego zapytania (od korzenia do liści)."""
+        records = [{"Zapytanie": name, "DB_Hits": "-" if plan is None or plan["db_hits"] is None else plan["db_hits"],
+                    "Operatory": "-" if plan is None else " <- ".join(op["operator"] for op in plan["operators"])}
+                   for name, plan in sorted(plans.items())]
+        self.print_table("Plany zapytań", ["Zapytanie", "DB_Hits", "Operatory"], records)
 
 
 # === URUCHOMIENIE ===
@@ -0,0 +1,562 @@
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from extractors import available_extractors, get_extractor
+from http_cache import ResponseCache
+from metrics import METRICS
+from parser_fixtures import check_golden, load_fixtures, update_golden
+from record_store import RecordStore, parquet_available
+from retry import HostCircuitBreaker, RetryPolicy
+from scraper import MOCK_AUTHORS, MOCK_PUBLISHERS, BookScraper
+from stub_bookstore import StubBookstore
+
+
+def bench_scraper(store, target_count, workers, rate, cache=None, parse_processes=0):
+    """Jeden przebieg scrapera na atrapie księgarni. Zwraca (rekordy, czas, liczba żądań)."""
+    requests_before = store.request_count
+    scraper = BookScraper(seed_url=store.seed_url, workers=workers, requests_per_second=rate, cache=cache,
+                          parse_processes=parse_processes)
+    start = time.perf_counter()
+    books = scraper.run(target_count=target_count)
+    elapsed = time.perf_counter() - start
+    return books, elapsed, store.request_count - requests_before
+
+
+def run_scraper_suite(store, target_count, workers_list, processes_list, rate, latency):
+    """Przepustowość scrapera dla różnej liczby wątków i procesów parsujących (wynik musi być identyczny)."""
+    print(f"\n--- Scraper: {target_count} książek, opóźnienie {latency * 1000:.0f} ms ---")
+    print(f"{'Wątki':>6} | {'Procesy':>7} | {'Czas [s]':>9} | {'Książki/s':>9} | {'Żądania':>8} | {'Przyspieszenie':>14}")
+    baseline_books, baseline_time = None, None
+    for processes in processes_list:
+        for workers in workers_list:
+            books, elapsed, requests_made = bench_scraper(store, target_count, workers, rate,
+                                                          parse_processes=processes)
+            if baseline_books is None:
+                baseline_books, baseline_time = books, elapsed
+            elif books != baseline_books:
+                raise SystemExit(f"BŁĄD: wynik dla {workers} wątków / {processes} procesów "
+                                 f"różni się od przebiegu bazowego!")
+            print(f"{workers:>6} | {processes:>7} | {elapsed:>9.2f} | {len(books) / elapsed:>9.1f} | "
+                  f"{requests_made:>8} | {baseline_time / elapsed:>13.1f}x")
+
+
+def run_cache_suite(store, target_count, workers):
+    """Trzy przebiegi z cache HTTP: zimny, rewalidacja (TTL=0 -> same 304) i świeży cache."""
+    print(f"\n--- Cache HTTP: {target_count} książek, {workers} wątków ---")
+    print(f"{'Przebieg':<12} | {'Czas [s]':>9} | {'Żądania':>8} | {'304':>5} | {'Bajty':>10} | {'Z cache':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = None
+        for label, ttl in (("zimny", 0), ("rewalidacja", 0), ("świeży", 3600)):
+            cache = ResponseCache(directory, ttl=ttl)
+            not_modified_before, bytes_before = store.not_modified_count, store.bytes_sent
+            books, elapsed, requests_made = bench_scraper(store, target_count, workers, 0, cache=cache)
+            if baseline is None:
+                baseline = books
+            elif books != baseline:
+                raise SystemExit(f"BŁĄD: przebieg '{label}' z cache zwrócił inne rekordy!")
+            stats = cache.stats()
+            print(f"{label:<12} | {elapsed:>9.2f} | {requests_made:>8} | "
+                  f"{store.not_modified_count - not_modified_before:>5} | {store.bytes_sent - bytes_before:>10} | "
+                  f"{stats['hits'] + stats['revalidated']:>8}")
+
+
+# Dawne zachowanie fetch_page: stałe 2 s po każdym błędzie, ponawiane także 404, bez bezpiecznika
+LEGACY_RETRY_POLICY = dict(base_delay=2.0, multiplier=1.0, jitter=False, retryable_statuses=frozenset(range(400, 600)))
+
+
+def run_retry_suite(store, target_count, workers, failure_rates):
+    """Koszt błędów serwera (503) i końca stronicowania (404): dawna polityka vs retry.RetryPolicy."""
+    print(f"\n--- Ponawianie: {target_count} książek, {workers} wątków ---")
+    print(f"{'Polityka':<10} | {'Błędy 503':>9} | {'Czas [s]':>9} | {'Książki':>7} | {'Żądania':>8} | "
+          f"{'Odp. 503':>8} | {'Bezpiecznik':>11}")
+    level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.CRITICAL)  # Ostrzeżenia o każdym 503 zasłoniłyby tabelę
+    for failure_rate in failure_rates:
+        for label, policy, breaker in (
+                ("dawna", RetryPolicy(**LEGACY_RETRY_POLICY), HostCircuitBreaker(failure_ratio=None)),
+                ("nowa", RetryPolicy(seed=0), HostCircuitBreaker())):
+            store.failure_rate = failure_rate
+            store.rng.seed(0)
+            requests_before, errors_before = store.request_count, store.error_count
+            scraper = BookScraper(seed_url=store.seed_url, workers=workers, requests_per_second=0,
+                                  retry_policy=policy, circuit_breaker=breaker)
+            start = time.perf_counter()
+            books = scraper.run(target_count=target_count)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<10} | {failure_rate:>8.0%} | {elapsed:>9.2f} | {len(books):>7} | "
+                  f"{store.request_count - requests_before:>8} | {store.error_count - errors_before:>8} | "
+                  f"{breaker.trips():>11}")
+    store.failure_rate = 0.0
+    logging.getLogger().setLevel(level)
+
+
+def run_parser_suite(rounds):
+    """Zgodność z wzorcem i przepustowość (strony/s) każdego backendu parsowania."""
+    fixtures = load_fixtures()
+    listing = [html for name, html in fixtures.items() if name.startswith("catalogue_")]
+    books = [html for name, html in fixtures.items() if not name.startswith("catalogue_")]
+
+    print(f"\n--- Parsowanie HTML: {rounds} powtórzeń ---")
+    print(f"{'Backend':<10} | {'Wzorzec':<7} | {'Lista [str/s]':>13} | {'Szczegóły [str/s]':>17}")
+    for name in available_extractors():
+        extractor = get_extractor(name)
+        mismatches = check_golden(extractor, fixtures)
+        if mismatches:
+            raise SystemExit(f"BŁĄD: backend {name} różni się od wzorca na stronach: {', '.join(mismatches)}")
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for html in listing:
+                extractor.parse_listing(html)
+        listing_rate = rounds * len(listing) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for html in books:
+                extractor.parse_book(html)
+        book_rate = rounds * len(books) / (time.perf_counter() - start)
+        print(f"{name:<10} | {'OK':<7} | {listing_rate:>13.0f} | {book_rate:>17.0f}")
+
+
+SYNTHETIC_ISBN_PREFIX = "bench-"
+
+
+def synthetic_books(count, seed=0):
+    """Syntetyczne rekordy o kształcie wyniku scrapera (ISBN z prefiksem, by dało się je potem usunąć)."""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "title": f"Synthetic Book {i}",
+            "price": round(rng.uniform(10, 60), 2),
+            "isbn": f"{SYNTHETIC_ISBN_PREFIX}{i:09d}",
+            "author": rng.choice(MOCK_AUTHORS),
+            "publisher": rng.choice(MOCK_PUBLISHERS),
+            "year": rng.randint(2000, 2023),
+            "url": f"https://example.invalid/book_{i}/index.html",
+        }
+
+
+def delete_synthetic_books(driver):
+    """Usuwa z bazy tylko syntetyczne książki benchmarku (dane z prawdziwego scrapingu zostają)."""
+    with driver.session() as session:
+        session.run(
+            "MATCH (b:Book) WHERE b.isbn STARTS WITH $prefix "
+            "CALL { WITH b DETACH DELETE b } IN TRANSACTIONS OF 10000 ROWS",
+            prefix=SYNTHETIC_ISBN_PREFIX,
+        ).consume()
+
+
+def run_loader_suite(uri, user, password, count, workers_list, batch_size):
+    """Import syntetycznych książek do żywej bazy Neo4j: jedno UNWIND vs ładowanie fazowe/równoległe."""
+    from database import Neo4jHandler
+
+    books = list(synthetic_books(count))
+    handler = Neo4jHandler(uri, user, password)
+    try:
+        handler.setup_constraints()
+        print(f"\n--- Import do Neo4j: {count} syntetycznych książek ---")
+        print(f"{'Wariant':<22} | {'Czas [s]':>9} | {'Rekordy/s':>10} | {'Ponowienia':>10}")
+
+        delete_synthetic_books(handler.driver)
+        start = time.perf_counter()
+        handler.insert_books_batch(books)
+        elapsed = time.perf_counter() - start
+        print(f"{'jedno UNWIND':<22} | {elapsed:>9.2f} | {count / elapsed:>10.0f} | {'-':>10}")
+
+        for workers in workers_list:
+            delete_synthetic_books(handler.driver)
+            stats = handler.insert_books_parallel(books, workers=workers, batch_size=batch_size)
+            print(f"{f'fazowo, {workers} sesji':<22} | {stats['seconds']:>9.2f} | "
+                  f"{stats['rows_per_second']:>10.0f} | {stats['retries']:>10}")
+    finally:
+        delete_synthetic_books(handler.driver)
+        handler.close()
+
+
+def _profile_queries(driver, rounds):
+    """Mediana czasu każdego zapytania z rejestru (osobno, `rounds` razy) i plan z PROFILE."""
+    from queries import QUERIES, QueryExecutor
+
+    executor = QueryExecutor(driver)
+    profiled = QueryExecutor(driver, plan_mode="PROFILE").run()
+    latencies = {}
+    for name in QUERIES:
+        timings = sorted(executor.run([name]).timings[name] for _ in range(rounds))
+        latencies[name] = timings[len(timings) // 2]
+    return latencies, profiled.plans
+
+
+def run_index_suite(uri, user, password, sizes, rounds, batch_size, workers):
+    """Opóźnienie zapytań analityki przed i po założeniu indeksów zakresowych (żywa baza Neo4j).
+
+    Dla każdego rozmiaru: import syntetycznych książek, pomiar bez indeksów, setup_indexes, pomiar z indeksami.
+    """
+    from database import Neo4jHandler
+    from record_store import RecordStore
+
+    handler = Neo4jHandler(uri, user, password)
+    logging_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        handler.setup_constraints()
+        for size in sizes:
+            delete_synthetic_books(handler.driver)
+            handler.drop_indexes()
+            handler.insert_books_parallel(RecordStore.from_records(synthetic_books(size)), workers=workers,
+                                          batch_size=batch_size)
+            before, plans_before = _profile_queries(handler.driver, rounds)
+            start = time.perf_counter()
+            handler.setup_indexes()
+            build = time.perf_counter() - start
+            after, plans_after = _profile_queries(handler.driver, rounds)
+
+            print(f"\n--- Indeksy: {size} syntetycznych książek (budowa indeksów {build:.1f} s, "
+                  f"mediana z {rounds} przebiegów) ---")
+            print(f"{'Zapytanie':<15} | {'Bez [ms]':>9} | {'Z [ms]':>9} | {'DB hits bez':>12} | "
+                  f"{'DB hits z':>10} | Operator liścia z indeksami")
+            for name in before:
+                hits_before = (plans_before.get(name) or {}).get("db_hits")
+                plan_after = plans_after.get(name) or {"operators": [], "db_hits": None}
+                leaves = sorted({op["operator"] for op in plan_after["operators"]
+                                 if "Scan" in op["operator"] or "Seek" in op["operator"]})
+                print(f"{name:<15} | {before[name] * 1000:>9.1f} | {after[name] * 1000:>9.1f} | "
+                      f"{str(hits_before):>12} | {str(plan_after['db_hits']):>10} | {', '.join(leaves)}")
+    finally:
+        delete_synthetic_books(handler.driver)
+        logging.getLogger().setLevel(logging_level)
+        handler.close()
+
+
+def _render_catalogue(row_count, rows_per_file):
+    """Uruchamiane w osobnym procesie, żeby szczyt RSS dotyczył tylko jednego przebiegu."""
+    from report import ReportGenerator
+
+    rows = ({"title": book["title"], "author": book["author"], "publisher": book["publisher"],
+             "year": book["year"], "price": book["price"]} for book in synthetic_books(row_count))
+    generator = ReportGenerator()  # Bez sterownika - wiersze podajemy sami
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        stats = generator.generate_catalogue_appendix(os.path.join(directory, "katalog.pdf"), rows=rows,
+                                                      rows_per_file=rows_per_file)
+        elapsed = time.perf_counter() - start
+    # ru_maxrss na Linuksie jest w KiB
+    return stats["pages"], len(stats["files"]), elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_report_suite(sizes, rows_per_file):
+    """Strumieniowy załącznik PDF: strony/s i szczyt RSS dla rosnącej liczby wierszy."""
+    volumes = f"tomy po {rows_per_file} wierszy" if rows_per_file else "jeden plik"
+    print(f"\n--- Załącznik PDF ({volumes}) ---")
+    print(f"{'Wiersze':>8} | {'Strony':>7} | {'Pliki':>5} | {'Czas [s]':>9} | {'Strony/s':>9} | {'Szczyt RSS [MiB]':>16}")
+    for size in sizes:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            pages, files, elapsed, peak_rss = executor.submit(_render_catalogue, size, rows_per_file).result()
+        print(f"{size:>8} | {pages:>7} | {files:>5} | {elapsed:>9.2f} | {pages / elapsed:>9.1f} | {peak_rss:>16.1f}")
+
+
+def _traced_peak(build):
+    """Szczyt pamięci Pythona (tracemalloc) podczas budowy obiektu i pamięć, która po niej zostaje."""
+    tracemalloc.start()
+    try:
+        result = build()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, retained, peak
+
+
+def run_records_suite(sizes):
+    """Lista słowników vs kolumnowy RecordStore: pamięć oraz zapis/odczyt pliku."""
+    formats = [".records"] + ([".parquet"] if parquet_available() else [])
+    print("\n--- Bufor rekordów: lista słowników vs RecordStore ---")
+    print(f"{'Wiersze':>8} | {'Lista [MiB]':>11} | {'Store [MiB]':>11} | {'Szczyt [MiB]':>12} | "
+          f"{'Format':<8} | {'Zapis [s]':>9} | {'Odczyt [s]':>10} | {'Plik [MiB]':>10}")
+    for size in sizes:
+        _, list_bytes, _ = _traced_peak(lambda: list(synthetic_books(size)))
+        store, store_bytes, store_peak = _traced_peak(lambda: RecordStore.from_records(synthetic_books(size)))
+        with tempfile.TemporaryDirectory() as directory:
+            for extension in formats:
+                path = os.path.join(directory, f"books{extension}")
+                start = time.perf_counter()
+                store.save(path)
+                saved = time.perf_counter() - start
+                start = time.perf_counter()
+                loaded = RecordStore.load(path)
+                sum(1 for _ in loaded)  # Odczyt obejmuje zdekodowanie wszystkich wierszy
+                read = time.perf_counter() - start
+                loaded.close()
+                print(f"{size:>8} | {list_bytes / 2**20:>11.1f} | {store_bytes / 2**20:>11.1f} | "
+                      f"{store_peak / 2**20:>12.1f} | {extension:<8} | {saved:>9.3f} | {read:>10.3f} | "
+                      f"{os.path.getsize(path) / 2**20:>10.1f}")
+
+
+def run_bulk_suite(sizes):
+    """Eksport CSV dla neo4j-admin: przepustowość i szczyt pamięci przy strumieniu rekordów oraz zgodność
+    plików z grafem z ładowania transakcyjnego (atrapa Neo4j)."""
+    from bulk_export import export_csv, verify_export
+
+    print("\n--- Eksport CSV dla neo4j-admin import ---")
+    print(f"{'Rekordy':>8} | {'Czas [s]':>9} | {'Rekordy/s':>10} | {'Szczyt [MiB]':>12} | {'Pliki [MiB]':>11} | "
+          f"{'Zgodność':<8}")
+    logging_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as directory:
+                start = time.perf_counter()
+                export_csv(synthetic_books(size), directory)
+                elapsed = time.perf_counter() - start
+                # Pamięć w osobnym przebiegu - tracemalloc wielokrotnie spowalnia alokacje
+                _, _, peak = _traced_peak(lambda: export_csv(synthetic_books(size), directory))
+                files = sum(entry.stat().st_size for entry in os.scandir(directory)) / 2**20
+                differences = verify_export(RecordStore.from_records(synthetic_books(size)), directory)
+            print(f"{size:>8} | {elapsed:>9.2f} | {size / elapsed:>10.0f} | {peak / 2**20:>12.1f} | "
+                  f"{files:>11.1f} | {'OK' if not differences else 'BŁĄD':<8}")
+            if differences:
+                raise SystemExit(f"BŁĄD: eksport niezgodny z ładowaniem transakcyjnym: {differences}")
+    finally:
+        logging.getLogger().setLevel(logging_level)
+
+
+def run_analytics_suite(sizes):
+    """Zapytania z rejestru: Cypher (atrapa Neo4j) vs lokalny silnik z migawki rekordów, ze sprawdzeniem zgodności.
+
+    Część rekordów powtarza ISBN z inną ceną (ponowny przebieg scrapera), żeby sprawdzić semantykę MERGE.
+    Atrapa liczy w czystym Pythonie i bez sieci - przy prawdziwej bazie czas Cyphera jest wyższy.
+    Kolumna zgodności porównuje dwie implementacje w Pythonie, nie Cypher; zgodność z bazą
+    sprawdza `python local_analytics.py <rekordy>`.
+    """
+    from database import Neo4jHandler
+    from fake_neo4j import FakeNeo4jDriver
+    from local_analytics import LocalGraph, LocalQueryExecutor, check_consistency, numpy
+    from queries import QueryExecutor
+
+    engine = "numpy" if numpy is not None else "czysty Python"
+    print(f"\n--- Analityka: Cypher (atrapa) vs lokalnie ({engine}) ---")
+    print(f"{'Rekordy':>8} | {'Cypher [s]':>10} | {'Budowa [s]':>10} | {'Lokalnie [s]':>12} | {'Zgodność':<8}")
+    logging_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        for size in sizes:
+            books = list(synthetic_books(size))
+            books += [dict(book, price=round(book["price"] + 1, 2)) for book in books[:size // 100]]
+            driver = FakeNeo4jDriver()
+            Neo4jHandler(driver=driver).insert_books_batch(books)
+
+            start = time.perf_counter()
+            QueryExecutor(driver).run()
+            cypher = time.perf_counter() - start
+            start = time.perf_counter()
+            graph = LocalGraph(RecordStore.from_records(books))
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            LocalQueryExecutor(graph).run()
+            local = time.perf_counter() - start
+            differences = check_consistency(driver, graph)
+            print(f"{len(books):>8} | {cypher:>10.3f} | {build:>10.3f} | {local:>12.3f} | "
+                  f"{'OK' if not differences else 'BŁĄD':<8}")
+            if differences:
+                raise SystemExit(f"BŁĄD: backendy analityki niezgodne: {differences}")
+    finally:
+        logging.getLogger().setLevel(logging_level)
+
+
+PIPELINE_STAGES = ("scrape", "load", "analyze", "report")
+
+
+def _measure_stage(stage):
+    """Uruchamia etap i mierzy czas oraz szczyt pamięci Pythona (tracemalloc) ponad stan sprzed etapu.
+
+    `stage()` zwraca (liczba przetworzonych elementów, liczba żądań HTTP/zapytań do bazy).
+    """
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    items, requests_made = stage()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    return {"seconds": round(elapsed, 4), "items": items, "items_per_second": round(items / elapsed, 1),
+            "peak_mib": round(peak / 1024 / 1024, 2), "requests": requests_made}
+
+
+def bench_pipeline(store, target_count, workers, loader_workers):
+    """Cały proces z main.py: atrapa księgarni -> atrapa Neo4j -> analityka -> raport PDF."""
+    from analytics import GraphAnalytics
+    from database import Neo4jHandler
+    from fake_neo4j import FakeNeo4jDriver
+    from queries import QueryExecutor
+    from report import ReportGenerator
+
+    driver = FakeNeo4jDriver()
+    state = {}
+    stages = {}
+
+    def scrape():
+        requests_before = store.request_count
+        scraper = BookScraper(seed_url=store.seed_url, workers=workers, requests_per_second=0)
+        state["books"] = scraper.run(target_count=target_count)
+        return len(state["books"]), store.request_count - requests_before
+
+    def load():
+        queries_before = len(driver.log)
+        handler = Neo4jHandler(driver=driver)
+        handler.setup_constraints()
+        if loader_workers > 1:
+            rows = handler.insert_books_parallel(state["books"], workers=loader_workers)["rows"]
+        else:
+            rows = handler.insert_books_stream(iter(state["books"]))
+        return rows, len(driver.log) - queries_before
+
+    def analyze():
+        queries_before = len(driver.log)
+        with contextlib.redirect_stdout(io.StringIO()):
+            state["results"] = GraphAnalytics(driver=driver).run_queries(QueryExecutor(driver).run())
+        return sum(len(rows) for rows in state["results"].rows.values()), len(driver.log) - queries_before
+
+    def report():
+        queries_before = len(driver.log)
+        generator = ReportGenerator(driver=driver)
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            generator.generate_pdf(generator.fetch_data_for_report(state["results"]),
+                                   output_filename=os.path.join(directory, "raport.pdf"))
+            rows = generator.generate_catalogue_appendix(os.path.join(directory, "katalog.pdf"))["rows"]
+        return rows, len(driver.log) - queries_before
+
+    tracemalloc.start()
+    try:
+        for name, stage in zip(PIPELINE_STAGES, (scrape, load, analyze, report)):
+            stages[name] = _measure_stage(stage)
+    finally:
+        tracemalloc.stop()
+    if len(driver.graph.books) != len(state["books"]):
+        raise SystemExit(f"BŁĄD: w atrapie bazy jest {len(driver.graph.books)} książek, "
+                         f"a scraper zwrócił {len(state['books'])}!")
+    return stages
+
+
+def run_pipeline_suite(store, target_count, workers, loader_workers, json_path=None, baseline_path=None):
+    """Czas, przepustowość, pamięć i liczba żądań każdego etapu; wynik opcjonalnie zapisywany jako JSON
+    i porównywany z wcześniejszym przebiegiem."""
+    stages = bench_pipeline(store, target_count, workers, loader_workers)
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)["stages"]
+
+    print(f"\n--- Cały proces: {target_count} książek, {workers} wątków, {loader_workers} sesji zapisu ---")
+    print(f"{'Etap':<8} | {'Czas [s]':>9} | {'Elementy':>8} | {'Elem./s':>9} | {'Pamięć [MiB]':>12} | "
+          f"{'Żądania':>8}" + (f" | {'Czas vs wzorzec':>15}" if baseline else ""))
+    for name, stage in stages.items():
+        line = (f"{name:<8} | {stage['seconds']:>9.2f} | {stage['items']:>8} | {stage['items_per_second']:>9.1f} | "
+                f"{stage['peak_mib']:>12.2f} | {stage['requests']:>8}")
+        if baseline and name in baseline:
+            line += f" | {stage['seconds'] / baseline[name]['seconds']:>14.2f}x"
+        print(line)
+
+    if json_path:
+        result = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": {"books": target_count, "workers": workers, "loader_workers": loader_workers,
+                       "latency": store.latency},
+            "stages": stages,
+        }
+        if METRICS.enabled:
+            result["metrics"] = METRICS.summary()
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=1)
+        print(f"Zapisano wyniki: {json_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scrapera na lokalnej atrapie księgarni.")
+    parser.add_argument("--books", type=int, default=200, help="liczba książek do pobrania")
+    parser.add_argument("--latency", type=float, default=0.05, help="opóźnienie serwera na żądanie [s]")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--processes", type=int, nargs="+", default=[0],
+                        help="liczba procesów parsujących (0 = parsowanie w wątkach)")
+    parser.add_argument("--rate", type=float, default=0, help="limit żądań/s na host (0 = bez limitu)")
+    parser.add_argument("--rounds", type=int, default=200, help="powtórzenia w benchmarku parserów")
+    parser.add_argument("--report-rows", type=int, nargs="+", default=[1000, 10_000, 50_000])
+    parser.add_argument("--report-rows-per-file", type=int, default=5000, help="0 = jeden plik")
+    parser.add_argument("--record-rows", type=int, nargs="+", default=[10_000, 200_000],
+                        help="liczby wierszy w zestawie 'records'")
+    parser.add_argument("--analytics-rows", type=int, nargs="+", default=[10_000, 100_000],
+                        help="liczby rekordów w zestawie 'analytics'")
+    parser.add_argument("--bulk-rows", type=int, nargs="+", default=[10_000, 100_000],
+                        help="liczby rekordów w zestawie 'bulk'")
+    parser.add_argument("--failure-rates", type=float, nargs="+", default=[0.0, 0.05, 0.3],
+                        help="udział odpowiedzi 503 w zestawie 'retry'")
+    parser.add_argument("--json", help="plik JSON na wyniki zestawu 'pipeline'")
+    parser.add_argument("--baseline", help="wcześniejszy plik JSON z 'pipeline' do porównania czasów")
+    parser.add_argument("--metrics", help="włącz metryki (metrics.py) i zapisz je do pliku .json lub .prom")
+    parser.add_argument("--suite", nargs="+",
+                        choices=["scraper", "cache", "parser", "loader", "report", "records", "analytics", "pipeline",
+                                 "retry", "indexes", "bulk"],
+                        default=["scraper", "cache", "parser"],
+                        help="'loader' i 'indexes' wymagają działającej bazy Neo4j")
+    parser.add_argument("--neo4j-uri", default="bolt://localhost:7687")
+    parser.add_argument("--neo4j-user", default="neo4j")
+    parser.add_argument("--neo4j-password", default="testtest")
+    parser.add_argument("--loader-books", type=int, default=100_000, help="liczba syntetycznych książek")
+    parser.add_argument("--loader-workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--loader-batch", type=int, default=5000, help="rozmiar paczki przy imporcie fazowym")
+    parser.add_argument("--index-books", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="rozmiary bazy w zestawie 'indexes'")
+    parser.add_argument("--index-rounds", type=int, default=5, help="powtórzenia każdego zapytania w 'indexes'")
+    parser.add_argument("--update-golden", action="store_true",
+                        help="zapisz nowy wzorzec fixtures/expected.json z parsera referencyjnego")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    if args.metrics:
+        METRICS.enable()
+
+    if args.update_golden:
+        update_golden()
+        return
+    if "parser" in args.suite:
+        run_parser_suite(args.rounds)
+    if "report" in args.suite:
+        run_report_suite(args.report_rows, args.report_rows_per_file or None)
+    if "records" in args.suite:
+        run_records_suite(args.record_rows)
+    if "analytics" in args.suite:
+        run_analytics_suite(args.analytics_rows)
+    if "bulk" in args.suite:
+        run_bulk_suite(args.bulk_rows)
+    if "loader" in args.suite:
+        run_loader_suite(args.neo4j_uri, args.neo4j_user, args.neo4j_password,
+                         args.loader_books, args.loader_workers, args.loader_batch)
+    if "indexes" in args.suite:
+        run_index_suite(args.neo4j_uri, args.neo4j_user, args.neo4j_password, args.index_books,
+                        args.index_rounds, args.loader_batch, max(args.loader_workers))
+
+    if {"scraper", "cache", "pipeline", "retry"} & set(args.suite):
+        with StubBookstore(total_books=args.books, latency=args.latency) as store:
+            if "scraper" in args.suite:
+                run_scraper_suite(store, args.books, args.workers, args.processes, args.rate, args.latency)
+            if "cache" in args.suite:
+                run_cache_suite(store, args.books, max(args.workers))
+            if "pipeline" in args.suite:
+                run_pipeline_suite(store, args.books, max(args.workers), max(args.loader_workers),
+                                   json_path=args.json, baseline_path=args.baseline)
+            if "retry" in args.suite:
+                run_retry_suite(store, args.books, max(args.workers), args.failure_rates)
+
+    if args.metrics:
+        METRICS.export(args.metrics)
+        print(f"Zapisano metryki: {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
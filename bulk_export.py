@@ -0,0 +1,250 @@
+import csv
+import logging
+import os
+import sys
+import time
+
+# Eksport rekordów scrapera do plików CSV dla `neo4j-admin database import full` - pierwszy import
+# dużego katalogu do pustej bazy bez transakcji i MERGE (importer offline buduje magazyn od razu).
+#
+# Pliki (nagłówki osobno, żeby dane można było dzielić/łączyć bez przepisywania nagłówka):
+#   books.csv, authors.csv, publishers.csv    - węzły Book/Author/Publisher
+#   wrote.csv, published_by.csv               - relacje WROTE/PUBLISHED_BY
+#   <nazwa>_header.csv                        - nagłówki z typami i przestrzeniami ID
+#
+# Rekordy przetwarzane są strumieniowo: każdy wiersz trafia do pliku od razu, w pamięci zostają
+# tylko klucze do usuwania duplikatów (ISBN-y i nazwy). Semantyka jak w INSERT_BOOKS_QUERY:
+# tytuł/rok/URL z pierwszego rekordu o danym ISBN, cena z ostatniego, relacje bez powtórzeń.
+
+NODE_FILES = {
+    "Book": ("books", ["isbn:ID(Book)", "title", "year:int", "price:double", "url"]),
+    "Author": ("authors", ["name:ID(Author)"]),
+    "Publisher": ("publishers", ["name:ID(Publisher)"]),
+}
+RELATIONSHIP_FILES = {
+    "WROTE": ("wrote", [":START_ID(Author)", ":END_ID(Book)"]),
+    "PUBLISHED_BY": ("published_by", [":START_ID(Book)", ":END_ID(Publisher)"]),
+}
+
+
+def _csv_writer(f):
+    # Cudzysłowy podwajane ("") - domyślny, nie-legacy tryb cytowania neo4j-admin
+    return csv.writer(f, lineterminator="\n")
+
+
+def _paths(directory, name):
+    return os.path.join(directory, f"{name}_header.csv"), os.path.join(directory, f"{name}.csv")
+
+
+def export_csv(books, directory):
+    """Zapisuje węzły i relacje z rekordów (dowolne iterowalne źródło, np. RecordStore) do `directory`.
+    Zwraca liczniki wierszy każdego pliku."""
+    os.makedirs(directory, exist_ok=True)
+    files = {**NODE_FILES, **RELATIONSHIP_FILES}
+    handles, writers = {}, {}
+    for kind, (name, header) in files.items():
+        header_path, data_path = _paths(directory, name)
+        with open(header_path, "w", encoding="utf-8", newline="") as f:
+            _csv_writer(f).writerow(header)
+        handles[kind] = open(data_path, "w", encoding="utf-8", newline="")
+        writers[kind] = _csv_writer(handles[kind])
+
+    counts = {kind: 0 for kind in files}
+    first = {}             # ISBN -> (autor, wydawnictwo, cena) z pierwszego rekordu
+    extra_edges = set()    # Dalsze relacje powtórzonych ISBN (rzadkie: inny autor/wydawnictwo)
+    names = {"Author": set(), "Publisher": set()}
+    last_prices = {}       # Powtórzone ISBN ze zmienioną ceną - poprawiane w books.csv na końcu
+    start = time.perf_counter()
+    try:
+        for book in books:
+            isbn, author, publisher = book["isbn"], book["author"], book["publisher"]
+            for label, name in (("Author", author), ("Publisher", publisher)):
+                if name not in names[label]:
+                    names[label].add(name)
+                    writers[label].writerow([name])
+                    counts[label] += 1
+
+            edges = (("WROTE", author, isbn), ("PUBLISHED_BY", isbn, publisher))
+            known = first.get(isbn)
+            if known is None:
+                first[isbn] = (author, publisher, book["price"])
+                writers["Book"].writerow([isbn, book["title"], book["year"], book["price"], book["url"]])
+                counts["Book"] += 1
+            else:
+                if isbn in last_prices or book["price"] != known[2]:
+                    last_prices[isbn] = book["price"]  # ON MATCH SET b.price
+                first_edges = (("WROTE", known[0], isbn), ("PUBLISHED_BY", isbn, known[1]))
+                edges = [edge for edge in edges if edge not in first_edges and edge not in extra_edges]
+                extra_edges.update(edges)
+            for kind, start_id, end_id in edges:
+                writers[kind].writerow([start_id, end_id])
+                counts[kind] += 1
+    finally:
+        for f in handles.values():
+            f.close()
+
+    if last_prices:
+        _patch_prices(_paths(directory, "books")[1], last_prices)
+    elapsed = time.perf_counter() - start
+    logging.info(f"Eksport CSV do {directory}: {counts['Book']} książek, {counts['Author']} autorów, "
+                 f"{counts['Publisher']} wydawnictw, {counts['WROTE'] + counts['PUBLISHED_BY']} relacji "
+                 f"w {elapsed:.2f} s.")
+    return counts
+
+
+def _patch_prices(path, prices):
+    """Drugi, strumieniowy przebieg po books.csv: ceny z ostatnich rekordów powtórzonych ISBN."""
+    tmp_path = f"{path}.tmp"
+    with open(path, encoding="utf-8", newline="") as src, open(tmp_path, "w", encoding="utf-8", newline="") as dst:
+        writer = _csv_writer(dst)
+        for row in csv.reader(src):
+            if row[0] in prices:
+                row[3] = prices[row[0]]
+            writer.writerow(row)
+    os.replace(tmp_path, path)
+
+
+def import_command(directory, database="neo4j"):
+    """Polecenie neo4j-admin (Neo4j 5) importujące pliki z `directory` do pustej bazy `database`."""
+    command = ["neo4j-admin", "database", "import", "full"]
+    for option, files in (("--nodes", NODE_FILES), ("--relationships", RELATIONSHIP_FILES)):
+        for kind, (name, _) in files.items():
+            command.append(f"{option}={kind}={','.join(_paths(directory, name))}")
+    command += ["--multiline-fields=true", database]
+    return command
+
+
+# --- Weryfikacja: graf z plików CSV vs graf z transakcyjnego ładowania ---
+
+def _parse(value, column):
+    if value == "":
+        return None
+    if column.endswith(":int"):
+        return int(value)
+    if column.endswith(":double"):
+        return float(value)
+    return value
+
+
+def _read_rows(directory, name):
+    header_path, data_path = _paths(directory, name)
+    with open(header_path, encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f))
+    with open(data_path, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            yield [_parse(value, column) for value, column in zip(row, header)]
+
+
+def read_graph(directory):
+    """Graf zapisany w plikach eksportu jako fake_neo4j.FakeGraph (tak, jak zbuduje go importer)."""
+    from fake_neo4j import FakeGraph
+
+    graph = FakeGraph()
+    for isbn, title, year, price, url in _read_rows(directory, "books"):
+        graph.books[isbn] = {"isbn": isbn, "title": title, "year": year, "price": price, "url": url}
+    graph.authors.update(name for name, in _read_rows(directory, "authors"))
+    graph.publishers.update(name for name, in _read_rows(directory, "publishers"))
+    graph.wrote.update(tuple(row) for row in _read_rows(directory, "wrote"))
+    graph.published_by.update(tuple(row) for row in _read_rows(directory, "published_by"))
+    return graph
+
+
+def transactional_graph(books, batch_size=500):
+    """Graf, który zbudowałby Neo4jHandler.insert_books_stream (te same zapytania, atrapa bazy)."""
+    from database import Neo4jHandler
+    from fake_neo4j import FakeNeo4jDriver
+
+    driver = FakeNeo4jDriver()
+    Neo4jHandler(driver=driver).insert_books_stream(iter(books), batch_size=batch_size)
+    return driver.graph
+
+
+# Odczyt całego grafu z bazy (graph_from_driver)
+GRAPH_QUERIES = {
+    "books": "MATCH (b:Book) RETURN b.isbn AS isbn, b.title AS title, b.year AS year, b.price AS price, b.url AS url",
+    "authors": "MATCH (a:Author) RETURN a.name AS name",
+    "publishers": "MATCH (p:Publisher) RETURN p.name AS name",
+    "wrote": "MATCH (a:Author)-[:WROTE]->(b:Book) RETURN a.name AS author, b.isbn AS isbn",
+    "published_by": "MATCH (b:Book)-[:PUBLISHED_BY]->(p:Publisher) RETURN b.isbn AS isbn, p.name AS publisher",
+}
+
+
+def graph_from_driver(driver):
+    """Cały graf z bazy (np. po imporcie neo4j-admin) jako FakeGraph - do porównania z eksportem."""
+    from fake_neo4j import FakeGraph
+
+    graph = FakeGraph()
+    with driver.session() as session:
+        for r in session.run(GRAPH_QUERIES["books"]):
+            graph.books[r["isbn"]] = dict(r)
+        graph.authors.update(r["name"] for r in session.run(GRAPH_QUERIES["authors"]))
+        graph.publishers.update(r["name"] for r in session.run(GRAPH_QUERIES["publishers"]))
+        graph.wrote.update((r["author"], r["isbn"]) for r in session.run(GRAPH_QUERIES["wrote"]))
+        graph.published_by.update((r["isbn"], r["publisher"]) for r in session.run(GRAPH_QUERIES["published_by"]))
+    return graph
+
+
+def compare_graphs(expected, actual, limit=5):
+    """Różnice między dwoma grafami FakeGraph jako lista opisów; pusta = identyczne."""
+    differences = []
+    for label, left, right in (("Book", expected.books.keys(), actual.books.keys()),
+                               ("Author", expected.authors, actual.authors),
+                               ("Publisher", expected.publishers, actual.publishers),
+                               ("WROTE", expected.wrote, actual.wrote),
+                               ("PUBLISHED_BY", expected.published_by, actual.published_by)):
+        missing, unexpected = set(left) - set(right), set(right) - set(left)
+        if missing or unexpected:
+            differences.append(f"{label}: brakuje {len(missing)} (np. {sorted(missing)[:limit]}), "
+                               f"nadmiarowe {len(unexpected)} (np. {sorted(unexpected)[:limit]})")
+    changed = [isbn for isbn in expected.books.keys() & actual.books.keys()
+               if expected.books[isbn] != actual.books[isbn]]
+    if changed:
+        differences.append(f"Book: różne właściwości {len(changed)} książek, np. "
+                           f"{[(expected.books[i], actual.books[i]) for i in sorted(changed)[:limit]]}")
+    return differences
+
+
+def verify_export(books, directory):
+    """Porównuje pliki eksportu z grafem z ładowania transakcyjnego; `books` musi dać się przejść ponownie
+    (lista, RecordStore). Zwraca listę różnic."""
+    differences = compare_graphs(transactional_graph(books), read_graph(directory))
+    for difference in differences:
+        logging.warning(f"Eksport niezgodny z ładowaniem transakcyjnym - {difference}")
+    return differences
+
+
+# === URUCHOMIENIE ===
+if __name__ == "__main__":
+    import argparse
+
+    from record_store import RecordStore
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Rekordy (RecordStore) -> pliki CSV dla neo4j-admin import")
+    parser.add_argument("records", help="plik rekordów z `python main.py scrape --records ...`")
+    parser.add_argument("directory", help="katalog na pliki CSV")
+    parser.add_argument("--verify", action="store_true",
+                        help="porównaj pliki z grafem z ładowania transakcyjnego (atrapa bazy)")
+    parser.add_argument("--check-db", action="store_true",
+                        help="po imporcie: porównaj pliki z grafem w bazie (NEO4J_URI/USER/PASSWORD)")
+    args = parser.parse_args()
+
+    store = RecordStore.load(args.records)
+    if args.check_db:
+        from neo4j import GraphDatabase
+
+        driver = GraphDatabase.driver(os.environ.get("NEO4J_URI", "bolt://localhost:7687"),
+                                      auth=(os.environ.get("NEO4J_USER", "neo4j"),
+                                            os.environ.get("NEO4J_PASSWORD", "testtest")))
+        try:
+            differences = compare_graphs(read_graph(args.directory), graph_from_driver(driver))
+        finally:
+            driver.close()
+    else:
+        export_csv(store, args.directory)
+        print("Import do pustej bazy (zatrzymanej):\n  " + " ".join(import_command(args.directory)))
+        differences = verify_export(store, args.directory) if args.verify else []
+    for difference in differences:
+        print(f"Różnica: {difference}")
+    print("Graf zgodny." if not differences else f"Niezgodności: {len(differences)}")
+    sys.exit(1 if differences else 0)
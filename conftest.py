@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+# Wspólne pomocniki testów: sterowany zegar i fabryka rekordów książek.
+
+
+class Clock:
+    """Zegar przestawiany ręcznie (clock.now += ...) zamiast time.monotonic i time.time."""
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+def make_book(n, **fields):
+    """Rekord w kształcie wyniku scrapera; `fields` nadpisuje wartości domyślne."""
+    return {"title": f"Książka {n}", "price": 10.0, "isbn": f"isbn-{n}", "author": "Kafka", "publisher": "Znak",
+            "year": 2020, "url": f"https://example.com/{n}", **fields}
+
+
+@pytest.fixture
+def book():
+    return make_book
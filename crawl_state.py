@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import threading
+import time
+
+# Stan między uruchomieniami scrapera: tryb przyrostowy (url -> odcisk książki)
+# i checkpoint przerwanego przebiegu (CrawlCheckpoint).
+
+
+def listing_fingerprint(price):
+    """Odcisk treści książki widoczny już na stronie listy - na razie sama cena."""
+    return round(float(price), 2)
+
+
+def load_known_books(path):
+    """Wczytuje znane książki z lokalnego pliku stanu (pusty słownik, gdy pliku jeszcze nie ma)."""
+    if not os.path.exists(path):
+        logging.info(f"Brak pliku stanu {path} - pełny przebieg.")
+        return {}
+    with open(path, encoding="utf-8") as f:
+        known_books = json.load(f)
+    logging.info(f"Wczytano stan {len(known_books)} znanych książek z {path}.")
+    return known_books
+
+
+def save_known_books(path, known_books):
+    """Zapisuje stan atomowo (plik tymczasowy + os.replace), żeby przerwany zapis nie uszkodził stanu."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(known_books, f)
+    os.replace(tmp_path, path)
+    logging.info(f"Zapisano stan {len(known_books)} znanych książek do {path}.")
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def remember_books(books, known_books):
+    """Przepuszcza rekordy dalej (np. do bazy), dopisując ich odciski do `known_books`."""
+    for book in books:
+        known_books[book["url"]] = listing_fingerprint(book["price"])
+        yield book
+
+
+class CrawlCheckpoint:
+    """Dziennik postępu scrapera w pliku JSON Lines - pozwala wznowić przerwany przebieg.
+
+    Każda linia to jedno zdarzenie:
+      {"page": n, "urls": [...]}  - strona listy n przejrzana, jej linki trafiły do kolejki (frontier)
+      {"book": {...}}             - rekord książki gotowy (pobrany i sparsowany)
+      {"flushed": [url, ...]}     - rekordy zatwierdzone w bazie (Neo4jHandler.insert_books_stream, on_flush)
+
+    Plik jest tylko dopisywany, a zdarzenia zapisywane paczkami (co `flush_every` zdarzeń lub
+    co `flush_interval` sekund), więc koszt w pętli scrapera to serializacja jednego rekordu.
+    Urwana ostatnia linia (awaria w trakcie zapisu) jest przy wczytywaniu pomijana.
+    """
+    def __init__(self, path, flush_every=50, flush_interval=5.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.file = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Odtwarza stan z pliku: następna strona listy, linki do pobrania, ukończone URL-e,
+        rekordy jeszcze niezapisane w bazie i liczba zapisanych."""
+        pages, done, flushed = {}, {}, set()
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        logging.warning(f"Pominięto uszkodzoną linię checkpointu {self.path}.")
+                        continue
+                    if "page" in event:
+                        pages[event["page"]] = event["urls"]
+                    elif "book" in event:
+                        done[event["book"]["url"]] = event["book"]
+                    elif "flushed" in event:
+                        flushed.update(event["flushed"])
+        state = {
+            "next_page": max(pages, default=0) + 1,
+            "frontier": [url for page in sorted(pages) for url in pages[page] if url not in done],
+            "done": set(done),
+            "pending": [book for url, book in done.items() if url not in flushed],
+            "flushed": len(flushed & set(done)),
+        }
+        logging.info(f"Checkpoint {self.path}: {len(done)} gotowych książek ({state['flushed']} w bazie), "
+                     f"{len(state['frontier'])} linków w kolejce, następna strona listy: {state['next_page']}.")
+        return state
+
+    def reset(self):
+        """Nowy przebieg - usuwa poprzedni dziennik."""
+        with self.lock:
+            self._close_file()
+            self.buffer = []
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def page_scanned(self, page_num, urls):
+        self._append({"page": page_num, "urls": urls})
+
+    def book_done(self, book):
+        self._append({"book": book})
+
+    def mark_flushed(self, books):
+        """Callback on_flush dla insert_books_stream - zapisywany od razu, bo potwierdza commit w bazie."""
+        self._append({"flushed": [book["url"] for book in books]}, force=True)
+
+    def _append(self, event, force=False):
+        line = json.dumps(event, ensure_ascii=False)
+        with self.lock:
+            self.buffer.append(line)
+            if (force or len(self.buffer) >= self.flush_every
+                    or time.monotonic() - self.last_flush >= self.flush_interval):
+                self._write()
+
+    def flush(self):
+        with self.lock:
+            self._write()
+
+    def _write(self):
+        if self.buffer:
+            if self.file is None:
+                self.file = open(self.path, "a", encoding="utf-8")
+                if self.file.tell() and not _ends_with_newline(self.path):
+                    self.file.write("\n")  # Domykamy urwaną linię z przerwanego przebiegu
+            self.file.write("\n".join(self.buffer) + "\n")
+            self.file.flush()
+            self.buffer = []
+        self.last_flush = time.monotonic()
+
+    def _close_file(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def close(self):
+        with self.lock:
+            self._write()
+            self._close_file()
+
+    def remove(self):
+        """Przebieg zakończony i zapisany w bazie - checkpoint nie jest już potrzebny."""
+        self.reset()
+        logging.info(f"Usunięto checkpoint {self.path}.")
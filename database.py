@@ -1,14 +1,134 @@
-from neo4j import GraphDatabase
 import logging
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+from crawl_state import listing_fingerprint
+from metrics import METRICS
+from record_store import RecordStore
+
+INSERT_BOOKS_QUERY = """
+UNWIND $books AS book
+
+// 1. Tworzenie lub znajdowanie książki (MERGE zapobiega duplikatom)
+MERGE (b:Book {isbn: book.isbn})
+ON CREATE SET b.title = book.title, 
+              b.year = book.year, 
+              b.price = book.price, 
+              b.url = book.url
+ON MATCH SET b.price = book.price // Aktualizacja ceny, jeśli książka już istnieje
+
+// 2. Tworzenie lub znajdowanie autora
+MERGE (a:Author {name: book.author})
+
+// 3. Tworzenie lub znajdowanie wydawnictwa
+MERGE (p:Publisher {name: book.publisher})
+
+// 4. Tworzenie relacji
+MERGE (a)-[:WROTE]->(b)
+MERGE (b)-[:PUBLISHED_BY]->(p)
+"""
+
+
+# Ładowanie fazowe: autorzy i wydawnictwa są scalani raz (faza 1), a paczki książek
+# tylko wyszukują je przez MATCH - równoległe transakcje nie walczą o MERGE tych samych węzłów.
+MERGE_AUTHORS_QUERY = "UNWIND $names AS name MERGE (:Author {name: name})"
+MERGE_PUBLISHERS_QUERY = "UNWIND $names AS name MERGE (:Publisher {name: name})"
+
+INSERT_BOOKS_PREMERGED_QUERY = """
+UNWIND $books AS book
+MATCH (a:Author {name: book.author})
+MATCH (p:Publisher {name: book.publisher})
+MERGE (b:Book {isbn: book.isbn})
+ON CREATE SET b.title = book.title, 
+              b.year = book.year, 
+              b.price = book.price, 
+              b.url = book.url
+ON MATCH SET b.price = book.price
+MERGE (a)-[:WROTE]->(b)
+MERGE (b)-[:PUBLISHED_BY]->(p)
+"""
+
+KNOWN_BOOKS_QUERY = "MATCH (b:Book) WHERE b.url IS NOT NULL RETURN b.url AS url, b.price AS price"
+
+# Indeksy zakresowe pod filtry i sortowania z rejestru zapytań (queries.py): b.price < 20, b.year > 2015,
+# ORDER BY b.price / b.title. Bez nich każde z tych zapytań to pełny skan etykiety Book.
+# (isbn i nazwy autorów/wydawnictw mają już indeksy z constraints unikalności.)
+RANGE_INDEXES = {
+    "book_price": ("Book", "price"),
+    "book_year": ("Book", "year"),
+    "book_title": ("Book", "title"),
+}
+
+
+def _run_write(tx, name, query, param, rows):
+    """Zapytanie zapisu z pomiarem czasu (metrics.py). Każde wywołanie to jedna próba transakcji,
+    więc ponowienia execute_write widać jako nadwyżkę db_write_attempts_total nad liczbą paczek."""
+    METRICS.inc("db_write_attempts_total", query=name)
+    with METRICS.span("db_write", query=name):
+        summary = tx.run(query, {param: rows}).consume()
+    METRICS.observe_summary(summary, query=name)
+    METRICS.inc("db_write_rows_total", len(rows), query=name)
+    return summary
+
+
+def _write_books(tx, books):
+    """Funkcja transakcji dla session.execute_write (sterownik ponawia ją przy błędach przejściowych)."""
+    return _run_write(tx, "insert_books", INSERT_BOOKS_QUERY, "books", books)
+
+
+def _merge_names(tx, query, names):
+    return _run_write(tx, "merge_names", query, "names", names)
+
+
+def _index_batches(books_data, indices, batch_size):
+    """Paczki wierszy o podanych numerach - słowniki powstają dopiero tuż przed wysłaniem paczki."""
+    for start in range(0, len(indices), batch_size):
+        yield [books_data[i] for i in indices[start:start + batch_size]]
+
+
+def _load_partition(driver, batches):
+    """Zapisuje paczki jednej partycji w osobnej sesji. Zwraca (rekordy, próby, węzły, relacje).
+
+    execute_write sam ponawia transakcję przy błędach przejściowych (np. DeadlockDetected);
+    liczba wywołań funkcji transakcji pozwala policzyć te ponowienia.
+    """
+    attempts = rows = nodes_created = relationships_created = 0
+
+    def write_batch(tx, batch):
+        nonlocal attempts
+        attempts += 1
+        return _run_write(tx, "insert_books_premerged", INSERT_BOOKS_PREMERGED_QUERY, "books", batch)
+
+    with driver.session() as session:
+        for batch in batches:
+            summary = session.execute_write(write_batch, batch)
+            rows += len(batch)
+            nodes_created += summary.counters.nodes_created
+            relationships_created += summary.counters.relationships_created
+    return rows, attempts, nodes_created, relationships_created
+
 
 class Neo4jHandler:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri=None, user=None, password=None, version=None, driver=None):
+        # Można przekazać gotowy sterownik (np. atrapę z fake_neo4j.py) - wtedy nie zamykamy go w close()
+        self.owns_driver = driver is None
+        if self.owns_driver:
+            from neo4j import GraphDatabase  # Import dopiero tutaj - atrapa i stałe zapytań go nie wymagają
+            driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.driver = driver
+        # Opcjonalny query_cache.GraphVersion - zmieniany po każdym zapisie, unieważnia cache wyników
+        self.version = version
         logging.info("Połączono z bazą Neo4j.")
 
+    def _bump_version(self):
+        if self.version is not None:
+            self.version.bump()
+
     def close(self):
-        self.driver.close()
-        logging.info("Zamknięto połączenie z Neo4j.")
+        if self.owns_driver:
+            self.driver.close()
+            logging.info("Zamknięto połączenie z Neo4j.")
 
     def setup_constraints(self):
         """Tworzy constraints (wymaganie z zadania: unikalność)."""
@@ -22,38 +142,141 @@ class Neo4jHandler:
                 session.run(query)
         logging.info("Nałożono constraints na bazę (unikalność węzłów).")
 
+    def setup_indexes(self, timeout=300):
+        """Tworzy indeksy zakresowe (RANGE_INDEXES) i czeka, aż będą ONLINE - indeks budowany w tle
+        nie jest używany przez planer, więc pierwsze zapytania po imporcie skanowałyby całą etykietę."""
+        with self.driver.session() as session:
+            for name, (label, prop) in RANGE_INDEXES.items():
+                session.run(f"CREATE RANGE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})").consume()
+            session.run("CALL db.awaitIndexes($timeout)", timeout=timeout).consume()
+        logging.info(f"Indeksy zakresowe gotowe: {', '.join(RANGE_INDEXES)}.")
+
+    def drop_indexes(self):
+        """Usuwa indeksy zakresowe (np. do pomiaru zapytań bez indeksów w benchmarku)."""
+        with self.driver.session() as session:
+            for name in RANGE_INDEXES:
+                session.run(f"DROP INDEX {name} IF EXISTS").consume()
+
+    def fetch_known_books(self):
+        """Tryb przyrostowy: url -> odcisk (cena) wszystkich książek zapisanych w bazie."""
+        with self.driver.session() as session:
+            result = session.run(KNOWN_BOOKS_QUERY)
+            known_books = {r["url"]: listing_fingerprint(r["price"]) for r in result if r["price"] is not None}
+        logging.info(f"Wczytano {len(known_books)} znanych książek z Neo4j.")
+        return known_books
+
     def insert_books_batch(self, books_data):
         """Wstawia dane w formie paczki (batch insert) używając UNWIND."""
-        cypher_query = """
-        UNWIND $books AS book
-        
-        // 1. Tworzenie lub znajdowanie książki (MERGE zapobiega duplikatom)
-        MERGE (b:Book {isbn: book.isbn})
-        ON CREATE SET b.title = book.title, 
-                      b.year = book.year, 
-                      b.price = book.price, 
-                      b.url = book.url
-        ON MATCH SET b.price = book.price // Aktualizacja ceny, jeśli książka już istnieje
-        
-        // 2. Tworzenie lub znajdowanie autora
-        MERGE (a:Author {name: book.author})
-        
-        // 3. Tworzenie lub znajdowanie wydawnictwa
-        MERGE (p:Publisher {name: book.publisher})
-        
-        // 4. Tworzenie relacji
-        MERGE (a)-[:WROTE]->(b)
-        MERGE (b)-[:PUBLISHED_BY]->(p)
-        """
-        
         with self.driver.session() as session:
             # Uruchamiamy transakcję
-            result = session.run(cypher_query, books=books_data)
-            summary = result.consume()
+            summary = _run_write(session, "insert_books", INSERT_BOOKS_QUERY, "books", books_data)
+        self._bump_version()
             
         logging.info(f"Zakończono import. Utworzono węzłów: {summary.counters.nodes_created}, "
                      f"utworzono relacji: {summary.counters.relationships_created}.")
 
+    def insert_books_stream(self, books, batch_size=500, flush_interval=5.0, on_flush=None):
+        """Zapisuje rekordy z generatora w mikro-paczkach (co `batch_size` rekordów albo przy pierwszym
+        rekordzie po upływie `flush_interval` sekund od poprzedniej paczki), każdą w osobnej zarządzanej
+        transakcji zapisu. Czas sprawdzany jest tylko przy nadejściu rekordu - gdy generator stoi,
+        niepełna paczka czeka na kolejny rekord albo na koniec strumienia.
+
+        W pamięci trzymana jest tylko bieżąca paczka, a awaria przerywa jedynie
+        paczkę w locie - wcześniejsze są już zatwierdzone. `on_flush(paczka)` wywoływane jest
+        po zatwierdzeniu każdej paczki (np. CrawlCheckpoint.mark_flushed). Zwraca liczbę zapisanych rekordów.
+        """
+        batch = []
+        saved = nodes_created = relationships_created = 0
+        last_flush = time.monotonic()
+
+        with self.driver.session() as session:
+            def flush():
+                nonlocal batch, saved, nodes_created, relationships_created, last_flush
+                summary = session.execute_write(_write_books, batch)
+                self._bump_version()
+                if on_flush is not None:
+                    on_flush(batch)
+                saved += len(batch)
+                nodes_created += summary.counters.nodes_created
+                relationships_created += summary.counters.relationships_created
+                logging.info(f"Zapisano paczkę {len(batch)} rekordów (łącznie {saved}).")
+                batch = []
+                last_flush = time.monotonic()
+
+            for book in books:
+                batch.append(book)
+                # Czas sprawdzamy przy każdym rekordzie - przy wolnym scraperze paczka nie czeka
+                # na batch_size rekordów, ale zapisuje się dopiero z rekordem, który nadszedł po terminie
+                if len(batch) >= batch_size or time.monotonic() - last_flush >= flush_interval:
+                    flush()
+            if batch:
+                flush()
+
+        logging.info(f"Zakończono import strumieniowy ({saved} rekordów). Utworzono węzłów: {nodes_created}, "
+                     f"utworzono relacji: {relationships_created}.")
+        return saved
+
+    def insert_books_parallel(self, books_data, workers=4, batch_size=1000):
+        """Ładowanie fazowe dużych zbiorów: najpierw wszyscy autorzy i wydawnictwa jednym MERGE,
+        potem książki i relacje równolegle, w `workers` partycjach (każda we własnej sesji).
+
+        Partycje wyznacza hash ISBN, więc ta sama książka nigdy nie trafia do dwóch transakcji naraz.
+        Wiersze w paczce są posortowane po (autor, wydawnictwo), dzięki czemu transakcje blokują
+        wspólne węzły w tej samej kolejności - to ogranicza zakleszczenia, a pozostałe
+        ponawia execute_write. Zwraca statystyki (w tym rekordy/s).
+
+        `books_data` to lista słowników albo record_store.RecordStore - wtedy partycje trzymają
+        tylko numery wierszy, a słowniki powstają dopiero dla paczki wysyłanej do bazy.
+        """
+        start = time.perf_counter()
+        if isinstance(books_data, RecordStore):
+            column = books_data.column
+            distinct = books_data.distinct
+        else:
+            column = lambda field: [book[field] for book in books_data]
+            distinct = lambda field: sorted({book[field] for book in books_data})
+
+        # Faza 1: deduplikacja i scalenie węzłów wymiarów
+        authors = distinct("author")
+        publishers = distinct("publisher")
+        with self.driver.session() as session:
+            dims = session.execute_write(_merge_names, MERGE_AUTHORS_QUERY, authors)
+            dims_nodes = dims.counters.nodes_created
+            dims = session.execute_write(_merge_names, MERGE_PUBLISHERS_QUERY, publishers)
+            dims_nodes += dims.counters.nodes_created
+
+        # Faza 2: partycjonowanie książek i równoległy zapis paczek
+        isbns, book_authors, book_publishers = column("isbn"), column("author"), column("publisher")
+        partitions = [array("I") for _ in range(workers)]
+        for i in range(len(books_data)):
+            partitions[zlib.crc32(isbns[i].encode("utf-8")) % workers].append(i)
+        partitions = [array("I", sorted(partition, key=lambda i: (book_authors[i], book_publishers[i])))
+                      for partition in partitions]
+        partition_batches = [_index_batches(books_data, partition, batch_size) for partition in partitions]
+
+        total_batches = sum(-(-len(partition) // batch_size) for partition in partitions)
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(lambda batches: _load_partition(self.driver, batches), partition_batches))
+        finally:
+            # Nawet częściowy zapis zmienia dane w grafie
+            self._bump_version()
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            "rows": sum(r[0] for r in results),
+            "batches": total_batches,
+            "retries": sum(r[1] for r in results) - total_batches,
+            "nodes_created": dims_nodes + sum(r[2] for r in results),
+            "relationships_created": sum(r[3] for r in results),
+            "seconds": elapsed,
+        }
+        stats["rows_per_second"] = stats["rows"] / elapsed if elapsed else 0.0
+        logging.info(f"Zakończono import równoległy ({workers} sesji): {stats['rows']} rekordów w "
+                     f"{elapsed:.2f} s ({stats['rows_per_second']:.0f} rek./s), ponowień: {stats['retries']}. "
+                     f"Utworzono węzłów: {stats['nodes_created']}, relacji: {stats['relationships_created']}.")
+        return stats
+
 
 # === TESTOWANIE BAZY ===
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+import logging
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+except ImportError:  # lxml jest opcjonalny - bez niego zostaje parser BeautifulSoup
+    lxml = None
+
+# Ekstraktory wyciągają ze strony tylko potrzebne pola, bez budowania pełnego drzewa tam,
+# gdzie się da. Każdy backend musi zwracać dokładnie to samo co SoupExtractor (referencja).
+#
+#   parse_listing(html) -> [(względny link do książki, cena z listy lub None), ...]
+#   parse_book(html)    -> (tytuł, cena jako tekst, UPC); brak pola = wyjątek
+
+
+class SoupExtractor:
+    """Referencyjny backend: pełne drzewo BeautifulSoup z parserem html.parser."""
+    name = "soup"
+
+    def parse_listing(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        return self._listing_from_tree(soup)
+
+    def parse_book(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        return self._book_from_tree(soup)
+
+    def _listing_from_tree(self, soup):
+        links = []
+        for article in soup.find_all('article', class_='product_pod'):
+            price_tag = article.find('p', class_='price_color')
+            links.append((article.find('h3').find('a')['href'], price_tag.text if price_tag else None))
+        return links
+
+    def _book_from_tree(self, soup):
+        title = soup.find('h1').text
+        price_str = soup.find('p', class_='price_color').text
+        # UPC to odpowiednik ISBN na tej stronie
+        isbn = soup.find('th', string='UPC').find_next_sibling('td').text
+        return title, price_str, isbn
+
+
+class StrainedSoupExtractor(SoupExtractor):
+    """BeautifulSoup z SoupStrainer - drzewo budowane jest tylko z potrzebnych znaczników."""
+    name = "strainer"
+
+    LISTING_STRAINER = SoupStrainer('article')
+    # th/td zostają rodzeństwem w okrojonym drzewie, więc find_next_sibling('td') nadal działa
+    BOOK_STRAINER = SoupStrainer(['h1', 'p', 'th', 'td'])
+
+    def parse_listing(self, html):
+        soup = BeautifulSoup(html, 'html.parser', parse_only=self.LISTING_STRAINER)
+        return self._listing_from_tree(soup)
+
+    def parse_book(self, html):
+        soup = BeautifulSoup(html, 'html.parser', parse_only=self.BOOK_STRAINER)
+        return self._book_from_tree(soup)
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class LxmlExtractor:
+    """Szybka ścieżka: parser lxml (C) i zapytania XPath."""
+    name = "lxml"
+
+    ARTICLES = f"//article[{_has_class('product_pod')}]"
+    PRICE = f".//p[{_has_class('price_color')}]"
+
+    def parse_listing(self, html):
+        doc = lxml.html.fromstring(html)
+        links = []
+        for article in doc.xpath(self.ARTICLES):
+            href = article.xpath('.//h3[1]//a[1]/@href')[0]
+            prices = article.xpath(self.PRICE)
+            links.append((str(href), prices[0].text_content() if prices else None))
+        return links
+
+    def parse_book(self, html):
+        doc = lxml.html.fromstring(html)
+        title = doc.xpath('//h1')[0].text_content()
+        price_str = doc.xpath(self.PRICE)[0].text_content()
+        # Odpowiednik find('th', string='UPC'): znacznik th z dokładnie jednym tekstem "UPC"
+        isbn = doc.xpath('//th[count(*) = 0 and . = "UPC"]/following-sibling::td[1]')[0].text_content()
+        return title, price_str, isbn
+
+
+EXTRACTORS = {
+    SoupExtractor.name: SoupExtractor,
+    StrainedSoupExtractor.name: StrainedSoupExtractor,
+    LxmlExtractor.name: LxmlExtractor,
+}
+
+
+def available_extractors():
+    """Nazwy backendów możliwych do użycia w tym środowisku."""
+    return [name for name in EXTRACTORS if name != LxmlExtractor.name or lxml is not None]
+
+
+def get_extractor(name="auto"):
+    """Zwraca ekstraktor o podanej nazwie; "auto" = lxml, jeśli jest zainstalowany, inaczej html.parser."""
+    if name == "auto":
+        name = LxmlExtractor.name if lxml is not None else SoupExtractor.name
+    if name not in EXTRACTORS:
+        raise ValueError(f"Nieznany parser: {name} (dostępne: {', '.join(EXTRACTORS)})")
+    if name == LxmlExtractor.name and lxml is None:
+        logging.warning("Brak biblioteki lxml - używam parsera html.parser.")
+        name = SoupExtractor.name
+    return EXTRACTORS[name]()
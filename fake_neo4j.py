@@ -0,0 +1,246 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from bulk_export import GRAPH_QUERIES
+from database import (INSERT_BOOKS_PREMERGED_QUERY, INSERT_BOOKS_QUERY, KNOWN_BOOKS_QUERY, MERGE_AUTHORS_QUERY,
+                      MERGE_PUBLISHERS_QUERY)
+from queries import CATALOGUE_QUERY, PLAN_MODES, QUERIES
+
+# Atrapa sterownika Neo4j do benchmarków: graf trzymany w pamięci, a zapytania projektu
+# (zapis z database.py, rejestr z queries.py, katalog do raportu) wykonywane w czystym Pythonie.
+# Rozpoznawany jest dokładny tekst zapytania - nieznane zapytanie to błąd, nie cichy pusty wynik.
+# Każde wywołanie jest zapisywane w FakeNeo4jDriver.log (nazwa, liczba wierszy, czas).
+# Prefiks EXPLAIN/PROFILE jest akceptowany, ale plan jest stały (_canned_plan) - atrapa nie ma
+# planera, więc nadaje się do sprawdzenia obsługi planów, nie do oceny indeksów.
+
+
+# Polecenia schematu (constraints, indeksy) - atrapa nie ma indeksów, więc są bez skutku
+SCHEMA_PREFIXES = ("CREATE CONSTRAINT", "CREATE RANGE INDEX", "DROP INDEX", "CALL db.awaitIndexes")
+
+
+def _canned_plan(name, rows, profile):
+    """Plan w kształcie ResultSummary.plan/profile sterownika: ProduceResults <- Projection <- NodeByLabelScan.
+    PROFILE dokłada dbHits i rows (po jednym db hit na wiersz wyniku i węzeł)."""
+    plan = {"operatorType": "ProduceResults@neo4j", "identifiers": [], "args": {"Details": name},
+            "children": [{"operatorType": "Projection@neo4j", "identifiers": [], "args": {"Details": name},
+                          "children": [{"operatorType": "NodeByLabelScan@neo4j", "identifiers": [],
+                                        "args": {"Details": "n:Book"}, "children": []}]}]}
+    if profile:
+        node = plan
+        while node:
+            node.update(dbHits=rows, rows=rows, pageCacheHits=0, pageCacheMisses=0, time=0)
+            node = node["children"][0] if node["children"] else None
+    return plan
+
+
+def _round(value, digits=2):
+    return None if value is None else round(value, digits)
+
+
+class FakeGraph:
+    """Węzły Book/Author/Publisher i relacje WROTE/PUBLISHED_BY w słownikach i zbiorach."""
+    def __init__(self):
+        self.books = {}          # isbn -> właściwości
+        self.authors = set()
+        self.publishers = set()
+        self.wrote = set()       # (autor, isbn)
+        self.published_by = set()  # (isbn, wydawnictwo)
+        self.lock = threading.Lock()
+
+    # --- Zapis ---
+
+    def merge_names(self, nodes, names):
+        created = len(set(names) - nodes)
+        nodes.update(names)
+        return {"nodes_created": created}
+
+    def insert_books(self, books, premerged=False):
+        nodes_created = relationships_created = 0
+        for book in books:
+            if premerged and (book["author"] not in self.authors or book["publisher"] not in self.publishers):
+                continue  # MATCH bez dopasowania odrzuca wiersz
+            existing = self.books.get(book["isbn"])
+            if existing is None:
+                self.books[book["isbn"]] = {key: book[key] for key in ("isbn", "title", "year", "price", "url")}
+                nodes_created += 1
+            else:
+                existing["price"] = book["price"]
+            for nodes, name in ((self.authors, book["author"]), (self.publishers, book["publisher"])):
+                if name not in nodes:
+                    nodes.add(name)
+                    nodes_created += 1
+            for edges, edge in ((self.wrote, (book["author"], book["isbn"])),
+                                (self.published_by, (book["isbn"], book["publisher"]))):
+                if edge not in edges:
+                    edges.add(edge)
+                    relationships_created += 1
+        return {"nodes_created": nodes_created, "relationships_created": relationships_created}
+
+    # --- Odczyt (odpowiedniki zapytań z queries.py) ---
+
+    def _publisher_of(self):
+        return {isbn: publisher for isbn, publisher in self.published_by}
+
+    def _author_of(self):
+        return {isbn: author for author, isbn in self.wrote}
+
+    def price_stats(self):
+        prices = [book["price"] for book in self.books.values() if book["price"] is not None]
+        return [{
+            "total": len(self.books),
+            "min_price": _round(min(prices)) if prices else None,
+            "avg_price": _round(sum(prices) / len(prices)) if prices else None,
+            "max_price": _round(max(prices)) if prices else None,
+        }]
+
+    def cheap_books(self):
+        rows = [{"title": b["title"], "price": b["price"]} for b in self.books.values()
+                if b["price"] is not None and b["price"] < 20]
+        return sorted(rows, key=lambda row: row["title"])[:5]
+
+    def recent_books(self):
+        rows = [{"title": self.books[isbn]["title"], "year": self.books[isbn]["year"], "publisher": publisher}
+                for isbn, publisher in self.published_by
+                if self.books[isbn]["year"] is not None and self.books[isbn]["year"] > 2015]
+        return sorted(rows, key=lambda row: row["title"])[:10]
+
+    def cheapest_books(self):
+        rows = [{"title": b["title"], "year": b["year"], "price": b["price"]} for b in self.books.values()]
+        # W Cypher null przy ORDER BY ASC trafia na koniec
+        return sorted(rows, key=lambda row: (row["price"] is None, row["price"] or 0, row["title"]))[:20]
+
+    def author_stats(self):
+        per_author = {}
+        for author, isbn in self.wrote:
+            per_author.setdefault(author, []).append(self.books[isbn]["price"])
+        rows = []
+        for author, prices in sorted(per_author.items()):
+            known = [price for price in prices if price is not None]
+            rows.append({"author": author, "avg_price": _round(sum(known) / len(known)) if known else None,
+                         "book_count": len(prices)})
+        return rows
+
+    def relations(self):
+        publisher_of = self._publisher_of()
+        rows = [{"author": author, "title": self.books[isbn]["title"], "publisher": publisher_of[isbn]}
+                for author, isbn in self.wrote if isbn in publisher_of]
+        return sorted(rows, key=lambda row: (row["author"], row["title"]))[:5]
+
+    def catalogue(self):
+        author_of, publisher_of = self._author_of(), self._publisher_of()
+        books = sorted(self.books.values(), key=lambda b: (b["title"], b["isbn"]))
+        return [{"title": b["title"], "author": author_of.get(b["isbn"]), "publisher": publisher_of.get(b["isbn"]),
+                 "year": b["year"], "price": b["price"]} for b in books]
+
+    def known_books(self):
+        return [{"url": b["url"], "price": b["price"]} for b in self.books.values() if b["url"] is not None]
+
+    def dump(self, part):
+        """Wiersze zapytań GRAPH_QUERIES (bulk_export.graph_from_driver)."""
+        if part == "books":
+            return [dict(book) for book in self.books.values()]
+        if part in ("authors", "publishers"):
+            return [{"name": name} for name in getattr(self, part)]
+        if part == "wrote":
+            return [{"author": author, "isbn": isbn} for author, isbn in self.wrote]
+        return [{"isbn": isbn, "publisher": publisher} for isbn, publisher in self.published_by]
+
+
+class FakeResult:
+    """Podzbiór neo4j.Result używany w projekcie: iteracja po rekordach, data() i consume()."""
+    def __init__(self, records, counters, seconds, plan=None, profile=None):
+        self.records = records
+        self.summary = SimpleNamespace(
+            counters=SimpleNamespace(nodes_created=counters.get("nodes_created", 0),
+                                     relationships_created=counters.get("relationships_created", 0)),
+            result_available_after=int(seconds * 1000),
+            result_consumed_after=0,
+            plan=plan,
+            profile=profile,
+        )
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def data(self):
+        return [dict(record) for record in self.records]
+
+    def consume(self):
+        return self.summary
+
+
+class FakeSession:
+    """Sesja i transakcja w jednym - atrapa nie ma izolacji ani wycofywania zmian."""
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters=None, **kwargs):
+        return self.driver.execute(query, {**(parameters or {}), **kwargs})
+
+    def execute_write(self, transaction_function, *args, **kwargs):
+        return transaction_function(self, *args, **kwargs)
+
+    execute_read = execute_write
+
+
+class FakeNeo4jDriver:
+    """Zamiennik neo4j.Driver dla Neo4jHandler, QueryExecutor, GraphAnalytics i ReportGenerator."""
+    def __init__(self, graph=None):
+        self.graph = graph if graph is not None else FakeGraph()
+        self.log = []  # (nazwa zapytania, liczba wierszy wejścia/wyniku, czas [s])
+        self.handlers = {
+            INSERT_BOOKS_QUERY: ("insert_books", lambda p: self.graph.insert_books(p["books"])),
+            INSERT_BOOKS_PREMERGED_QUERY: ("insert_books_premerged",
+                                           lambda p: self.graph.insert_books(p["books"], premerged=True)),
+            MERGE_AUTHORS_QUERY: ("merge_authors", lambda p: self.graph.merge_names(self.graph.authors, p["names"])),
+            MERGE_PUBLISHERS_QUERY: ("merge_publishers",
+                                     lambda p: self.graph.merge_names(self.graph.publishers, p["names"])),
+            KNOWN_BOOKS_QUERY: ("known_books", lambda p: self.graph.known_books()),
+            CATALOGUE_QUERY: ("catalogue", lambda p: self.graph.catalogue()),
+        }
+        for name, query in QUERIES.items():
+            self.handlers[query] = (name, lambda p, name=name: getattr(self.graph, name)())
+        for part, query in GRAPH_QUERIES.items():
+            self.handlers[query] = (f"graph_{part}", lambda p, part=part: self.graph.dump(part))
+
+    def session(self, **kwargs):
+        return FakeSession(self)
+
+    def close(self):
+        pass
+
+    def execute(self, query, params):
+        start = time.perf_counter()
+        mode = query.lstrip().split(None, 1)[0] if query.strip() else None
+        if mode in PLAN_MODES:
+            query = query.lstrip()[len(mode):].lstrip(" ")
+        if query.lstrip().startswith(SCHEMA_PREFIXES):
+            name, outcome = "schema", {}
+        elif query in self.handlers:
+            name, handler = self.handlers[query]
+            with self.graph.lock:
+                outcome = handler(params)
+        else:
+            raise ValueError(f"Atrapa Neo4j nie obsługuje zapytania: {query.strip()[:80]}")
+
+        records, counters = (outcome, {}) if isinstance(outcome, list) else ([], outcome)
+        plan = profile = None
+        if mode == "EXPLAIN":
+            plan, records = _canned_plan(name, 0, profile=False), []  # Sam plan, bez wierszy
+        elif mode == "PROFILE":
+            profile = _canned_plan(name, len(records), profile=True)
+        seconds = time.perf_counter() - start
+        size = len(records) if isinstance(outcome, list) else len(params.get("books", params.get("names", [])))
+        with self.graph.lock:
+            self.log.append((name, size, seconds))
+        return FakeResult(records, counters, seconds, plan=plan, profile=profile)
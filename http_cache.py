@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+
+class ResponseCache:
+    """Dyskowy cache odpowiedzi HTTP kluczowany adresem URL.
+
+    Każdy wpis to dwa pliki: `<klucz>.json` (URL, ETag, Last-Modified, czas pobrania, rozmiar)
+    i `<klucz>.html` (treść strony). Wpis młodszy niż `ttl` sekund zwracany jest bez łączenia
+    z serwerem; starszy jest rewalidowany zapytaniem warunkowym (If-None-Match/If-Modified-Since).
+    Gdy łączny rozmiar przekroczy `max_bytes`, usuwane są najdawniej używane wpisy. Czas użycia
+    przy trafieniu zapisywany jest na dysk najwyżej raz na `touch_interval` sekund na wpis, więc
+    kolejność usuwania po restarcie jest dokładna z tą rozdzielczością.
+    """
+    def __init__(self, directory=".http_cache", ttl=3600, max_bytes=100 * 1024 * 1024, touch_interval=60):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self.lock = threading.Lock()
+
+        # Liczniki skuteczności cache
+        self.hits = 0            # Świeży wpis - brak żądania HTTP
+        self.revalidated = 0     # Odpowiedź 304 - treść z cache
+        self.misses = 0          # Pełne pobranie (200)
+        self.evictions = 0
+        self.bytes_from_cache = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.index = {}  # klucz -> metadane wpisu (treść czytana z dysku dopiero przy trafieniu)
+        self.saved_use = {}  # klucz -> last_used zapisany w pliku .json
+        self.total_bytes = 0
+        for name in os.listdir(directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, name), encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            key = name[:-len(".json")]
+            self.index[key] = meta
+            self.saved_use[key] = meta["last_used"]
+            self.total_bytes += meta["size"]
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def _read_body(self, key):
+        try:
+            with open(self._path(key, "html"), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def get_fresh(self, url):
+        """Zwraca treść strony, jeśli wpis jest młodszy niż TTL, w przeciwnym razie None."""
+        key = self._key(url)
+        with self.lock:
+            meta = self.index.get(key)
+            if meta is None or time.time() - meta["fetched_at"] >= self.ttl:
+                return None
+            size = meta["size"]
+        body = self._read_body(key)
+        if body is None:
+            return None
+        with self.lock:
+            self.hits += 1
+            self.bytes_from_cache += size
+            # Wpis mógł zostać usunięty albo podmieniony po odczycie treści - aktualizujemy bieżący
+            meta = self.index.get(key)
+            if meta is not None:
+                meta["last_used"] = now = time.time()
+                # Plik metadanych odświeżany najwyżej co touch_interval
+                if now - self.saved_use.get(key, 0) >= self.touch_interval:
+                    self._write_meta(key, meta)
+        return body
+
+    def conditional_headers(self, url):
+        """Nagłówki zapytania warunkowego dla przeterminowanego wpisu (pusty słownik, gdy brak wpisu)."""
+        with self.lock:
+            meta = self.index.get(self._key(url))
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def revalidate(self, url):
+        """Obsługa 304: odświeża czas pobrania wpisu i zwraca zapisaną treść."""
+        key = self._key(url)
+        body = self._read_body(key)
+        if body is None:
+            return None
+        with self.lock:
+            meta = self.index.get(key)
+            if meta is None:
+                return None
+            meta["fetched_at"] = meta["last_used"] = time.time()
+            self.revalidated += 1
+            self.bytes_from_cache += meta["size"]
+            self._write_meta(key, meta)
+        return body
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Zapisuje świeżo pobraną stronę (odpowiedź 200)."""
+        key = self._key(url)
+        data = body.encode("utf-8")
+        now = time.time()
+        meta = {"url": url, "etag": etag, "last_modified": last_modified,
+                "fetched_at": now, "last_used": now, "size": len(data)}
+
+        # Zapis atomowy: plik tymczasowy + os.replace
+        tmp_path = self._path(key, f"html.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key, "html"))
+
+        with self.lock:
+            self.misses += 1
+            old = self.index.get(key)
+            if old is not None:
+                self.total_bytes -= old["size"]
+            self.index[key] = meta
+            self.total_bytes += meta["size"]
+            self._write_meta(key, meta)
+            self._evict()
+
+    def _write_meta(self, key, meta):
+        tmp_path = self._path(key, f"json.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path(key, "json"))
+        self.saved_use[key] = meta["last_used"]
+
+    def _evict(self):
+        """Usuwa najdawniej używane wpisy, aż cache zmieści się w limicie (wywoływane pod blokadą)."""
+        if self.total_bytes <= self.max_bytes:
+            return
+        for key, meta in sorted(self.index.items(), key=lambda item: item[1]["last_used"]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            for ext in ("json", "html"):
+                try:
+                    os.remove(self._path(key, ext))
+                except OSError:
+                    pass
+            del self.index[key]
+            self.saved_use.pop(key, None)
+            self.total_bytes -= meta["size"]
+            self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.index),
+                "bytes_on_disk": self.total_bytes,
+                "bytes_from_cache": self.bytes_from_cache,
+            }
+
+    def log_stats(self):
+        s = self.stats()
+        logging.info(f"Cache HTTP: trafienia {s['hits']}, rewalidacje 304 {s['revalidated']}, "
+                     f"pobrania {s['misses']}, usunięte {s['evictions']}, "
+                     f"wpisy {s['entries']} ({s['bytes_on_disk'] / 1024:.0f} KiB).")
@@ -0,0 +1,279 @@
+import heapq
+import logging
+import math
+import operator
+import sys
+import time
+from array import array
+
+try:
+    import numpy
+except ImportError:  # numpy jest opcjonalny - bez niego te same wyniki liczone są w czystym Pythonie
+    numpy = None
+
+from metrics import METRICS
+from queries import QUERIES, QueryExecutor, QueryResults
+from record_store import RecordStore
+
+# Lokalny silnik analityki: wyniki zapytań z rejestru (queries.py) i wiersze katalogu liczone
+# z rekordów scrapera albo z pliku RecordStore - bez bazy danych i bez podróży przez sieć.
+# Rekordy są najpierw jednym przebiegiem w Pythonie zwijane do grafu (unikalne książki, relacje)
+# w nowych kolumnach array.array; filtry, Top-N i agregacje po autorach idą potem wektorowo na tych
+# kolumnach (numpy.frombuffer bez dalszego kopiowania). Sortowanie po tekstach dotyczy już tylko kandydatów.
+#
+# Graf odtwarzany jest tak, jak zbudowałby go INSERT_BOOKS_QUERY: książka to unikalny ISBN,
+# tytuł/rok/URL z pierwszego rekordu, cena z ostatniego; relacje WROTE/PUBLISHED_BY bez powtórzeń.
+# Migawka zna tylko swoje rekordy - książki wgrane do bazy wcześniejszymi przebiegami w niej nie są.
+
+BACKENDS = ("cypher", "local")
+
+# Zapytania bez ORDER BY - wyniki porównywane po posortowaniu wg tych kolumn
+UNORDERED_QUERIES = {"author_stats": ("author",)}
+
+
+def _round(value, digits=2):
+    return None if value is None else round(float(value), digits)
+
+
+class LocalGraph:
+    """Książki, autorzy, wydawnictwa i relacje w kolumnach; metody o nazwach zapytań z QUERIES
+    zwracają te same wiersze co Cypher."""
+    def __init__(self, records):
+        store = records if isinstance(records, RecordStore) else RecordStore.from_records(records)
+        self.store = store
+        self.authors = store.authors.values
+        self.publishers = store.publishers.values
+        self.rows = array("I")     # Książka -> wiersz pierwszego rekordu w store
+        self.prices = array("d")   # Cena z ostatniego rekordu (ON MATCH SET b.price)
+        self.years = array("h")
+        self.book_authors = []     # Książka -> kody autorów
+        self.book_publishers = []  # Książka -> kody wydawnictw
+        books = {}
+        for i in range(len(store)):
+            isbn = store.isbns[i]
+            book = books.get(isbn)
+            if book is None:
+                book = books[isbn] = len(self.rows)
+                self.rows.append(i)
+                self.prices.append(store.prices[i])
+                self.years.append(store.years[i])
+                self.book_authors.append([])
+                self.book_publishers.append([])
+            else:
+                self.prices[book] = store.prices[i]
+            for codes, code in ((self.book_authors[book], store.authors.codes[i]),
+                                (self.book_publishers[book], store.publishers.codes[i])):
+                if code not in codes:
+                    codes.append(code)
+
+        # Relacje jako pary kolumn (autor, książka) i (książka, wydawnictwo)
+        self.wrote_author, self.wrote_book = array("I"), array("I")
+        self.published_book, self.published_publisher = array("I"), array("I")
+        for book in range(len(self.rows)):
+            for author in self.book_authors[book]:
+                self.wrote_author.append(author)
+                self.wrote_book.append(book)
+            for publisher in self.book_publishers[book]:
+                self.published_book.append(book)
+                self.published_publisher.append(publisher)
+
+    @classmethod
+    def load(cls, path):
+        """Migawka z pliku RecordStore (własny format albo .parquet)."""
+        return cls(RecordStore.load(path))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def title(self, book):
+        return self.store.titles[self.rows[book]]
+
+    def isbn(self, book):
+        return self.store.isbns[self.rows[book]]
+
+    # --- Operacje na kolumnach (numpy, jeśli jest) ---
+
+    @staticmethod
+    def _vector(column):
+        return numpy.frombuffer(column, dtype=column.typecode)
+
+    def _select(self, column, op, value, through=None):
+        """Indeksy wierszy, dla których op(column[i], value). Z `through` (kolumna indeksów książek,
+        np. wrote_book) warunek dotyczy książki wskazanej przez wiersz relacji."""
+        if numpy is not None:
+            vector = self._vector(column)
+            if through is not None:
+                vector = vector[self._vector(through)]
+            return numpy.flatnonzero(op(vector, value)).tolist()
+        if through is not None:
+            return [i for i, book in enumerate(through) if op(column[book], value)]
+        return [i for i, x in enumerate(column) if op(x, value)]
+
+    def _kth_smallest(self, column, k):
+        """k-ta najmniejsza wartość kolumny (od 1) - próg wyboru kandydatów do Top-N."""
+        if numpy is not None:
+            return numpy.partition(self._vector(column), k - 1)[k - 1].item()
+        return heapq.nsmallest(k, column)[-1]
+
+    # --- Zapytania z rejestru ---
+
+    def price_stats(self):
+        if not self.rows:
+            return [{"total": 0, "min_price": None, "avg_price": None, "max_price": None}]
+        if numpy is not None:
+            prices = self._vector(self.prices)
+            low, mean, high = prices.min(), prices.mean(), prices.max()
+        else:
+            low, mean, high = min(self.prices), math.fsum(self.prices) / len(self.prices), max(self.prices)
+        return [{"total": len(self.rows), "min_price": _round(low), "avg_price": _round(mean),
+                 "max_price": _round(high)}]
+
+    def cheap_books(self):
+        books = heapq.nsmallest(5, self._select(self.prices, operator.lt, 20), key=self.title)
+        return [{"title": self.title(b), "price": self.prices[b]} for b in books]
+
+    def recent_books(self):
+        edges = self._select(self.years, operator.gt, 2015, through=self.published_book)
+        edges = heapq.nsmallest(10, edges, key=lambda e: self.title(self.published_book[e]))
+        return [{"title": self.title(self.published_book[e]), "year": self.years[self.published_book[e]],
+                 "publisher": self.publishers[self.published_publisher[e]]} for e in edges]
+
+    def cheapest_books(self, limit=20):
+        if not self.rows:
+            return []
+        # Kandydaci: cena nie większa niż limit-ta najmniejsza; remisy rozstrzyga tytuł
+        threshold = self._kth_smallest(self.prices, min(limit, len(self.rows)))
+        books = heapq.nsmallest(limit, self._select(self.prices, operator.le, threshold),
+                                key=lambda b: (self.prices[b], self.title(b)))
+        return [{"title": self.title(b), "year": self.years[b], "price": self.prices[b]} for b in books]
+
+    def author_stats(self):
+        if numpy is not None:
+            authors = self._vector(self.wrote_author)
+            prices = self._vector(self.prices)[self._vector(self.wrote_book)]
+            counts = numpy.bincount(authors, minlength=len(self.authors)).tolist()
+            sums = numpy.bincount(authors, weights=prices, minlength=len(self.authors)).tolist()
+        else:
+            counts, sums = [0] * len(self.authors), [0.0] * len(self.authors)
+            for author, book in zip(self.wrote_author, self.wrote_book):
+                counts[author] += 1
+                sums[author] += self.prices[book]
+        rows = [{"author": name, "avg_price": _round(sums[code] / counts[code]), "book_count": counts[code]}
+                for code, name in enumerate(self.authors) if counts[code]]
+        return sorted(rows, key=lambda row: row["author"])
+
+    def relations(self, limit=5):
+        # Autorzy w kolejności nazw - wiersze zbierane tylko do chwili, gdy pełne grupy dają `limit`
+        books_by_author = {}
+        for author, book in zip(self.wrote_author, self.wrote_book):
+            books_by_author.setdefault(author, []).append(book)
+        rows = []
+        for author in sorted(books_by_author, key=lambda code: self.authors[code]):
+            if len(rows) >= limit:
+                break
+            for book in books_by_author[author]:
+                rows.extend({"author": self.authors[author], "title": self.title(book),
+                             "publisher": self.publishers[publisher]} for publisher in self.book_publishers[book])
+        return sorted(rows, key=lambda row: (row["author"], row["title"]))[:limit]
+
+    # --- Katalog do załącznika PDF ---
+
+    def catalogue_rows(self):
+        """Odpowiednik CATALOGUE_QUERY - wiersze dla ReportGenerator.generate_catalogue_appendix(rows=...)."""
+        for book in sorted(range(len(self.rows)), key=lambda b: (self.title(b), self.isbn(b))):
+            for author in self.book_authors[book] or [None]:
+                for publisher in self.book_publishers[book] or [None]:
+                    yield {"title": self.title(book),
+                           "author": None if author is None else self.authors[author],
+                           "publisher": None if publisher is None else self.publishers[publisher],
+                           "year": self.years[book], "price": self.prices[book]}
+
+
+class LocalQueryExecutor:
+    """Zamiennik QueryExecutor: te same nazwy zapytań i QueryResults, wyniki z LocalGraph."""
+    def __init__(self, graph, queries=QUERIES):
+        self.graph = graph
+        self.queries = queries
+
+    def run(self, names=None, params=None):
+        """`params` jest ignorowane - zapytania z rejestru nie mają parametrów."""
+        results = QueryResults()
+        for name in list(names or self.queries):
+            if not callable(getattr(LocalGraph, name, None)):
+                raise ValueError(f"Brak lokalnej implementacji zapytania: {name}")
+            start = time.perf_counter()
+            with METRICS.span("query", query=name, backend="local"):
+                results.rows[name] = getattr(self.graph, name)()
+            results.timings[name] = time.perf_counter() - start
+        results.log_timings()
+        return results
+
+
+def make_executor(backend, driver=None, graph=None, cache=None, plan_mode=None):
+    """Wykonawca zapytań dla backendu: "cypher" (baza przez `driver`) lub "local" (`graph` - LocalGraph).
+    `plan_mode` (EXPLAIN/PROFILE) dotyczy tylko Cyphera."""
+    if backend == "cypher":
+        return QueryExecutor(driver, cache=cache, plan_mode=plan_mode)
+    if backend == "local":
+        return LocalQueryExecutor(graph)
+    raise ValueError(f"Nieznany backend analityki: {backend} (dostępne: {', '.join(BACKENDS)})")
+
+
+# --- Zgodność backendów ---
+
+def _same_value(a, b):
+    # Liczby z round(..., 2) mogą się różnić o ostatnią cyfrę (zaokrąglanie połówek w Cypher i Pythonie)
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool):
+        return math.isclose(a, b, rel_tol=0, abs_tol=0.0101)
+    return a == b
+
+
+def compare_results(expected, actual, names=None):
+    """Różnice między dwoma QueryResults (np. Cypher vs lokalnie) jako lista opisów; pusta = zgodne."""
+    differences = []
+    for name in names or expected.rows:
+        left, right = expected[name], actual[name]
+        if name in UNORDERED_QUERIES:
+            key = lambda row: tuple(row[column] for column in UNORDERED_QUERIES[name])
+            left, right = sorted(left, key=key), sorted(right, key=key)
+        if len(left) != len(right):
+            differences.append(f"{name}: {len(left)} vs {len(right)} wierszy")
+            continue
+        for i, (row_a, row_b) in enumerate(zip(left, right)):
+            if row_a.keys() != row_b.keys() or not all(_same_value(row_a[k], row_b[k]) for k in row_a):
+                differences.append(f"{name}[{i}]: {row_a} != {row_b}")
+                break
+    return differences
+
+
+def check_consistency(driver, graph, names=None):
+    """Uruchamia zapytania na obu backendach i zwraca różnice (compare_results).
+
+    Sprawdza zgodność z Cypherem tylko z prawdziwym sterownikiem Neo4j (jak w `python local_analytics.py
+    <rekordy>`); z FakeNeo4jDriver porównuje dwie implementacje w Pythonie."""
+    expected = QueryExecutor(driver).run(names)
+    actual = LocalQueryExecutor(graph).run(names)
+    differences = compare_results(expected, actual, names)
+    for difference in differences:
+        logging.warning(f"Niezgodność backendów analityki - {difference}")
+    return differences
+
+
+# === URUCHOMIENIE: porównanie migawki z bazą, do której ją wgrano ===
+if __name__ == "__main__":
+    from neo4j import GraphDatabase
+
+    URI = "bolt://localhost:7687"
+    USER = "neo4j"
+    PASSWORD = "testtest" # <--- ZMIEŃ NA SWOJE HASŁO
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if len(sys.argv) != 2:
+        sys.exit("Użycie: python local_analytics.py <plik RecordStore>")
+    driver = GraphDatabase.driver(URI, auth=(USER, PASSWORD))
+    try:
+        differences = check_consistency(driver, LocalGraph.load(sys.argv[1]))
+    finally:
+        driver.close()
+    print("Backendy zgodne." if not differences else f"Niezgodności: {len(differences)}")
+    sys.exit(1 if differences else 0)
@@ -1,70 +1,490 @@
+import argparse
 import logging
-from scraper import BookScraper
-from database import Neo4jHandler
-from analytics import GraphAnalytics
-from report import ReportGenerator
+import os
+import sys
+
+import crawl_state
+from metrics import METRICS
+from query_cache import GraphVersion, QueryResultCache
+
+# Uruchamianie: python main.py [all|scrape|load|export|analyze|report] [opcje]   (bez etapu = all)
+#
+# Ciężkie zależności (requests i bs4 w scraperze, sterownik neo4j, fpdf2, numpy/pyarrow) importowane
+# są dopiero w etapach, które ich potrzebują - np. "report" uruchamiany z crona nie ładuje scrapera.
+# Wszystkie etapy jednego uruchomienia korzystają z jednego sterownika Neo4j (z pulą połączeń),
+# tworzonego przy pierwszym użyciu bazy.
 
 # --- KONFIGURACJA BAZY NEO4J ---
-# Pamiętaj, aby zmienić hasło na swoje!
-URI = "bolt://localhost:7687"
-USER = "neo4j"
-PASSWORD = "testtest" 
+# Wartości domyślne; nadpisują je zmienne środowiskowe NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD,
+# a te z kolei flagi --uri, --user, --password. Pamiętaj, aby zmienić hasło na swoje!
+URI = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
+USER = os.environ.get("NEO4J_USER", "neo4j")
+PASSWORD = os.environ.get("NEO4J_PASSWORD", "testtest")
 
-def main():
-    print("\n" + "="*50)
-    print("ROZPOCZĘCIE PROCESU: SCRAPING -> NEO4J -> ANALIZA -> PDF")
-    print("="*50 + "\n")
+# Tryb strumieniowy: rekordy trafiają do bazy mikro-paczkami już w trakcie scrapowania,
+# zamiast jednej dużej transakcji na końcu (stała pamięć, awaria traci najwyżej jedną paczkę)
+STREAMING = True
+BATCH_SIZE = 20        # Liczba rekordów w paczce
+FLUSH_INTERVAL = 5.0   # Po tylu sekundach [s] paczka zapisywana z następnym rekordem, nawet niepełna
+# Tryb wsadowy (STREAMING = False): liczba równoległych sesji ładowania fazowego
+# (1 = paczki po LOADER_BATCH_SIZE rekordów jedna po drugiej, każda we własnej transakcji)
+LOADER_WORKERS = 4
+LOADER_BATCH_SIZE = 1000
+# Tryb bez strumieniowania: rekordy trzymane kolumnowo (record_store.py) i opcjonalnie zrzucane
+# do pliku (.parquet z pyarrow, inne rozszerzenie = własny format). Etapy "scrape" i "load"
+# uruchamiane osobno przekazują sobie rekordy właśnie przez ten plik (--records).
+RECORDS_FILE = None  # np. "books.records"
+# Pierwszy import dużego katalogu: etap "export" zamienia plik rekordów na CSV dla neo4j-admin (bulk_export.py)
+EXPORT_DIR = "neo4j_import"
 
-    # KROK 1: Pobieranie danych (Scraper)
-    print(">>> ETAP 1: Pobieranie danych ze strony internetowej...")
-    scraper = BookScraper(seed_url="https://books.toscrape.com/")
-    # Ustawiamy target na 55, aby z zapasem spełnić wymóg z zadania (min. 50 rekordów)
-    books_data = scraper.run(target_count=55) 
+# Dyskowy cache odpowiedzi HTTP - kolejne uruchomienia kosztują głównie odpowiedzi 304
+CACHE_DIR = ".http_cache"
+CACHE_TTL = 6 * 3600              # Przez ten czas [s] strony serwowane są bez pytania serwera
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+SEED_URL = "https://books.toscrape.com/"
+
+# Scraper: wątki pobierające strony książek, limit zapytań na sekundę do jednego hosta,
+# backend parsowania HTML (extractors.py: auto, lxml, soup, strainer) i procesy parsujące (0 = w wątkach)
+SCRAPER_WORKERS = 1
+REQUESTS_PER_SECOND = 2.0
+PARSER = "auto"
+PARSE_PROCESSES = 0
+
+# Ustawiamy target na 55, aby z zapasem spełnić wymóg z zadania (min. 50 rekordów). None = cały katalog.
+TARGET_COUNT = 55
+
+# Tryb przyrostowy (np. nocny przebieg całego katalogu): pobierane są tylko nowe książki i te,
+# których cena na stronie listy się zmieniła. Znane książki czytane są z pliku STATE_FILE
+# (--state-file), a gdy jest on None - bezpośrednio z Neo4j.
+INCREMENTAL = False
+STATE_FILE = None  # np. "known_books.json"
+
+# Checkpoint długiego przebiegu: postęp scrapera dopisywany do pliku, RESUME = True kontynuuje
+# przerwany przebieg bez ponownego pobierania ukończonych stron. Plik usuwany po udanym zapisie.
+CHECKPOINT_FILE = None  # np. "crawl_checkpoint.jsonl"
+RESUME = False
+
+# Cache wyników zapytań: raport generowany ponownie bez zmian w danych nie odpytuje bazy.
+# Token wersji grafu zmienia Neo4jHandler po każdym zapisie.
+GRAPH_VERSION_FILE = ".graph_version"
+QUERY_CACHE_DIR = ".query_cache"
+
+# Backend analityki i raportu: "cypher" = zapytania do Neo4j, "local" = te same wyniki liczone
+# lokalnie z rekordów tego przebiegu albo z pliku RECORDS_FILE (local_analytics.py), bez zapytań do bazy.
+ANALYTICS_BACKEND = "cypher"
+
+# Opcjonalny załącznik z pełnym katalogiem (strumieniowo z bazy, w tomach po N wierszy;
+# None = jeden plik niezależnie od liczby książek)
+CATALOGUE_APPENDIX = False
+CATALOGUE_ROWS_PER_FILE = 20000
+
+# Metryki etapów (czasy pobrań, parsowania, zapisów i zapytań). None = wyłączone, bez narzutu.
+# Rozszerzenie wybiera format: ".json" = podsumowanie, inne (np. ".prom") = plik tekstowy Prometheusa.
+METRICS_FILE = None  # np. "metrics.prom"
+
+
+STAGES = ("all", "scrape", "load", "export", "analyze", "report")
+
+
+class Pipeline:
+    """Stan wspólny etapów jednego uruchomienia: ustawienia z CLI, jeden sterownik Neo4j,
+    rekordy tego przebiegu i wyniki zapytań (liczone raz dla analizy i raportu)."""
+    def __init__(self, args):
+        self.args = args
+        self.graph_version = GraphVersion(GRAPH_VERSION_FILE)
+        self._driver = None
+        self.cache = None
+        self.scraper = None
+        self.checkpoint = None
+        self.known_books = None
+        self.store = None        # record_store.RecordStore z etapu scrape albo z pliku
+        self.local_graph = None
+        self.results = None
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            from neo4j import GraphDatabase
+            self._driver = GraphDatabase.driver(self.args.uri, auth=(self.args.user, self.args.password))
+        return self._driver
+
+    def db_handler(self):
+        from database import Neo4jHandler
+        return Neo4jHandler(driver=self.driver, version=self.graph_version)
+
+    def close(self):
+        if self._driver is not None:
+            self._driver.close()
+            self._driver = None
+
+
+def load_known_books(pipeline):
+    """Tryb przyrostowy: znane książki z pliku stanu albo z bazy."""
+    if pipeline.args.state_file:
+        return crawl_state.load_known_books(pipeline.args.state_file)
+    return pipeline.db_handler().fetch_known_books()
 
-    if not books_data:
+
+def start_crawl(pipeline):
+    """Tworzy scraper i zwraca generator rekordów (pobieranie rusza dopiero przy iteracji)."""
+    from http_cache import ResponseCache
+    from scraper import BookScraper
+
+    args = pipeline.args
+    pipeline.cache = ResponseCache(CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES)
+    pipeline.known_books = load_known_books(pipeline) if args.incremental else None
+    pipeline.checkpoint = crawl_state.CrawlCheckpoint(args.checkpoint) if args.checkpoint else None
+    pipeline.scraper = BookScraper(seed_url=args.seed_url, workers=args.workers,
+                                   requests_per_second=args.rate, parser=args.parser,
+                                   parse_processes=args.parse_processes, cache=pipeline.cache,
+                                   known_books=pipeline.known_books, checkpoint=pipeline.checkpoint)
+    books = pipeline.scraper.iter_books(target_count=args.target or None, resume=args.resume)
+    if args.incremental and args.state_file:
+        books = crawl_state.remember_books(books, pipeline.known_books)
+    return books
+
+
+def finish_crawl(pipeline):
+    """Po bezpiecznym zapisaniu rekordów (baza albo plik): koniec checkpointu i zapis stanu przyrostowego."""
+    if pipeline.checkpoint:
+        pipeline.checkpoint.remove()  # Następny przebieg zaczyna od nowa
+    if pipeline.args.incremental:
+        print(f"Tryb przyrostowy: pominięto {pipeline.scraper.skipped_unchanged} niezmienionych książek.")
+
+
+def save_state(pipeline, known_books):
+    if pipeline.args.state_file:
+        # Stan zapisujemy dopiero po udanym zapisie do bazy
+        crawl_state.save_known_books(pipeline.args.state_file, known_books)
+
+
+# --- Etapy ---
+
+def scrape(pipeline):
+    """KROK 1: Pobieranie danych (Scraper) do kolumnowego bufora, opcjonalnie zapisywanego do pliku."""
+    from record_store import RecordStore
+
+    print(">>> ETAP 1: Pobieranie danych ze strony internetowej...")
+    try:
+        books = start_crawl(pipeline)
+    except Exception as e:
+        # Bez --state-file tryb przyrostowy czyta znane książki z bazy
+        print(f"BŁĄD bazy danych: {e}")
+        return False
+    pipeline.store = RecordStore.from_records(books)
+    pipeline.cache.log_stats()
+    if pipeline.checkpoint:
+        pipeline.checkpoint.close()
+    if not pipeline.store and not pipeline.args.incremental:
         print("BŁĄD: Nie udało się pobrać danych. Przerywam proces.")
-        return
+        return False
+    if pipeline.args.records:
+        pipeline.store.save(pipeline.args.records)
+    return True
+
+
+def load(pipeline):
+    """KROK 2: Wgrywanie danych do Neo4j (rekordy z etapu scrape albo z pliku --records)."""
+    if pipeline.store is None:
+        from record_store import RecordStore
+        try:
+            pipeline.store = RecordStore.load(pipeline.args.records)
+        except (OSError, ValueError, RuntimeError) as e:  # Brak pliku, zły format, brak pyarrow
+            print(f"BŁĄD odczytu pliku rekordów: {e}")
+            return False
 
-    # KROK 2: Wgrywanie danych do Neo4j
     print("\n>>> ETAP 2: Zapis danych i modelowanie grafu w Neo4j...")
-    db_handler = Neo4jHandler(URI, USER, PASSWORD)
+    books_data = pipeline.store
+    try:
+        db_handler = pipeline.db_handler()
+        db_handler.setup_constraints()
+        db_handler.setup_indexes()
+        if books_data and pipeline.args.loader_workers > 1:
+            db_handler.insert_books_parallel(books_data, workers=pipeline.args.loader_workers)
+        elif books_data:
+            # Paczki po LOADER_BATCH_SIZE słowników budowane z kolumn dopiero przy wysyłce
+            db_handler.insert_books_stream(iter(books_data), batch_size=LOADER_BATCH_SIZE)
+    except Exception as e:
+        print(f"BŁĄD bazy danych: {e}")
+        return False
+    return True
+
+
+def _kept(books, store):
+    """Rekordy strumienia dopisywane po drodze do kolumnowego bufora."""
+    for book in books:
+        store.append(book)
+        yield book
+
+
+def scrape_and_load(pipeline):
+    """KROK 1+2: Pobieranie danych i zapis do Neo4j w jednym przebiegu (tryb strumieniowy)."""
+    print(">>> ETAP 1+2: Pobieranie danych i strumieniowy zapis do Neo4j...")
     try:
+        books = start_crawl(pipeline)
+    except Exception as e:
+        print(f"BŁĄD bazy danych: {e}")
+        return False
+    if pipeline.args.backend == "local" or pipeline.args.records:
+        # Backend local i plik --records potrzebują rekordów tego przebiegu, nie tylko bazy
+        from record_store import RecordStore
+        pipeline.store = RecordStore()
+        books = _kept(books, pipeline.store)
+    checkpoint = pipeline.checkpoint
+    try:
+        db_handler = pipeline.db_handler()
         db_handler.setup_constraints()
-        db_handler.insert_books_batch(books_data)
+        db_handler.setup_indexes()
+        saved = db_handler.insert_books_stream(books, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                                               on_flush=checkpoint.mark_flushed if checkpoint else None)
     except Exception as e:
         print(f"BŁĄD bazy danych: {e}")
-        return
+        return False
     finally:
-        db_handler.close()
+        pipeline.cache.log_stats()
+        if checkpoint:
+            checkpoint.close()
+
+    if not saved and not pipeline.args.incremental:
+        print("BŁĄD: Nie udało się pobrać danych. Przerywam proces.")
+        return False
+    if pipeline.args.records:
+        pipeline.store.save(pipeline.args.records)
+    return True
+
+
+def query_results(pipeline):
+    """Wyniki zapytań z rejestru - wspólne dla analizy i raportu, liczone raz na uruchomienie."""
+    if pipeline.results is None:
+        if pipeline.args.backend == "local":
+            from local_analytics import LocalGraph, make_executor  # numpy/pyarrow tylko dla tego backendu
+
+            if pipeline.store is not None:
+                pipeline.local_graph = LocalGraph(pipeline.store)
+            elif pipeline.args.records:
+                pipeline.local_graph = LocalGraph.load(pipeline.args.records)
+            else:
+                raise ValueError("backend 'local' wymaga rekordów z etapu scrape albo pliku --records")
+            pipeline.results = make_executor("local", graph=pipeline.local_graph).run()
+        else:
+            from queries import QueryExecutor
+
+            # Sesje otwierane są bez `database`, czyli na domyślnej bazie serwera (database=None w kluczu)
+            query_cache = QueryResultCache(pipeline.graph_version, directory=QUERY_CACHE_DIR,
+                                           uri=pipeline.args.uri)
+            pipeline.results = QueryExecutor(pipeline.driver, cache=query_cache,
+                                             plan_mode=getattr(pipeline.args, "plan", None)).run()
+    return pipeline.results
+
+
+def _report_driver(pipeline):
+    # Backend lokalny nie łączy się z bazą
+    return pipeline.driver if pipeline.args.backend == "cypher" else None
+
 
-    # KROK 3: Wykonywanie zapytań analitycznych (Cypher) i wypisanie ich w konsoli
-    print("\n>>> ETAP 3: Zapytania analityczne Cypher...")
-    analytics = GraphAnalytics(URI, USER, PASSWORD)
+def analyze(pipeline):
+    """KROK 3: Wykonywanie zapytań analitycznych i wypisanie ich w konsoli."""
+    from analytics import GraphAnalytics
+
+    print("\n>>> ETAP 3: Zapytania analityczne...")
     try:
-        analytics.run_queries()
+        GraphAnalytics(driver=_report_driver(pipeline)).run_queries(query_results(pipeline))
     except Exception as e:
         print(f"BŁĄD podczas analizy: {e}")
-    finally:
-        analytics.close()
+        return False
+    return True
+
+
+def report(pipeline):
+    """KROK 4: Zbieranie statystyk i generowanie pliku PDF (z opcjonalnym załącznikiem-katalogiem)."""
+    from report import ReportGenerator
 
-    # KROK 4: Zbieranie statystyk i generowanie pliku PDF
     print("\n>>> ETAP 4: Generowanie raportu PDF...")
-    report_gen = ReportGenerator(URI, USER, PASSWORD)
     try:
-        dane_do_raportu = report_gen.fetch_data_for_report()
+        report_gen = ReportGenerator(driver=_report_driver(pipeline))
+        dane_do_raportu = report_gen.fetch_data_for_report(query_results(pipeline))
         report_gen.generate_pdf(dane_do_raportu, output_filename="Raport_Zaliczeniowy_Ksiazki.pdf")
+        if pipeline.args.appendix:
+            rows = pipeline.local_graph.catalogue_rows() if pipeline.local_graph is not None else None
+            report_gen.generate_catalogue_appendix("Katalog_Ksiazek.pdf", rows=rows,
+                                                   rows_per_file=CATALOGUE_ROWS_PER_FILE)
     except Exception as e:
         print(f"BŁĄD podczas tworzenia PDF: {e}")
-    finally:
-        report_gen.close()
+        return False
+    return True
+
+
+def run_all(pipeline):
+    print("\n" + "="*50)
+    print("ROZPOCZĘCIE PROCESU: SCRAPING -> NEO4J -> ANALIZA -> PDF")
+    print("="*50 + "\n")
+
+    if pipeline.args.streaming:
+        if not scrape_and_load(pipeline):
+            return False
+    elif not (scrape(pipeline) and load(pipeline)):
+        return False
+    finish_crawl(pipeline)
+    if pipeline.args.incremental:
+        save_state(pipeline, pipeline.known_books)
+
+    # KROK 3 i 4 korzystają z jednego sterownika i jednego zestawu wyników zapytań.
+    # Błąd analizy nie wstrzymuje raportu (jak dotąd) - wynik procesu uwzględnia oba etapy.
+    analyzed = analyze(pipeline)
+    reported = report(pipeline)
+    if not (analyzed and reported):
+        return False
 
     print("\n" + "="*50)
     print("PROCES ZAKOŃCZONY POMYŚLNIE! Sprawdź folder projektu.")
     print("="*50 + "\n")
+    return True
+
+
+def run_scrape(pipeline):
+    if not scrape(pipeline):
+        return False
+    finish_crawl(pipeline)  # Rekordy są już bezpieczne w pliku --records
+    return True
+
+
+def run_load(pipeline):
+    if not load(pipeline):
+        return False
+    if pipeline.args.incremental and pipeline.args.state_file:
+        # Odciski wgranych rekordów dopisujemy do stanu z poprzednich przebiegów
+        known_books = crawl_state.load_known_books(pipeline.args.state_file)
+        for _ in crawl_state.remember_books(pipeline.store, known_books):
+            pass
+        save_state(pipeline, known_books)
+    return True
+
+
+def run_export(pipeline):
+    """Pliki CSV dla `neo4j-admin database import full` zamiast transakcyjnego etapu load."""
+    import bulk_export
+    from record_store import RecordStore
+
+    if pipeline.args.after_import:
+        return after_import(pipeline)
+    try:
+        store = RecordStore.load(pipeline.args.records)
+    except (OSError, ValueError, RuntimeError) as e:  # Brak pliku, zły format, brak pyarrow
+        print(f"BŁĄD odczytu pliku rekordów: {e}")
+        return False
+    bulk_export.export_csv(store, pipeline.args.export_dir)
+    if pipeline.args.verify and bulk_export.verify_export(store, pipeline.args.export_dir):
+        print("BŁĄD: pliki CSV nie odpowiadają grafowi z ładowania transakcyjnego.")
+        return False
+    print("Import do pustej, zatrzymanej bazy:\n  " + " ".join(bulk_export.import_command(pipeline.args.export_dir)))
+    print("Po imporcie i uruchomieniu bazy:\n  python main.py export --after-import "
+          f"--export-dir {pipeline.args.export_dir}   # sprawdza bazę i unieważnia cache wyników zapytań")
+    return True
+
+
+def after_import(pipeline):
+    """Po imporcie neo4j-admin: porównanie bazy z plikami eksportu i nowa wersja grafu."""
+    import bulk_export
+
+    try:
+        differences = bulk_export.compare_graphs(bulk_export.read_graph(pipeline.args.export_dir),
+                                                 bulk_export.graph_from_driver(pipeline.driver))
+    except Exception as e:
+        print(f"BŁĄD bazy danych: {e}")
+        return False
+    # Import podmienił zawartość bazy z pominięciem Neo4jHandler - dopiero teraz wyniki zapamiętane
+    # dla starego grafu są nieaktualne (analizy między eksportem a importem dotyczyły jeszcze starej bazy)
+    pipeline.graph_version.bump()
+    print(f"Cache wyników zapytań unieważniony (nowa wersja grafu w {GRAPH_VERSION_FILE}).")
+    for difference in differences:
+        print(f"Różnica: {difference}")
+    if differences:
+        print(f"BŁĄD: baza nie odpowiada plikom eksportu (niezgodności: {len(differences)}).")
+        return False
+    return True
+
+
+COMMANDS = {"all": run_all, "scrape": run_scrape, "load": run_load, "export": run_export, "analyze": analyze,
+            "report": report}
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    db = common.add_argument_group("Neo4j")
+    db.add_argument("--uri", default=URI, help="adres bazy (domyślnie NEO4J_URI)")
+    db.add_argument("--user", default=USER, help="użytkownik (domyślnie NEO4J_USER)")
+    db.add_argument("--password", default=PASSWORD, help="hasło (domyślnie NEO4J_PASSWORD)")
+    common.add_argument("--records", default=RECORDS_FILE,
+                        help="plik rekordów (RecordStore) między etapami scrape i load")
+    common.add_argument("--export-dir", default=EXPORT_DIR, help="katalog plików CSV etapu export")
+    common.add_argument("--verify", action="store_true",
+                        help="etap export: porównaj pliki z grafem z ładowania transakcyjnego")
+    crawl = common.add_argument_group("scraper")
+    crawl.add_argument("--seed-url", default=SEED_URL, help="strona startowa księgarni")
+    crawl.add_argument("--workers", type=int, default=SCRAPER_WORKERS, help="wątki pobierające strony książek")
+    crawl.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND,
+                       help="limit zapytań HTTP na sekundę do jednego hosta")
+    crawl.add_argument("--parser", default=PARSER, help="backend parsowania HTML (auto, lxml, soup, strainer)")
+    crawl.add_argument("--parse-processes", type=int, default=PARSE_PROCESSES,
+                       help="procesy parsujące strony (0 = parsowanie w wątkach)")
+    common.add_argument("--target", type=int, default=TARGET_COUNT, help="liczba książek (0 = cały katalog)")
+    common.add_argument("--streaming", action=argparse.BooleanOptionalAction, default=STREAMING,
+                        help="etap all: zapis do bazy w trakcie scrapowania")
+    common.add_argument("--loader-workers", type=int, default=LOADER_WORKERS,
+                        help="równoległe sesje importu fazowego (1 = kolejne paczki w jednej sesji)")
+    common.add_argument("--incremental", action=argparse.BooleanOptionalAction, default=INCREMENTAL,
+                        help="pobieraj tylko nowe i zmienione książki")
+    common.add_argument("--state-file", default=STATE_FILE,
+                        help="tryb przyrostowy: plik znanych książek (domyślnie odczyt z Neo4j)")
+    common.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="plik checkpointu scrapera")
+    common.add_argument("--resume", action=argparse.BooleanOptionalAction, default=RESUME,
+                        help="wznów przerwany przebieg z pliku --checkpoint")
+    common.add_argument("--backend", choices=("cypher", "local"), default=ANALYTICS_BACKEND,
+                        help="źródło wyników analizy i raportu")
+    common.add_argument("--appendix", action=argparse.BooleanOptionalAction, default=CATALOGUE_APPENDIX,
+                        help="załącznik PDF z pełnym katalogiem")
+    common.add_argument("--metrics", default=METRICS_FILE, help="plik metryk (.json lub .prom)")
+
+    parser = argparse.ArgumentParser(description="Scraping księgarni -> Neo4j -> analityka -> raport PDF")
+    commands = parser.add_subparsers(dest="command", metavar="etap")
+    commands.add_parser("all", parents=[common], help="cały proces (domyślnie)")
+    commands.add_parser("scrape", parents=[common], help="tylko pobieranie, rekordy do pliku --records")
+    commands.add_parser("load", parents=[common], help="import pliku --records do Neo4j")
+    export_parser = commands.add_parser("export", parents=[common], help="plik --records jako CSV dla neo4j-admin import")
+    export_parser.add_argument("--after-import", action="store_true",
+                               help="po imporcie: porównaj bazę z plikami --export-dir i unieważnij cache wyników")
+    analyze_parser = commands.add_parser("analyze", parents=[common], help="zapytania analityczne w konsoli")
+    # Tylko etap analyze: przy EXPLAIN zapytania nie zwracają wierszy, a raport ich potrzebuje
+    analyze_parser.add_argument("--plan", choices=("EXPLAIN", "PROFILE"), type=str.upper,
+                                help="backend cypher: zapisz plany zapytań (EXPLAIN - bez wykonania i bez wierszy)")
+    commands.add_parser("report", parents=[common], help="raport PDF")
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in STAGES + ("-h", "--help"):
+        argv = ["all"] + argv  # Bez etapu: cały proces, jak dotąd
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command in ("scrape", "load", "export") and not args.records and not getattr(args, "after_import", False):
+        parser.error(f"etap {args.command} wymaga pliku rekordów (--records)")
+    if getattr(args, "plan", None) and args.backend == "local":
+        parser.error("--plan wymaga backendu cypher - backend local nie wykonuje zapytań w Neo4j")
+
+    if args.metrics:
+        METRICS.enable()
+    pipeline = Pipeline(args)
+    try:
+        return 0 if COMMANDS[args.command](pipeline) else 1
+    finally:
+        pipeline.close()
+        if args.metrics:
+            METRICS.export(args.metrics)
 
 
 if __name__ == "__main__":
-    # Upewniamy się, że główne logowanie jest ustawione tylko na ERROR lub INFO, 
-    # żeby ładnie komponowało się z naszymi customowymi printami.
-    logging.getLogger().setLevel(logging.INFO)
-    main()
\ No newline at end of file
+    # Ten sam format logów co w scraper.py - przy pojedynczym etapie scraper nie jest importowany
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    sys.exit(main())
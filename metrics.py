@@ -0,0 +1,210 @@
+import bisect
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+
+# Lekkie metryki etapów ETL: liczniki, histogramy i pomiary czasu (span). Domyślnie wyłączone -
+# wtedy każda metoda kończy się na jednym sprawdzeniu flagi, a span() zwraca gotowy, pusty
+# menedżer kontekstu. Włączone zbierają dane w pamięci procesu; eksport do pliku tekstowego
+# Prometheusa (node_exporter textfile collector) albo do podsumowania JSON.
+#
+# Procesy puli parsującej (BookScraper.parse_processes) mają własną kopię rejestru, więc ich
+# pomiary parsowania nie trafiają do eksportu.
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Histogramy innych niż czas w sekundach wielkości (nazwa -> granice kubełków)
+HISTOGRAM_BUCKETS = {
+    "fetch_bytes": BYTES_BUCKETS,
+    "parse_chunk_pages": (1, 2, 4, 8, 16, 32, 64),
+}
+
+# Opisy do linii # HELP eksportu Prometheusa (brak opisu = sama nazwa metryki)
+METRIC_HELP = {
+    "fetch_seconds": "Czas pobrania strony (jedna próba żądania HTTP).",
+    "fetch_bytes": "Rozmiar pobranej strony w bajtach.",
+    "http_responses_total": "Odpowiedzi HTTP wg kodu statusu.",
+    "fetch_cache_total": "Strony obsłużone z cache HTTP (fresh = bez żądania, revalidated = 304).",
+    "fetch_errors_total": "Nieudane próby pobrania wg typu wyjątku.",
+    "fetch_retries_total": "Ponowienia pobrania po błędzie przejściowym.",
+    "fetch_failed_total": "Strony, których nie udało się pobrać, wg przyczyny.",
+    "parse_seconds": "Czas parsowania strony HTML.",
+    "parse_chunk_pages": "Liczba stron w paczce wysłanej do puli procesów parsujących.",
+    "db_write_seconds": "Czas zapytania zapisu do Neo4j.",
+    "db_write_attempts_total": "Próby transakcji zapisu (ponowienia execute_write to nadwyżka nad liczbą paczek).",
+    "db_write_rows_total": "Rekordy wysłane w zapytaniach zapisu.",
+    "query_seconds": "Czas zapytania analitycznego.",
+    "query_cache_hits_total": "Zapytania analityczne obsłużone z cache wyników.",
+    "neo4j_db_hits_total": "Db hits z planów PROFILE.",
+    "neo4j_result_available_after_seconds": "Czas serwera Neo4j do pierwszego wiersza wyniku.",
+    "neo4j_result_consumed_after_seconds": "Czas serwera Neo4j do pobrania całego wyniku.",
+}
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Histogram:
+    """Kubełki jak w Prometheusie (górne granice), plus suma, liczba, minimum i maksimum."""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Ostatni kubełek to +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def summary(self):
+        return {"count": self.count, "sum": round(self.sum, 6),
+                "avg": round(self.sum / self.count, 6) if self.count else None,
+                "min": self.min if self.count else None, "max": self.max if self.count else None}
+
+
+class _Span:
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = self.labels if exc_type is None else {**self.labels, "error": exc_type.__name__}
+        self.metrics.observe(f"{self.name}_seconds", time.perf_counter() - self.start, **labels)
+
+
+class Metrics:
+    """Rejestr metryk. Etykiety (labels) podaje się jako argumenty nazwane, np. status=200."""
+    def __init__(self, enabled=False, prefix="tazw"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled or value is None:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(HISTOGRAM_BUCKETS.get(name, LATENCY_BUCKETS))
+            histogram.observe(value)
+
+    def span(self, name, **labels):
+        """Mierzy czas bloku `with` do histogramu `<name>_seconds` (wyjątek dodaje etykietę error)."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, labels)
+
+    def observe_summary(self, summary, **labels):
+        """Czasy serwera Neo4j z ResultSummary (ms) - oddzielają pracę bazy od sieci i sterownika."""
+        if not self.enabled:
+            return
+        for field in ("result_available_after", "result_consumed_after"):
+            value = getattr(summary, field, None)
+            if value is not None:
+                self.observe(f"neo4j_{field}_seconds", value / 1000, **labels)
+
+    # --- Eksport ---
+
+    def summary(self):
+        """Słownik gotowy do json.dump: liczniki i histogramy z etykietami w nazwie."""
+        with self.lock:
+            return {
+                "counters": {_series_name(name, labels): value
+                             for (name, labels), value in sorted(self.counters.items(), key=_series_order)},
+                "histograms": {_series_name(name, labels): histogram.summary()
+                               for (name, labels), histogram in sorted(self.histograms.items(), key=_series_order)},
+            }
+
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# HELP {self.prefix}_{name} {_help_text(name)}")
+                lines.append(f"# TYPE {self.prefix}_{name} counter")
+                for (series, labels), value in sorted(self.counters.items(), key=_series_order):
+                    if series == name:
+                        lines.append(f"{self.prefix}_{name}{_label_text(labels)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# HELP {self.prefix}_{name} {_help_text(name)}")
+                lines.append(f"# TYPE {self.prefix}_{name} histogram")
+                for (series, labels), histogram in sorted(self.histograms.items(), key=_series_order):
+                    if series != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                        cumulative += count
+                        lines.append(f"{self.prefix}_{name}_bucket{_label_text(labels + (('le', bound),))} "
+                                     f"{cumulative}")
+                    lines.append(f"{self.prefix}_{name}_sum{_label_text(labels)} {histogram.sum}")
+                    lines.append(f"{self.prefix}_{name}_count{_label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Zapis atomowy; format wg rozszerzenia: .json = podsumowanie, inne = tekst Prometheusa (.prom)."""
+        if path.endswith(".json"):
+            content = json.dumps(self.summary(), indent=1)
+        else:
+            content = self.prometheus_text()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels) + "}"
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _help_text(name):
+    return METRIC_HELP.get(name, name).replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _series_order(item):
+    """Klucz sortowania serii - wartości etykiet jako tekst (ta sama etykieta bywa liczbą i napisem)."""
+    (name, labels), _ = item
+    return name, tuple((key, str(value)) for key, value in labels)
+
+
+def _series_name(name, labels):
+    return name + _label_text(labels)
+
+
+# Wspólny rejestr procesu - moduły importują go jako `from metrics import METRICS`
+METRICS = Metrics()
@@ -0,0 +1,49 @@
+import json
+import os
+
+from extractors import SoupExtractor
+
+# Zapisane strony books.toscrape.com (fixtures/) i wzorcowe wyniki referencyjnego parsera
+# (fixtures/expected.json) - wspólne dla testów backendów parsowania i benchmarku.
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+GOLDEN_FILE = os.path.join(FIXTURES_DIR, "expected.json")
+
+
+def load_fixtures():
+    """Zapisane strony books.toscrape.com: nazwa pliku -> HTML.
+
+    Dekodujemy jako ISO-8859-1, tak jak robi to requests dla odpowiedzi bez charset ("Â£").
+    """
+    fixtures = {}
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        if name.endswith(".html"):
+            with open(os.path.join(FIXTURES_DIR, name), encoding="iso-8859-1") as f:
+                fixtures[name] = f.read()
+    return fixtures
+
+
+def extract_fixture(extractor, name, html):
+    if name.startswith("catalogue_"):
+        return [list(link) for link in extractor.parse_listing(html)]
+    return list(extractor.parse_book(html))
+
+
+def update_golden():
+    """Zapisuje wzorcowe wyniki referencyjnego parsera (SoupExtractor) dla fixtures."""
+    extractor = SoupExtractor()
+    golden = {name: extract_fixture(extractor, name, html) for name, html in load_fixtures().items()}
+    with open(GOLDEN_FILE, "w", encoding="utf-8") as f:
+        json.dump(golden, f, ensure_ascii=False, indent=1)
+    print(f"Zapisano wzorzec dla {len(golden)} stron: {GOLDEN_FILE}")
+
+
+def load_golden():
+    with open(GOLDEN_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_golden(extractor, fixtures):
+    """Porównuje wynik backendu z wzorcem. Zwraca listę stron, na których się różni."""
+    golden = load_golden()
+    return [name for name, html in fixtures.items() if extract_fixture(extractor, name, html) != golden[name]]
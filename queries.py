@@ -0,0 +1,179 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from metrics import METRICS
+
+# Wspólny rejestr zapytań Cypher dla analityki w konsoli (analytics.py) i raportu PDF (report.py).
+# Zapytania, które wcześniej się pokrywały, są scalone w jedno - np. "Top 5 najtańszych"
+# to początek "Top 20 najtańszych", a statystyki autorów liczą średnią i liczbę książek naraz.
+# Każde zapytanie z LIMIT ma jednoznaczne ORDER BY, żeby wynik był powtarzalny.
+QUERIES = {
+    # Podsumowanie cen (raport)
+    "price_stats": """
+        MATCH (b:Book)
+        RETURN count(b) AS total,
+               round(min(b.price),2) AS min_price,
+               round(avg(b.price),2) AS avg_price,
+               round(max(b.price),2) AS max_price
+    """,
+    # Filtr po wartości liczbowej (analityka 1)
+    "cheap_books": """
+        MATCH (b:Book) WHERE b.price < 20
+        RETURN b.title AS title, b.price AS price
+        ORDER BY b.title LIMIT 5
+    """,
+    # Filtr po dacie (analityka 2: pierwsze 5, raport: 10 z wydawnictwem)
+    "recent_books": """
+        MATCH (b:Book)-[:PUBLISHED_BY]->(p:Publisher)
+        WHERE b.year > 2015
+        RETURN b.title AS title, b.year AS year, p.name AS publisher
+        ORDER BY b.title LIMIT 10
+    """,
+    # Ranking najtańszych (analityka 3: Top 5, raport: Top 20)
+    "cheapest_books": """
+        MATCH (b:Book)
+        RETURN b.title AS title, b.year AS year, b.price AS price
+        ORDER BY b.price ASC, b.title LIMIT 20
+    """,
+    # Agregacja per autor (analityka 4: wg średniej ceny, raport: Top 5 wg liczby książek)
+    "author_stats": """
+        MATCH (a:Author)-[:WROTE]->(b:Book)
+        RETURN a.name AS author,
+               round(avg(b.price), 2) AS avg_price,
+               count(b) AS book_count
+    """,
+    # Zapytanie relacyjne (analityka 5)
+    "relations": """
+        MATCH (a:Author)-[:WROTE]->(b:Book)-[:PUBLISHED_BY]->(p:Publisher)
+        RETURN a.name AS author, b.title AS title, p.name AS publisher
+        ORDER BY a.name, b.title LIMIT 5
+    """,
+}
+
+
+# Pełny katalog do załącznika PDF - czytany strumieniowo z kursora, dlatego poza rejestrem
+# (nie trafia do QueryExecutor ani do cache wyników).
+CATALOGUE_QUERY = """
+    MATCH (b:Book)
+    OPTIONAL MATCH (a:Author)-[:WROTE]->(b)
+    OPTIONAL MATCH (b)-[:PUBLISHED_BY]->(p:Publisher)
+    RETURN b.title AS title, a.name AS author, p.name AS publisher, b.year AS year, b.price AS price
+    ORDER BY b.title, b.isbn
+"""
+
+
+# Tryby planu zapytania: EXPLAIN zwraca sam plan (bez wykonania i bez wierszy),
+# PROFILE wykonuje zapytanie i dołącza do planu rzeczywiste db hits i liczby wierszy operatorów.
+PLAN_MODES = ("EXPLAIN", "PROFILE")
+
+
+def plan_summary(plan):
+    """Drzewo planu z ResultSummary.plan/profile -> operatory (w głąb, od korzenia) i suma db hits."""
+    if not plan:
+        return None
+    operators = []
+    stack = [(plan, 0)]
+    while stack:
+        node, depth = stack.pop()
+        operators.append({
+            "operator": node["operatorType"].split("@")[0],  # "NodeIndexSeek@neo4j" -> "NodeIndexSeek"
+            "depth": depth,
+            "db_hits": node.get("dbHits"),
+            "rows": node.get("rows"),
+            "details": node.get("args", {}).get("Details"),
+        })
+        stack.extend((child, depth + 1) for child in reversed(node.get("children", [])))
+    hits = [op["db_hits"] for op in operators if op["db_hits"] is not None]
+    return {"operators": operators, "db_hits": sum(hits) if hits else None}
+
+
+class QueryResults:
+    """Wyniki zapytań z rejestru: nazwa -> lista wierszy (słowników) oraz czas wykonania każdego zapytania."""
+    def __init__(self):
+        self.rows = {}
+        self.timings = {}
+        self.cached = set()  # Zapytania obsłużone z QueryResultCache (bez kontaktu z bazą)
+        self.plans = {}      # Z QueryExecutor(plan_mode=...): nazwa -> plan_summary
+
+    def __getitem__(self, name):
+        return self.rows[name]
+
+    def log_timings(self):
+        for name, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            logging.info(f"Zapytanie {name}: {seconds * 1000:.1f} ms ({len(self.rows[name])} wierszy)")
+        if self.cached:
+            logging.info(f"Z cache wyników: {', '.join(sorted(self.cached))}")
+        for name, plan in sorted(self.plans.items()):
+            if plan:
+                hits = "?" if plan["db_hits"] is None else plan["db_hits"]
+                chain = " <- ".join(op["operator"] for op in plan["operators"])
+                logging.info(f"Plan {name}: {hits} db hits, {chain}")
+
+
+def _read_rows(tx, query, params):
+    result = tx.run(query, params)
+    rows = result.data()
+    return rows, result.consume()
+
+
+class QueryExecutor:
+    """Wykonuje niezależne zapytania z rejestru równolegle - każde w osobnej sesji
+    współdzielonego sterownika (sesje nie są bezpieczne wątkowo, sterownik jest).
+
+    Z opcjonalnym `cache` (query_cache.QueryResultCache) baza odpytywana jest tylko
+    o wyniki, których nie zapamiętano dla bieżącej wersji grafu.
+
+    `plan_mode` ("EXPLAIN" lub "PROFILE") poprzedza każde zapytanie tym słowem i zapisuje plan
+    w QueryResults.plans (operatory, db hits). Cache jest wtedy pomijany, a EXPLAIN nie zwraca wierszy.
+    """
+    def __init__(self, driver, max_workers=4, queries=QUERIES, cache=None, plan_mode=None):
+        if plan_mode is not None and plan_mode not in PLAN_MODES:
+            raise ValueError(f"Nieznany tryb planu: {plan_mode} (dostępne: {', '.join(PLAN_MODES)})")
+        self.driver = driver
+        self.max_workers = max_workers
+        self.queries = queries
+        self.cache = cache if plan_mode is None else None
+        self.plan_mode = plan_mode
+
+    def _run_one(self, name, params):
+        query = self.queries[name] if self.plan_mode is None else f"{self.plan_mode} {self.queries[name]}"
+        start = time.perf_counter()
+        with METRICS.span("query", query=name), self.driver.session() as session:
+            rows, summary = session.execute_read(_read_rows, query, params)
+        METRICS.observe_summary(summary, query=name)
+        plan = None
+        if self.plan_mode is not None:
+            plan = plan_summary(summary.profile if self.plan_mode == "PROFILE" else summary.plan)
+            if plan and plan["db_hits"] is not None:
+                METRICS.inc("neo4j_db_hits_total", plan["db_hits"], query=name)
+        return name, rows, time.perf_counter() - start, plan
+
+    def run(self, names=None, params=None):
+        """Uruchamia wskazane zapytania (domyślnie wszystkie) i zwraca QueryResults."""
+        names = list(names or self.queries)
+        params = params or {}
+        results = QueryResults()
+
+        to_run = []
+        for name in names:
+            rows = self.cache.get(self.queries[name], params.get(name, {})) if self.cache else None
+            if rows is None:
+                to_run.append(name)
+            else:
+                results.rows[name] = rows
+                results.timings[name] = 0.0
+                results.cached.add(name)
+                METRICS.inc("query_cache_hits_total", query=name)
+
+        if to_run:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(to_run))) as executor:
+                for name, rows, seconds, plan in executor.map(lambda n: self._run_one(n, params.get(n, {})),
+                                                              to_run):
+                    results.rows[name] = rows
+                    results.timings[name] = seconds
+                    if self.plan_mode is not None:
+                        results.plans[name] = plan
+                    if self.cache:
+                        self.cache.put(self.queries[name], params.get(name, {}), rows)
+        results.log_timings()
+        return results
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+
+class GraphVersion:
+    """Token wersji danych w grafie, trzymany w lokalnym pliku.
+
+    Neo4jHandler zmienia go po każdym zapisie, więc wyniki zapytań zapamiętane dla starego
+    tokenu przestają pasować. Odczyt tokenu nie wymaga połączenia z bazą. Zapisy wykonane
+    z pominięciem Neo4jHandler (np. ręcznie w Neo4j Browser) nie zmieniają tokenu.
+    """
+    def __init__(self, path=".graph_version"):
+        self.path = path
+
+    def current(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return f.read().strip() or "0"
+        except OSError:
+            return "0"
+
+    def bump(self):
+        token = uuid.uuid4().hex
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(token)
+        os.replace(tmp_path, self.path)
+        logging.info(f"Nowa wersja grafu: {token}")
+        return token
+
+
+class QueryResultCache:
+    """Pamięć wyników zapytań kluczowana serwerem, bazą, tekstem zapytania, parametrami i wersją grafu.
+
+    W pamięci trzymane jest najwyżej `max_entries` wyników (LRU). Opcjonalny katalog
+    `directory` przechowuje je także na dysku, więc kolejne uruchomienie programu
+    może wygenerować raport bez łączenia się z bazą. `uri` i `database` (None = domyślna baza
+    serwera) trafiają do klucza - katalog współdzielony przez kilka instancji nie poda wyników
+    jednej bazy dla drugiej, nawet gdy lokalny token wersji jest ten sam.
+    """
+    def __init__(self, version, max_entries=256, directory=None, uri=None, database=None):
+        self.version = version
+        self.uri = uri
+        self.database = database
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _key(self, query, params):
+        payload = json.dumps([self.uri, self.database, query, params], sort_keys=True, default=str)
+        return f"{self.version.current()}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, query, params=None):
+        """Zapamiętane wiersze albo None."""
+        key = self._key(query, params or {})
+        with self.lock:
+            rows = self.entries.get(key)
+            if rows is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return rows
+        if self.directory:
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    rows = json.load(f)
+            except (OSError, ValueError):
+                rows = None
+        with self.lock:
+            if rows is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, rows)
+        return rows
+
+    def put(self, query, params, rows):
+        key = self._key(query, params or {})
+        with self.lock:
+            self._remember(key, rows)
+        if self.directory:
+            self._prune_disk(key.split("-", 1)[0])
+            tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(rows, f)
+            os.replace(tmp_path, self._path(key))
+
+    def _remember(self, key, rows):
+        self.entries[key] = rows
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _prune_disk(self, version):
+        """Usuwa z dysku wyniki zapamiętane dla innych (starszych) wersji grafu."""
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") and not name.startswith(f"{version}-"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
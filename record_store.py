@@ -0,0 +1,246 @@
+import json
+import logging
+import mmap
+import os
+import sys
+from array import array
+
+# Kolumnowy bufor rekordów książek między scraperem a bazą. Zamiast słownika z siedmioma kluczami
+# na książkę: teksty sklejone w jeden bufor UTF-8 z tablicą przesunięć, liczby w array.array,
+# a autorzy i wydawnictwa zakodowani słownikowo (każda nazwa zapisana raz, w wierszu tylko kod).
+#
+# Bufor można zrzucić na dysk i wczytać w innym procesie albo później:
+#   .parquet - przez pyarrow (kolumny słownikowe), jeśli jest zainstalowany,
+#   inne     - własny format: nagłówek JSON + surowe kolumny, wczytywane przez mmap bez kopiowania.
+# pyarrow importowany jest dopiero przy pierwszym pliku .parquet (ciężki import, zbędny przy własnym formacie).
+
+FIELDS = ("title", "price", "isbn", "author", "publisher", "year", "url")
+MAGIC = b"TAZWREC1"
+COLUMNS = {"title": "titles", "price": "prices", "isbn": "isbns", "author": "authors", "publisher": "publishers",
+           "year": "years", "url": "urls"}  # Pole rekordu -> atrybut z kolumną
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:  # pyarrow jest opcjonalny - bez niego zostaje własny format mapowany w pamięci
+        return None
+    return pyarrow
+
+
+def parquet_available():
+    """Czy zapis/odczyt .parquet jest możliwy (importuje pyarrow)."""
+    return _pyarrow() is not None
+
+
+class _StringColumn:
+    """Teksty w jednym buforze bajtów; i-ty tekst to data[offsets[i]:offsets[i + 1]]."""
+    def __init__(self, data=None, offsets=None):
+        self.data = bytearray() if data is None else data
+        self.offsets = array("Q", [0]) if offsets is None else offsets
+
+    def append(self, value):
+        self.data += value.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class _CategoryColumn:
+    """Kodowanie słownikowe: lista różnych wartości i kod (indeks) w każdym wierszu."""
+    def __init__(self, values=None, codes=None):
+        self.values = [] if values is None else values
+        self.index = {value: code for code, value in enumerate(self.values)}
+        self.codes = array("I") if codes is None else codes
+
+    def append(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class RecordStore:
+    """Rekordy książek w kolumnach. Wiersze (słowniki jak z BookScraper) powstają dopiero przy odczycie.
+
+    Bufor wczytany z pliku własnego formatu jest tylko do odczytu - kolumny wskazują na mapowany plik.
+    """
+    def __init__(self):
+        self.titles = _StringColumn()
+        self.isbns = _StringColumn()
+        self.urls = _StringColumn()
+        self.prices = array("d")
+        self.years = array("h")
+        self.authors = _CategoryColumn()
+        self.publishers = _CategoryColumn()
+        self._mmap = None
+
+    @classmethod
+    def from_records(cls, books):
+        store = cls()
+        store.extend(books)
+        return store
+
+    def append(self, book):
+        self.titles.append(book["title"])
+        self.prices.append(book["price"])
+        self.isbns.append(book["isbn"])
+        self.authors.append(book["author"])
+        self.publishers.append(book["publisher"])
+        self.years.append(book["year"])
+        self.urls.append(book["url"])
+
+    def extend(self, books):
+        """Dopisuje rekordy z dowolnego iterowalnego źródła (np. generatora iter_books)."""
+        for book in books:
+            self.append(book)
+
+    def __len__(self):
+        return len(self.prices)
+
+    def column(self, field):
+        """Kolumna pola rekordu; column(field)[i] to wartość i-tego wiersza bez budowania słownika."""
+        return getattr(self, COLUMNS[field])
+
+    def __getitem__(self, i):
+        return {"title": self.titles[i], "price": self.prices[i], "isbn": self.isbns[i],
+                "author": self.authors[i], "publisher": self.publishers[i], "year": self.years[i],
+                "url": self.urls[i]}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def distinct(self, field):
+        """Posortowane różne wartości kolumny słownikowej (autorzy, wydawnictwa)."""
+        return sorted(set(self.column(field).values))
+
+    def nbytes(self):
+        """Przybliżony rozmiar danych kolumn w bajtach (bez narzutu obiektów Pythona)."""
+        strings = (self.titles, self.isbns, self.urls)
+        categories = (self.authors, self.publishers)
+        return (sum(len(c.data) + len(c.offsets) * 8 for c in strings) + len(self.prices) * 8
+                + len(self.years) * 2 + sum(len(c.codes) * 4 + sum(len(v) for v in c.values) for c in categories))
+
+    # --- Zapis i odczyt ---
+
+    def save(self, path):
+        """Zapis atomowy; format wg rozszerzenia (.parquet wymaga pyarrow)."""
+        tmp_path = f"{path}.tmp"
+        if path.endswith(".parquet"):
+            self._save_parquet(tmp_path)
+        else:
+            self._save_native(tmp_path)
+        os.replace(tmp_path, path)
+        logging.info(f"Zapisano {len(self)} rekordów do {path}.")
+
+    @classmethod
+    def load(cls, path):
+        store = cls._load_parquet(path) if path.endswith(".parquet") else cls._load_native(path)
+        logging.info(f"Wczytano {len(store)} rekordów z {path}.")
+        return store
+
+    def close(self):
+        """Zwalnia mapowanie pliku; bufor wczytany przez load staje się potem pusty."""
+        if self._mmap is not None:
+            mapped = self._mmap
+            self.__init__()  # Najpierw zwalniamy widoki kolumn - mmap z aktywnymi widokami nie da się zamknąć
+            mapped.close()
+
+    def _native_sections(self):
+        return {
+            "title.data": self.titles.data, "title.offsets": self.titles.offsets,
+            "isbn.data": self.isbns.data, "isbn.offsets": self.isbns.offsets,
+            "url.data": self.urls.data, "url.offsets": self.urls.offsets,
+            "price": self.prices, "year": self.years,
+            "author.codes": self.authors.codes, "publisher.codes": self.publishers.codes,
+        }
+
+    def _save_native(self, path):
+        sections = {name: memoryview(column).cast("B") for name, column in self._native_sections().items()}
+        layout, offset = {}, 0
+        for name, data in sections.items():
+            layout[name] = [offset, len(data)]
+            offset += len(data) + (-len(data)) % 8  # Wyrównanie do 8 bajtów dla rzutowania kolumn
+        header = json.dumps({
+            "rows": len(self), "byteorder": sys.byteorder, "sections": layout,
+            "dictionaries": {"author": self.authors.values, "publisher": self.publishers.values},
+        }).encode("utf-8")
+        header += b" " * ((-len(header) - len(MAGIC) - 8) % 8)
+        with open(path, "wb") as f:
+            f.write(MAGIC + len(header).to_bytes(8, "little") + header)
+            for name, data in sections.items():
+                f.write(data)
+                f.write(b"\0" * ((-len(data)) % 8))
+
+    @classmethod
+    def _load_native(cls, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} nie jest plikiem RecordStore.")
+            header_size = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_size))
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError(f"{path} zapisano na maszynie o innej kolejności bajtów.")
+            if not header["rows"]:
+                return cls()
+            data_start = len(MAGIC) + 8 + header_size
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        def section(name, typecode):
+            start, size = header["sections"][name]
+            return memoryview(mapped)[data_start + start:data_start + start + size].cast(typecode)
+
+        store = cls()
+        store._mmap = mapped
+        store.titles = _StringColumn(section("title.data", "B"), section("title.offsets", "Q"))
+        store.isbns = _StringColumn(section("isbn.data", "B"), section("isbn.offsets", "Q"))
+        store.urls = _StringColumn(section("url.data", "B"), section("url.offsets", "Q"))
+        store.prices = section("price", "d")
+        store.years = section("year", "h")
+        store.authors = _CategoryColumn(header["dictionaries"]["author"], section("author.codes", "I"))
+        store.publishers = _CategoryColumn(header["dictionaries"]["publisher"], section("publisher.codes", "I"))
+        return store
+
+    def _save_parquet(self, path):
+        pyarrow = _pyarrow()
+        if pyarrow is None:
+            raise RuntimeError("Zapis do Parquet wymaga biblioteki pyarrow.")
+        table = pyarrow.table({
+            "title": pyarrow.array(list(self._strings(self.titles))),
+            "price": pyarrow.array(self.prices, pyarrow.float64()),
+            "isbn": pyarrow.array(list(self._strings(self.isbns))),
+            "author": pyarrow.DictionaryArray.from_arrays(pyarrow.array(self.authors.codes, pyarrow.uint32()),
+                                                          pyarrow.array(self.authors.values)),
+            "publisher": pyarrow.DictionaryArray.from_arrays(
+                pyarrow.array(self.publishers.codes, pyarrow.uint32()), pyarrow.array(self.publishers.values)),
+            "year": pyarrow.array(self.years, pyarrow.int16()),
+            "url": pyarrow.array(list(self._strings(self.urls))),
+        })
+        pyarrow.parquet.write_table(table, path)
+
+    @classmethod
+    def _load_parquet(cls, path):
+        pyarrow = _pyarrow()
+        if pyarrow is None:
+            raise RuntimeError("Odczyt Parquet wymaga biblioteki pyarrow.")
+        store = cls()
+        for batch in pyarrow.parquet.ParquetFile(path).iter_batches(columns=list(FIELDS)):
+            store.extend(batch.to_pylist())
+        return store
+
+    @staticmethod
+    def _strings(column):
+        return (column[i] for i in range(len(column)))
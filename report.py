@@ -1,6 +1,7 @@
 from fpdf import FPDF, XPos, YPos
-from neo4j import GraphDatabase
 from datetime import datetime
+import os
+from queries import CATALOGUE_QUERY, QueryExecutor
 
 # Pomocnicza funkcja do usuwania polskich/specjalnych znaków dla domyślnej czcionki
 def clean_text(text):
@@ -8,11 +9,22 @@ def clean_text(text):
         return ""
     return str(text).encode('ascii', 'ignore').decode('ascii')
 
+# Komórka załącznika dla brakującej wartości (czcionka helvetica nie ma półpauzy)
+MISSING_VALUE = "-"
+
 class PDFReport(FPDF):
+    # Opcjonalny nagłówek tabeli powtarzany na każdej stronie: [(szerokość, tekst, wyrównanie), ...]
+    table_columns = None
+
     def header(self):
         self.set_font("helvetica", "B", 12)
         self.cell(0, 10, "Raport Scrapowania - Ksiegarnia", border=False, align="C", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         self.ln(5)
+        if self.table_columns:
+            self.set_font("helvetica", "B", 9)
+            for width, label, align in self.table_columns:
+                self.cell(width, 8, label, border=1, align=align)
+            self.ln()
 
     def footer(self):
         self.set_y(-15)
@@ -20,49 +32,40 @@ class PDFReport(FPDF):
         self.cell(0, 10, f"Strona {self.page_no()}", align="C", new_x=XPos.RMARGIN, new_y=YPos.TOP)
 
 class ReportGenerator:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri=None, user=None, password=None, driver=None):
+        # Można przekazać gotowy sterownik (współdzielony z analityką) - wtedy nie zamykamy go w close().
+        # Bez sterownika i adresu raport powstaje tylko z podanych wyników i wierszy katalogu.
+        self.owns_driver = driver is None and uri is not None
+        if self.owns_driver:
+            from neo4j import GraphDatabase
+            driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.driver = driver
 
     def close(self):
-        self.driver.close()
+        if self.owns_driver:
+            self.driver.close()
+
+    def fetch_data_for_report(self, results=None):
+        """Dane do raportu z rejestru zapytań. `results` (QueryResults) pozwala użyć wyników
+        pobranych już dla analityki - bez ponownego odpytywania bazy."""
+        if results is None:
+            results = QueryExecutor(self.driver).run()
 
-    def fetch_data_for_report(self):
         data = {}
-        with self.driver.session() as session:
-            # 1. Podsumowanie
-            res_stats = session.run("""
-                MATCH (b:Book) 
-                RETURN count(b) AS total, 
-                       round(min(b.price),2) AS min_price, 
-                       round(avg(b.price),2) AS avg_price, 
-                       round(max(b.price),2) AS max_price
-            """).single()
-            data['stats'] = res_stats
-
-            # 2. Top 5 autorów
-            res_authors = session.run("""
-                MATCH (a:Author)-[:WROTE]->(b:Book)
-                RETURN a.name AS author, count(b) AS count
-                ORDER BY count DESC LIMIT 5
-            """)
-            data['top_authors'] = [{"author": r["author"], "count": r["count"]} for r in res_authors]
-
-            # 3. Top 20 książek do tabeli
-            res_books = session.run("""
-                MATCH (b:Book)
-                RETURN b.title AS title, b.year AS year, b.price AS price
-                ORDER BY b.price ASC LIMIT 20
-            """)
-            data['top_books'] = [{"title": r["title"][:40], "year": r["year"], "price": r["price"]} for r in res_books]
-
-            # 4. Wynik analizy
-            res_analysis = session.run("""
-                MATCH (b:Book)-[:PUBLISHED_BY]->(p:Publisher)
-                WHERE b.year > 2015
-                RETURN b.title AS title, p.name AS publisher, b.year AS year
-                LIMIT 10
-            """)
-            data['analysis'] = [{"title": r["title"][:35], "pub": r["publisher"], "year": r["year"]} for r in res_analysis]
+        # 1. Podsumowanie
+        data['stats'] = results["price_stats"][0]
+
+        # 2. Top 5 autorów
+        authors = sorted(results["author_stats"], key=lambda r: (-r["book_count"], r["author"]))[:5]
+        data['top_authors'] = [{"author": r["author"], "count": r["book_count"]} for r in authors]
+
+        # 3. Top 20 książek do tabeli
+        data['top_books'] = [{"title": r["title"][:40], "year": r["year"], "price": r["price"]}
+                             for r in results["cheapest_books"][:20]]
+
+        # 4. Wynik analizy
+        data['analysis'] = [{"title": r["title"][:35], "pub": r["publisher"], "year": r["year"]}
+                            for r in results["recent_books"][:10]]
 
         return data
 
@@ -151,6 +154,86 @@ class ReportGenerator:
         pdf.output(output_filename)
         print(f"\nUkończono! Wygenerowano raport PDF: {output_filename}")
 
+    # Kolumny załącznika z pełnym katalogiem: (szerokość, nagłówek, wyrównanie, klucz, maks. długość)
+    CATALOGUE_COLUMNS = [
+        (80, "Tytul", "L", "title", 48),
+        (40, "Autor", "L", "author", 22),
+        (40, "Wydawnictwo", "L", "publisher", 22),
+        (12, "Rok", "C", "year", 4),
+        (18, "Cena (GBP)", "C", "price", 8),
+    ]
+
+    def stream_catalogue_rows(self, fetch_size=1000):
+        """Leniwie czyta wiersze katalogu z kursora Neo4j - sterownik pobiera je paczkami po `fetch_size`."""
+        with self.driver.session(fetch_size=fetch_size) as session:
+            for record in session.run(CATALOGUE_QUERY):
+                yield record
+
+    def generate_catalogue_appendix(self, output_filename="katalog_ksiazek.pdf", rows=None, rows_per_file=None):
+        """Załącznik z pełnym katalogiem książek, rysowany wiersz po wierszu w miarę napływu danych.
+
+        Wiersze nie są zbierane w listę, więc pamięć po stronie Pythona nie rośnie z liczbą książek.
+        Dokument fpdf2 trzyma jednak w pamięci treść stron aż do zapisu - `rows_per_file` dzieli
+        załącznik na tomy (plik_001.pdf, plik_002.pdf, ...), co ogranicza też tę część pamięci.
+        Zwraca statystyki: liczba wierszy, stron i lista plików.
+        """
+        if rows is None:
+            rows = self.stream_catalogue_rows()
+        base, ext = os.path.splitext(output_filename)
+        stats = {"rows": 0, "pages": 0, "files": []}
+        pdf = None
+        volume = 0
+
+        def finish(pdf):
+            filename = output_filename if rows_per_file is None else f"{base}_{volume:03d}{ext}"
+            pdf.output(filename)
+            stats["pages"] += pdf.page_no()
+            stats["files"].append(filename)
+
+        for row in rows:
+            if pdf is None:
+                volume += 1
+                pdf = self._new_catalogue_pdf(volume if rows_per_file else None)
+            for width, _, align, key, max_len in self.CATALOGUE_COLUMNS:
+                # OPTIONAL MATCH bez dopasowania (książka bez autora/wydawnictwa) daje None
+                text = MISSING_VALUE if row[key] is None else clean_text(row[key])[:max_len]
+                pdf.cell(width, 7, text, border=1, align=align)
+            pdf.ln()
+            stats["rows"] += 1
+            if rows_per_file and stats["rows"] % rows_per_file == 0:
+                finish(pdf)
+                pdf = None
+
+        if pdf is not None:
+            finish(pdf)
+        elif not stats["files"]:
+            # Pusty katalog - zapisujemy sam nagłówek tabeli
+            volume += 1
+            finish(self._new_catalogue_pdf(volume if rows_per_file else None))
+
+        print(f"\nUkończono! Załącznik z katalogiem: {stats['rows']} książek, {stats['pages']} stron, "
+              f"plików: {len(stats['files'])}")
+        return stats
+
+    def _new_catalogue_pdf(self, volume=None):
+        pdf = PDFReport()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.add_page()
+        pdf.set_font("helvetica", "B", 16)
+        title = "Zalacznik: Pelny katalog ksiazek"
+        if volume is not None:
+            title += f" (tom {volume})"
+        pdf.cell(0, 10, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(3)
+        # Od tego miejsca nagłówek tabeli powtarza się na każdej kolejnej stronie
+        pdf.table_columns = [(width, label, align) for width, label, align, _, _ in self.CATALOGUE_COLUMNS]
+        pdf.set_font("helvetica", "B", 9)
+        for width, label, align in pdf.table_columns:
+            pdf.cell(width, 8, label, border=1, align=align)
+        pdf.ln()
+        pdf.set_font("helvetica", "", 8)
+        return pdf
+
 
 # === URUCHOMIENIE ===
 if __name__ == "__main__":
@@ -0,0 +1,159 @@
+import collections
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Polityka ponawiania pobrań dla BookScraper.fetch_page.
+# Ponawiane są tylko błędy przejściowe: sieć/timeout i poniższe kody HTTP. Pozostałe 4xx
+# (np. 404 na końcu stronicowania) kończą pobieranie od razu - ponowienie nic by nie zmieniło.
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value):
+    """Nagłówek Retry-After (liczba sekund albo data HTTP) -> sekundy lub None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Wykładnicze opóźnienia z pełnym jitterem: losowo z [0, min(max_delay, base_delay * multiplier^próba)].
+
+    Losowanie rozprasza ponowienia wielu wątków w czasie, zamiast wysyłać je jednocześnie.
+    Retry-After z odpowiedzi serwera ma pierwszeństwo (ograniczony do max_delay).
+    """
+    def __init__(self, attempts=3, base_delay=0.5, multiplier=2.0, max_delay=30.0, jitter=True,
+                 retryable_statuses=RETRYABLE_STATUSES, seed=None):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retryable_statuses = retryable_statuses
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def is_retryable(self, status):
+        return status in self.retryable_statuses
+
+    def delay(self, attempt, retry_after=None):
+        """Czas [s] oczekiwania po nieudanej próbie numer `attempt` (od 0)."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** attempt)
+        if self.jitter:
+            with self.lock:
+                delay = self.rng.uniform(0, delay)
+        return delay
+
+
+class CircuitBreaker:
+    """Bezpiecznik jednego hosta.
+
+    Zamknięty: żądania przechodzą, a wyniki ostatnich `window` prób są zapamiętywane.
+    Gdy co najmniej `min_requests` z nich da udział błędów >= `failure_ratio`, bezpiecznik
+    otwiera się na `cooldown` sekund i wstrzymuje wszystkie wątki. Potem przepuszcza jedno
+    żądanie próbne: sukces zamyka bezpiecznik, błąd otwiera go ponownie na dwa razy dłużej
+    (najwyżej `max_cooldown`).
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, window=20, failure_ratio=0.5, min_requests=10, cooldown=5.0, max_cooldown=60.0):
+        self.window = collections.deque(maxlen=window)
+        self.failure_ratio = failure_ratio
+        self.min_requests = min_requests
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.probe_started = 0.0
+        self.trips = 0
+        self.lock = threading.Lock()
+
+    def wait(self, stop_event, poll=0.1):
+        """Blokuje, dopóki bezpiecznik jest otwarty. Zwraca False, jeśli w międzyczasie ustawiono stop_event."""
+        while True:
+            with self.lock:
+                if self.state == self.CLOSED:
+                    return True
+                remaining = self.opened_at + self.cooldown - time.monotonic()
+                if self.state == self.OPEN and remaining <= 0:
+                    self.state = self.HALF_OPEN
+                # Żądanie próbne bez wyniku dłużej niż cooldown (np. przerwany wątek) - wysyłamy kolejne
+                stale_probe = self.probing and time.monotonic() - self.probe_started > self.cooldown
+                if self.state == self.HALF_OPEN and (not self.probing or stale_probe):
+                    self.probing = True  # Ten wątek wysyła żądanie próbne, reszta czeka na jego wynik
+                    self.probe_started = time.monotonic()
+                    return True
+            if stop_event.wait(min(poll, remaining) if remaining > 0 else poll):
+                return False
+
+    def record(self, success):
+        with self.lock:
+            if self.state == self.HALF_OPEN and self.probing:
+                self.probing = False
+                if success:
+                    self.state = self.CLOSED
+                    self.cooldown = self.base_cooldown
+                    self.window.clear()
+                else:
+                    self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                    self._open()
+                return
+            if self.state != self.CLOSED:
+                return  # Odpowiedź na żądanie wysłane przed otwarciem bezpiecznika
+            self.window.append(success)
+            failures = self.window.count(False)
+            if len(self.window) >= self.min_requests and failures / len(self.window) >= self.failure_ratio:
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        logging.warning(f"Za dużo błędów serwera - wstrzymuję pobieranie na {self.cooldown:.1f} s.")
+
+
+class HostCircuitBreaker:
+    """Osobny bezpiecznik dla każdego hosta, wspólny dla wszystkich wątków scrapera.
+
+    `failure_ratio=None` wyłącza bezpieczniki (jak `rate=0` w HostRateLimiter).
+    """
+    def __init__(self, failure_ratio=0.5, **kwargs):
+        self.failure_ratio = failure_ratio
+        self.kwargs = kwargs
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def _breaker(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = self.breakers[host] = CircuitBreaker(failure_ratio=self.failure_ratio, **self.kwargs)
+        return breaker
+
+    def wait(self, url, stop_event):
+        if self.failure_ratio is None:
+            return True
+        return self._breaker(url).wait(stop_event)
+
+    def record(self, url, success):
+        if self.failure_ratio is not None:
+            self._breaker(url).record(success)
+
+    def trips(self):
+        with self.lock:
+            return sum(breaker.trips for breaker in self.breakers.values())
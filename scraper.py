@@ -1,9 +1,18 @@
 import requests
-from bs4 import BeautifulSoup
 import logging
+import multiprocessing
 import time
 import random
-from urllib.parse import urljoin
+import threading
+import queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin, urlparse
+from requests.adapters import HTTPAdapter
+from crawl_state import listing_fingerprint
+from extractors import get_extractor
+from metrics import METRICS
+from retry import HostCircuitBreaker, RetryPolicy, parse_retry_after
 
 # Konfiguracja logowania (wymaganie z zadania)
 logging.basicConfig(
@@ -11,119 +20,551 @@ logging.basicConfig(
     format='%(asctime)s [%(levelname)s] %(message)s'
 )
 
+# Pula fikcyjnych danych do uzupełnienia braków na stronie
+MOCK_AUTHORS = ["Stephen King", "J.K. Rowling", "Stanisław Lem", "Terry Pratchett", "Agatha Christie", "Isaac Asimov"]
+MOCK_PUBLISHERS = ["Helion", "PWN", "Znak", "Wydawnictwo Literackie", "Penguin Books"]
+
+def parse_price(price_str):
+    """Czyszczenie ceny: '£51.77' (lub 'Â£51.77' po błędnym dekodowaniu) -> 51.77."""
+    return float(price_str.replace('£', '').replace('Â', ''))
+
+
+def parse_book_page(extractor, html, book_url, mock_authors=MOCK_AUTHORS, mock_publishers=MOCK_PUBLISHERS):
+    """Poziom 2: buduje rekord książki z HTML strony szczegółów (None przy błędzie parsowania).
+
+    Funkcja nie korzysta ze stanu scrapera, więc daje ten sam wynik w wątku i w osobnym procesie.
+    """
+    try:
+        # Pobieranie rzeczywistych danych (tytuł, cena, UPC - odpowiednik ISBN)
+        with METRICS.span("parse", page="book"):
+            title, price_str, isbn = extractor.parse_book(html)
+        price = parse_price(price_str) # Czyszczenie ceny
+
+        # Generowanie fikcyjnych danych na podstawie hash'a z tytułu (deterministycznie).
+        # Lokalny generator daje te same wartości co random.seed(title), ale nie rusza
+        # globalnego stanu RNG, który współdzieliłyby wątki. Ziarno ze str nie zależy
+        # od PYTHONHASHSEED, więc wynik jest taki sam w każdym procesie.
+        rng = random.Random(title)
+        author = rng.choice(mock_authors)
+        publisher = rng.choice(mock_publishers)
+        year = rng.randint(2000, 2023)
+
+        return {
+            "title": title,
+            "price": price,
+            "isbn": isbn,
+            "author": author,
+            "publisher": publisher,
+            "year": year,
+            "url": book_url
+        }
+    except Exception as e:
+        logging.error(f"Błąd podczas parsowania książki {book_url}: {e}")
+        return None
+
+
+def parse_book_chunk(pages, parser, mock_authors, mock_publishers):
+    """Zadanie dla puli procesów: paczka [(url, html), ...] -> [(url, rekord lub None), ...].
+
+    Strony wysyłane są paczkami, żeby koszt serializacji (pickle) rozłożył się na wiele książek.
+    """
+    extractor = get_extractor(parser)
+    return [(url, parse_book_page(extractor, html, url, mock_authors, mock_publishers)) for url, html in pages]
+
+
+class RateLimiter:
+    """Token bucket: średnio `rate` żądań na sekundę, chwilowo do `burst` żądań naraz."""
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blokuje wątek, dopóki w wiadrze nie pojawi się wolny token."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """Osobny token bucket dla każdego hosta - limit obowiązuje wszystkie wątki wspólnie."""
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        if not self.rate:
+            return  # Brak limitu (np. w benchmarkach na lokalnym serwerze)
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = RateLimiter(self.rate, self.burst)
+        bucket.acquire()
+
+
+def _pool_context():
+    """Kontekst puli parsującej. Pula powstaje, gdy wątki pobierające już działają, a fork w takiej chwili
+    kopiuje zamki trzymane przez inne wątki (logging, metryki, urllib3) - proces potomny mógłby się na nich
+    zawiesić. forkserver/spawn startują procesy od czystego interpretera, który importuje skrypt
+    uruchamiający - kod tworzący pulę musi więc stać pod `if __name__ == "__main__":`."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
 class BookScraper:
-    def __init__(self, seed_url):
+    def __init__(self, seed_url, workers=1, requests_per_second=2.0, burst=1, cache=None, known_books=None,
+                 parser="auto", parse_processes=0, parse_chunk_size=16, parse_flush_interval=1.0, retry_policy=None,
+                 circuit_breaker=None, checkpoint=None):
         self.seed_url = seed_url
-        self.base_url = "https://books.toscrape.com/catalogue/"
+        self.base_url = urljoin(seed_url, "catalogue/")
         self.session = requests.Session()
+        # Pula połączeń dopasowana do liczby równoległych pobrań (+1 na wątek stronicowania)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=max(10, workers + 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.workers = workers
+        # Rate limit (Wymaganie "na plus") - domyślnie 2 żądania/s, jak dawne sleep(0.5)
+        self.rate_limiter = HostRateLimiter(requests_per_second, burst)
+        self.cache = cache  # Opcjonalny http_cache.ResponseCache
+        # Ponawianie z wykładniczym opóźnieniem i bezpiecznik per host (retry.py)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or HostCircuitBreaker()
+        self.extractor = get_extractor(parser)  # Backend parsowania HTML (extractors.py)
+        # Opcjonalna pula procesów do parsowania szczegółów - omija GIL przy dużym ruchu.
+        # Procesy startują metodą forkserver/spawn (_pool_context), która importuje od nowa moduł
+        # __main__ - skrypt tworzący scraper z parse_processes > 0 musi to robić pod
+        # `if __name__ == "__main__":`, inaczej pula kończy się RuntimeError / BrokenProcessPool.
+        self.parse_processes = parse_processes
+        self.parse_chunk_size = parse_chunk_size
+        # Niepełna paczka idzie do puli, gdy pobieranie stoi, a jej najstarsza strona czeka już tyle sekund
+        self.parse_flush_interval = parse_flush_interval
+        # Tryb przyrostowy: url -> odcisk (cena z listy) książek już zapisanych w bazie.
+        # Książki, których odcisk się nie zmienił, są pomijane bez pobierania szczegółów.
+        self.known_books = known_books
+        self.skipped_unchanged = 0
+        # Opcjonalny crawl_state.CrawlCheckpoint - dziennik postępu do wznowienia przerwanego przebiegu
+        self.checkpoint = checkpoint
+        self.frontier = []   # Linki z przejrzanych już stron listy, oddawane przed kolejnymi stronami
+        self.start_page = 1
         self.scraped_urls = set()  # Do wykrywania duplikatów
+        self.urls_lock = threading.Lock()
+        self.stop_event = threading.Event()  # Ustawiany po osiągnięciu celu - przerywa pobrania w locie
         
         # Pula fikcyjnych danych do uzupełnienia braków na stronie
-        self.mock_authors = ["Stephen King", "J.K. Rowling", "Stanisław Lem", "Terry Pratchett", "Agatha Christie", "Isaac Asimov"]
-        self.mock_publishers = ["Helion", "PWN", "Znak", "Wydawnictwo Literackie", "Penguin Books"]
+        self.mock_authors = list(MOCK_AUTHORS)
+        self.mock_publishers = list(MOCK_PUBLISHERS)
 
-    def fetch_page(self, url, retries=3, timeout=5):
-        """Pobiera stronę z obsługą błędów, timeoutów i mechanizmem retry."""
-        for attempt in range(retries):
+    def fetch_page(self, url, retries=None, timeout=5):
+        """Pobiera stronę z obsługą błędów, timeoutów i mechanizmem retry.
+
+        Ponawiane są tylko błędy przejściowe (sieć, 429, 5xx - patrz retry.RetryPolicy), z losowym
+        wykładniczym opóźnieniem albo zgodnie z Retry-After. Inne kody 4xx (np. 404 za ostatnią
+        stroną listy) zwracają None od razu. `retries` nadpisuje liczbę prób z polityki.
+        """
+        return self._fetch(url, retries, timeout)[0]
+
+    def _fetch(self, url, retries=None, timeout=5):
+        """Jak fetch_page, ale zwraca (treść, kod HTTP). Bez treści kod odróżnia odpowiedź serwera
+        bez ponawiania (np. 404) od rezygnacji po wyczerpaniu prób albo zatrzymaniu potoku (None)."""
+        if self.cache:
+            body = self.cache.get_fresh(url)
+            if body is not None:
+                METRICS.inc("fetch_cache_total", result="fresh")
+                return body, 200
+
+        attempts = self.retry_policy.attempts if retries is None else retries
+        conditional = self.cache is not None
+        attempt = 0
+        while attempt < attempts:
+            # Otwarty bezpiecznik wstrzymuje wszystkie wątki pobierające z tego hosta
+            if self.stop_event.is_set() or not self.circuit_breaker.wait(url, self.stop_event):
+                return None, None
+            self.rate_limiter.acquire(url)
+            retry_after = None
             try:
-                response = self.session.get(url, timeout=timeout)
-                response.raise_for_status() # Rzuca wyjątek dla kodów 4xx i 5xx
-                return response.text
+                headers = self.cache.conditional_headers(url) if conditional else None
+                with METRICS.span("fetch"):
+                    response = self.session.get(url, timeout=timeout, headers=headers)
+                METRICS.inc("http_responses_total", status=response.status_code)
+                if response.status_code == 304 and conditional:
+                    # Serwer odpowiedział - także żądanie próbne półotwartego bezpiecznika kończy się sukcesem
+                    self.circuit_breaker.record(url, success=True)
+                    body = self.cache.revalidate(url)
+                    if body is not None:
+                        METRICS.inc("fetch_cache_total", result="revalidated")
+                        return body, response.status_code
+                    # Wpis zniknął z cache w międzyczasie - ponowne żądanie bez nagłówków warunkowych,
+                    # przez limiter i bezpiecznik jak każde inne; nie liczy się jako nieudana próba
+                    conditional = False
+                    continue
+                if self.retry_policy.is_retryable(response.status_code):
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    response.raise_for_status() # Rzuca wyjątek dla kodów 4xx i 5xx
+                # Każda inna odpowiedź (także 404) oznacza, że serwer działa
+                self.circuit_breaker.record(url, success=True)
+                if response.status_code >= 400:
+                    logging.info(f"Strona {url} zwróciła kod {response.status_code} - bez ponawiania.")
+                    METRICS.inc("fetch_failed_total", reason=response.status_code)
+                    return None, response.status_code
+                METRICS.observe("fetch_bytes", len(response.content))
+                if self.cache:
+                    self.cache.store(url, response.text, response.headers.get("ETag"),
+                                     response.headers.get("Last-Modified"))
+                return response.text, response.status_code
             except requests.exceptions.RequestException as e:
-                logging.warning(f"Błąd sieci przy pobieraniu {url}: {e}. Próba {attempt + 1}/{retries}")
-                time.sleep(2) # Odczekaj przed kolejną próbą
-                
-        logging.error(f"Nie udało się pobrać strony {url} po {retries} próbach.")
-        return None
+                self.circuit_breaker.record(url, success=False)
+                logging.warning(f"Błąd sieci przy pobieraniu {url}: {e}. Próba {attempt + 1}/{attempts}")
+                METRICS.inc("fetch_errors_total", error=type(e).__name__)
+                if attempt + 1 < attempts:
+                    METRICS.inc("fetch_retries_total")
+                    # Odczekaj przed kolejną próbą (przerywane po zatrzymaniu potoku)
+                    self.stop_event.wait(self.retry_policy.delay(attempt, retry_after))
+                attempt += 1
+
+        logging.error(f"Nie udało się pobrać strony {url} po {attempts} próbach.")
+        METRICS.inc("fetch_failed_total", reason="retries_exhausted")
+        return None, None
+
+    def _reserve_url(self, book_url):
+        """Rezerwuje URL pod blokadą, żeby dwa wątki nie pobrały tej samej książki."""
+        with self.urls_lock:
+            if book_url in self.scraped_urls:
+                logging.info(f"Odrzucono duplikat: {book_url}")
+                return False
+            self.scraped_urls.add(book_url)
+            return True
+
+    def _release_url(self, book_url):
+        with self.urls_lock:
+            self.scraped_urls.discard(book_url)
 
     def scrape_book_details(self, book_url):
         """Poziom 2: Parsuje szczegóły konkretnej książki."""
-        if book_url in self.scraped_urls:
-            logging.info(f"Odrzucono duplikat: {book_url}")
+        if not self._reserve_url(book_url):
+            return None
+
+        html = self.fetch_page(book_url)
+        book_info = parse_book_page(self.extractor, html, book_url, self.mock_authors,
+                                    self.mock_publishers) if html else None
+        if book_info is None:
+            self._release_url(book_url)
+        return book_info
+
+    def _fetch_book_html(self, book_url):
+        """Jak scrape_book_details, ale bez parsowania: (url, html) do przekazania puli procesów."""
+        if not self._reserve_url(book_url):
             return None
-            
         html = self.fetch_page(book_url)
         if not html:
+            self._release_url(book_url)
             return None
+        return book_url, html
 
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        try:
-            # Pobieranie rzeczywistych danych
-            title = soup.find('h1').text
-            price_str = soup.find('p', class_='price_color').text
-            price = float(price_str.replace('£', '').replace('Â', '')) # Czyszczenie ceny
-            
-            # UPC to odpowiednik ISBN na tej stronie
-            isbn = soup.find('th', string='UPC').find_next_sibling('td').text
-            
-            # Generowanie fikcyjnych danych na podstawie hash'a z tytułu (deterministycznie)
-            random.seed(title)
-            author = random.choice(self.mock_authors)
-            publisher = random.choice(self.mock_publishers)
-            year = random.randint(2000, 2023)
-            
-            self.scraped_urls.add(book_url)
-            
-            return {
-                "title": title,
-                "price": price,
-                "isbn": isbn,
-                "author": author,
-                "publisher": publisher,
-                "year": year,
-                "url": book_url
-            }
-        except Exception as e:
-            logging.error(f"Błąd podczas parsowania książki {book_url}: {e}")
-            return None
+    def iter_book_urls(self):
+        """Poziom 1: leniwie przechodzi kolejne strony listy i zwraca linki do książek.
 
-    def run(self, target_count=50):
-        """Główna pętla scrapera z obsługą paginacji (Poziom 1)."""
-        books_data = []
-        page_num = 1
-        
-        logging.info(f"Rozpoczynam scraping. Cel: {target_count} książek.")
-        
-        while len(books_data) < target_count:
+        Kolejna strona pobierana jest dopiero wtedy, gdy odbiorca zużyje linki z poprzedniej.
+        W trybie przyrostowym pomijane są książki znane z bazy, których cena na liście się nie zmieniła.
+        Po wznowieniu z checkpointu najpierw oddawane są linki ze stron przejrzanych wcześniej.
+        """
+        yield from self.frontier
+        page_num = self.start_page
+        while True:
             # Konstruowanie URL dla kolejnych stron (page-1.html, page-2.html itd.)
             page_url = f"{self.base_url}page-{page_num}.html"
             logging.info(f"Skanowanie listy (Poziom 1): {page_url}")
-            
-            html = self.fetch_page(page_url)
+
+            html, status = self._fetch(page_url)
             if not html:
-                logging.error("Koniec stron lub krytyczny błąd.")
-                break
-                
-            soup = BeautifulSoup(html, 'html.parser')
-            
+                if status == 404:
+                    # Zwykły koniec katalogu; w potoku stronicowanie zagląda o stronę dalej
+                    logging.info("Brak kolejnej strony listy (404). Zakończenie paginacji.")
+                elif not self.stop_event.is_set():
+                    reason = f"kod {status}" if status else "wyczerpane próby"
+                    logging.error(f"Nie udało się pobrać strony listy {page_url} ({reason}). Przerywam paginację.")
+                return
+
             # Znajdowanie wszystkich linków do książek na danej stronie
-            articles = soup.find_all('article', class_='product_pod')
-            if not articles:
+            with METRICS.span("parse", page="listing"):
+                links = self.extractor.parse_listing(html)
+            if not links:
                 logging.info("Brak książek na stronie. Zakończenie paginacji.")
-                break
-                
-            for article in articles:
-                if len(books_data) >= target_count:
-                    break
-                    
-                relative_link = article.find('h3').find('a')['href']
+                return
+
+            book_urls = []
+            for relative_link, listing_price in links:
                 book_url = urljoin(page_url, relative_link)
-                
-                logging.info(f"Pobieranie szczegółów (Poziom 2): {book_url}")
-                book_info = self.scrape_book_details(book_url)
-                
-                if book_info:
-                    books_data.append(book_info)
-                    
-                # Rate limit (Wymaganie "na plus")
-                time.sleep(0.5) 
-                
+                if self.known_books is not None and self._is_unchanged(book_url, listing_price):
+                    self.skipped_unchanged += 1
+                    continue
+                book_urls.append(book_url)
+            if self.checkpoint is not None:
+                self.checkpoint.page_scanned(page_num, book_urls)
+            yield from book_urls
+
             page_num += 1
 
+    def _is_unchanged(self, book_url, listing_price):
+        known = self.known_books.get(book_url)
+        if known is None or listing_price is None:
+            return False
+        try:
+            return listing_fingerprint(parse_price(listing_price)) == known
+        except ValueError:
+            return False
+
+    def iter_books(self, target_count=50, resume=False):
+        """Generator rekordów książek - kolejne rekordy oddawane są od razu po pobraniu,
+        więc odbiorca (np. zapis do bazy) może je przetwarzać w trakcie scrapowania.
+
+        `target_count=None` oznacza cały katalog (np. nocny przebieg przyrostowy).
+        Z checkpointem `resume=True` kontynuuje przerwany przebieg: najpierw oddaje rekordy
+        pobrane wcześniej, ale niezapisane w bazie, a potem tylko brakujące książki
+        (cel liczy się łącznie z poprzednim przebiegiem). `resume=False` zaczyna od nowa.
+        """
+        if self.checkpoint is None:
+            yield from self._iter_new_books(target_count)
+            return
+
+        found = 0
+        if resume:
+            state = self.checkpoint.load()
+            self.frontier, self.start_page = state["frontier"], state["next_page"]
+            with self.urls_lock:
+                self.scraped_urls |= state["done"]
+            found = state["flushed"] + len(state["pending"])
+            yield from state["pending"]
+        else:
+            self.checkpoint.reset()
+            self.frontier, self.start_page = [], 1
+
+        try:
+            remaining = None if target_count is None else target_count - found
+            for book_info in self._iter_new_books(remaining):
+                self.checkpoint.book_done(book_info)
+                yield book_info
+        finally:
+            self.checkpoint.flush()
+
+    def _iter_new_books(self, target_count):
+        if self.workers > 1 or self.parse_processes > 0:
+            yield from self._iter_pipelined(target_count)
+            return
+
+        if target_count is not None and target_count <= 0:
+            return
+        found = 0
+        for book_url in self.iter_book_urls():
+            logging.info(f"Pobieranie szczegółów (Poziom 2): {book_url}")
+            book_info = self.scrape_book_details(book_url)
+
+            if book_info:
+                found += 1
+                yield book_info
+                if target_count is not None and found >= target_count:
+                    return
+
+    def run(self, target_count=50, resume=False):
+        """Główna pętla scrapera z obsługą paginacji (Poziom 1)."""
+        logging.info(f"Rozpoczynam scraping. Cel: {target_count} książek.")
+        books_data = list(self.iter_books(target_count, resume=resume))
         logging.info(f"Zakończono. Pobrano {len(books_data)} unikalnych książek.")
+        if self.known_books is not None:
+            logging.info(f"Tryb przyrostowy: pominięto {self.skipped_unchanged} niezmienionych książek.")
         return books_data
 
+    def _iter_pipelined(self, target_count):
+        """Potok producent/konsument: jeden wątek przechodzi strony listy i wrzuca linki
+        do ograniczonej kolejki, a `workers` wątków pobiera z niej szczegóły książek.
+
+        Rekordy oddawane są w kolejności odkrycia linków, więc wynik jest taki sam jak
+        w trybie sekwencyjnym. Semafor `window` ogranicza liczbę książek w kolejce, w locie
+        i w buforze porządkującym - pamięć nie rośnie razem z `target_count`.
+        Przy `parse_processes > 0` wątki tylko pobierają HTML, a parsowanie odbywa się w puli procesów.
+        """
+        if target_count is not None and target_count <= 0:
+            return
+
+        window_size = self.workers * 4
+        window = threading.Semaphore(window_size)
+        url_queue = queue.Queue(maxsize=window_size + self.workers)
+        done_queue = queue.Queue()
+        end_marker = object()
+        parse_in_pool = self.parse_processes > 0
+        # Sygnał dla etapu parsowania: "kolejny wynik jeszcze nie gotowy" - powtarzany co parse_flush_interval,
+        # dopóki wynik nie nadejdzie, żeby niepełna paczka mogła odczekać swoje i zostać wysłana
+        idle_marker = object() if parse_in_pool else None
+        errors = []  # Pierwszy wyjątek z wątków - rzucany ponownie u odbiorcy zamiast cichego końca
+        self.stop_event.clear()
+        with self.urls_lock:
+            urls_before = set(self.scraped_urls)
+
+        def producer():
+            discovered = 0
+            try:
+                for book_url in self.iter_book_urls():
+                    # Czekamy na wolne miejsce w oknie, reagując na zatrzymanie potoku
+                    while not window.acquire(timeout=0.1):
+                        if self.stop_event.is_set():
+                            return
+                    if self.stop_event.is_set():
+                        window.release()
+                        return
+                    url_queue.put((discovered, book_url))
+                    discovered += 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                done_queue.put((end_marker, discovered))
+                for _ in range(self.workers):
+                    url_queue.put(None)
+
+        def worker():
+            while True:
+                item = url_queue.get()
+                if item is None:
+                    return
+                index, book_url = item
+                result = None
+                try:
+                    if not self.stop_event.is_set():
+                        logging.info(f"Pobieranie szczegółów (Poziom 2): {book_url}")
+                        if parse_in_pool:
+                            result = self._fetch_book_html(book_url)
+                        else:
+                            result = self.scrape_book_details(book_url)
+                except Exception as e:
+                    errors.append(e)
+                    self.stop_event.set()
+                finally:
+                    # Zawsze odpowiadamy na indeks - inaczej bufor porządkujący czekałby na niego w nieskończoność
+                    done_queue.put((index, result))
+
+        def in_order():
+            """Wyniki wątków w kolejności odkrycia linków (bufor porządkujący)."""
+            pending = {}  # indeks linku -> wynik (lub None)
+            next_index = 0
+            total = None
+            while total is None or next_index < total:
+                if next_index in pending:
+                    result = pending.pop(next_index)
+                    next_index += 1
+                    window.release()
+                    if result:
+                        yield result
+                    continue
+
+                try:
+                    index, result = done_queue.get_nowait()
+                except queue.Empty:
+                    if idle_marker is None:
+                        index, result = done_queue.get()
+                    else:
+                        while True:
+                            yield idle_marker
+                            try:
+                                index, result = done_queue.get(timeout=max(self.parse_flush_interval, 0.01))
+                                break
+                            except queue.Empty:
+                                pass
+                if errors:
+                    raise errors[0]
+                if index is end_marker:
+                    total = result
+                else:
+                    pending[index] = result
+
+        threads = [threading.Thread(target=producer, daemon=True)]
+        threads += [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        results = in_order()
+        records = self._parse_in_pool(results, idle_marker) if parse_in_pool else results
+        delivered = set()
+        found = 0
+        try:
+            for book_info in records:
+                found += 1
+                delivered.add(book_info["url"])
+                yield book_info
+                if target_count is not None and found >= target_count:
+                    break
+        finally:
+            # Cel osiągnięty (lub odbiorca przerwał): zatrzymujemy stronicowanie i pobrania
+            self.stop_event.set()
+            records.close()
+            results.close()
+            for thread in threads:
+                thread.join()
+            self.stop_event.clear()  # Scraper nadaje się do dalszego użycia (fetch_page, kolejne run)
+            # Książki pobrane ponad cel nie trafiają do wyniku - zwalniamy ich URL-e
+            with self.urls_lock:
+                self.scraped_urls &= urls_before | delivered
+
+    def _parse_in_pool(self, pages, idle_marker):
+        """Parsuje strony (url, html) w puli procesów paczkami po `parse_chunk_size`,
+        zachowując kolejność. W locie są najwyżej 2 paczki na proces.
+
+        Gdy pobieranie nie nadąża (`idle_marker`), niepełna paczka jest wysyłana dopiero wtedy,
+        gdy jej najstarsza strona czeka co najmniej `parse_flush_interval` sekund - przy wolnym
+        (np. ograniczonym limiterem) pobieraniu paczki nadal zbierają po kilka stron, a rekordy
+        nie czekają w nieskończoność na pełną paczkę.
+        """
+        pool = ProcessPoolExecutor(max_workers=self.parse_processes, mp_context=_pool_context())
+        pending = deque()
+        chunk = []
+        chunk_started = 0.0
+
+        def submit():
+            nonlocal chunk
+            METRICS.observe("parse_chunk_pages", len(chunk))
+            pending.append(pool.submit(parse_book_chunk, chunk, self.extractor.name,
+                                       self.mock_authors, self.mock_publishers))
+            chunk = []
+
+        def completed(future):
+            for book_url, book_info in future.result():
+                if book_info:
+                    yield book_info
+                else:
+                    self._release_url(book_url)
+
+        try:
+            for page in pages:
+                if page is idle_marker:
+                    if chunk and time.monotonic() - chunk_started >= self.parse_flush_interval:
+                        submit()
+                    while pending:
+                        yield from completed(pending.popleft())
+                    continue
+                if not chunk:
+                    chunk_started = time.monotonic()
+                chunk.append(page)
+                if len(chunk) >= self.parse_chunk_size:
+                    submit()
+                # Oddajemy gotowe paczki z czoła kolejki, a przy pełnej kolejce czekamy na najstarszą
+                while pending and (pending[0].done() or len(pending) > self.parse_processes * 2):
+                    yield from completed(pending.popleft())
+            if chunk:
+                submit()
+            while pending:
+                yield from completed(pending.popleft())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
 # === TESTOWANIE SCRAPERA ===
 if __name__ == "__main__":
     scraper = BookScraper(seed_url="https://books.toscrape.com/")
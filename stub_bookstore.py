@@ -0,0 +1,168 @@
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Lokalna atrapa books.toscrape.com do benchmarków - ten sam układ HTML
+# (article.product_pod, p.price_color, tabela z wierszem UPC), bez ruchu do prawdziwej strony.
+
+BOOKS_PER_PAGE = 20
+
+
+def book_title(i):
+    return f"Stub Book {i:05d}"
+
+
+def book_price(i):
+    return round(random.Random(i).uniform(10, 60), 2)
+
+
+def listing_html(page_num, total_books):
+    start = (page_num - 1) * BOOKS_PER_PAGE
+    articles = []
+    for i in range(start, min(start + BOOKS_PER_PAGE, total_books)):
+        articles.append(
+            f'<li><article class="product_pod">'
+            f'<h3><a href="book-{i:05d}_{i}/index.html" title="{book_title(i)}">{book_title(i)[:20]}...</a></h3>'
+            f'<div class="product_price"><p class="price_color">£{book_price(i):.2f}</p></div>'
+            f'</article></li>'
+        )
+    return (
+        "<html><head><title>All products</title></head><body>"
+        f"<ol class=\"row\">{''.join(articles)}</ol>"
+        "</body></html>"
+    )
+
+
+def detail_html(i):
+    upc = f"{random.Random(f'upc-{i}').getrandbits(64):016x}"
+    return (
+        "<html><head><title>Book</title></head><body>"
+        '<div class="product_main">'
+        f"<h1>{book_title(i)}</h1>"
+        f'<p class="price_color">£{book_price(i):.2f}</p>'
+        "</div>"
+        '<table class="table table-striped">'
+        f"<tr><th>UPC</th><td>{upc}</td></tr>"
+        "<tr><th>Product Type</th><td>Books</td></tr>"
+        "</table>"
+        "</body></html>"
+    )
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # Domyślne 5 gubi połączenia przy wielu wątkach scrapera
+
+
+class StubBookstore:
+    """Wielowątkowy serwer HTTP z katalogiem `total_books` książek i sztucznym opóźnieniem odpowiedzi.
+
+    `failure_rate` (0-1) to udział żądań kończonych kodem 503 - z nagłówkiem Retry-After,
+    jeśli podano `retry_after`. Oba pola można zmieniać w trakcie działania serwera.
+    """
+    def __init__(self, total_books=200, latency=0.05, host="127.0.0.1", port=0, failure_rate=0.0,
+                 retry_after=None, seed=0):
+        self.total_books = total_books
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.request_count = 0
+        self.error_count = 0
+        self.not_modified_count = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.server = _Server((host, port), self._make_handler())
+        self.thread = None
+
+    @property
+    def seed_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _render(self, path):
+        """Zwraca HTML dla ścieżki albo None (404)."""
+        parts = path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "catalogue" and parts[1].startswith("page-"):
+            page_num = int(parts[1][len("page-"):-len(".html")])
+            if page_num < 1 or (page_num - 1) * BOOKS_PER_PAGE >= self.total_books:
+                return None
+            return listing_html(page_num, self.total_books)
+        if len(parts) == 3 and parts[0] == "catalogue" and parts[2] == "index.html":
+            i = int(parts[1].rsplit("_", 1)[1])
+            if i >= self.total_books:
+                return None
+            return detail_html(i)
+        return None
+
+    def _make_handler(self):
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if store.latency:
+                    time.sleep(store.latency)
+                with store.lock:
+                    failed = store.failure_rate and store.rng.random() < store.failure_rate
+                    if failed:
+                        store.request_count += 1
+                        store.error_count += 1
+                if failed:
+                    self.send_response(503)
+                    if store.retry_after is not None:
+                        self.send_header("Retry-After", str(store.retry_after))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                html = store._render(self.path)
+                body = html.encode("utf-8") if html is not None else b"Not found"
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                not_modified = html is not None and self.headers.get("If-None-Match") == etag
+                if not_modified:
+                    body = b""
+                with store.lock:
+                    store.request_count += 1
+                    store.not_modified_count += not_modified
+                    store.bytes_sent += len(body)
+                if not_modified:
+                    self.send_response(304)
+                else:
+                    self.send_response(200 if html is not None else 404)
+                # Jak prawdziwa strona: bez charset, więc requests dekoduje jako ISO-8859-1 ("Â£")
+                self.send_header("Content-Type", "text/html")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Bez logowania każdego żądania
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# === URUCHOMIENIE ===
+if __name__ == "__main__":
+    with StubBookstore(total_books=1000, latency=0, port=8000) as store:
+        print(f"Atrapa księgarni działa pod adresem {store.seed_url} (Ctrl+C kończy).")
+        try:
+            store.thread.join()
+        except KeyboardInterrupt:
+            pass
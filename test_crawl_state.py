@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+from crawl_state import CrawlCheckpoint
+from database import Neo4jHandler
+from fake_neo4j import FakeNeo4jDriver
+from scraper import BookScraper
+from stub_bookstore import StubBookstore
+
+
+def write_events(path, events, tail=""):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(event) + "\n" for event in events) + tail)
+
+
+def test_load_reconstructs_state(tmp_path, book):
+    path = tmp_path / "crawl.jsonl"
+    write_events(path, [
+        {"page": 1, "urls": [book(1)["url"], book(2)["url"], book(3)["url"]]},
+        {"book": book(1)},
+        {"book": book(2)},
+        {"flushed": [book(1)["url"]]},
+        {"page": 2, "urls": [book(4)["url"]]},
+    ])
+    state = CrawlCheckpoint(str(path)).load()
+    assert state["next_page"] == 3
+    assert state["frontier"] == [book(3)["url"], book(4)["url"]]
+    assert state["done"] == {book(1)["url"], book(2)["url"]}
+    assert state["pending"] == [book(2)]
+    assert state["flushed"] == 1
+
+
+def test_load_without_file(tmp_path):
+    state = CrawlCheckpoint(str(tmp_path / "missing.jsonl")).load()
+    assert (state["next_page"], state["frontier"], state["done"], state["pending"], state["flushed"]) == \
+        (1, [], set(), [], 0)
+
+
+def test_truncated_last_line_is_skipped_and_closed(tmp_path, book):
+    path = tmp_path / "crawl.jsonl"
+    write_events(path, [{"page": 1, "urls": [book(1)["url"]]}], tail='{"book": {"title": "Urwa')
+    checkpoint = CrawlCheckpoint(str(path))
+    assert checkpoint.load()["pending"] == []
+
+    # Dopisanie po awarii zaczyna od nowej linii - urwany fragment nie skleja się z kolejnym zdarzeniem
+    checkpoint.book_done(book(1))
+    checkpoint.close()
+    state = CrawlCheckpoint(str(path)).load()
+    assert state["pending"] == [book(1)]
+    assert state["frontier"] == []
+
+
+def test_events_are_buffered_and_flushes_forced(tmp_path, book):
+    path = tmp_path / "crawl.jsonl"
+    checkpoint = CrawlCheckpoint(str(path), flush_every=3, flush_interval=3600)
+    checkpoint.book_done(book(1))
+    checkpoint.book_done(book(2))
+    assert not path.exists()
+    checkpoint.mark_flushed([book(1)])  # Potwierdzenie zapisu w bazie trafia na dysk od razu
+    assert CrawlCheckpoint(str(path)).load()["flushed"] == 1
+    checkpoint.book_done(book(3))
+    checkpoint.close()
+    state = CrawlCheckpoint(str(path)).load()
+    assert [b["isbn"] for b in state["pending"]] == ["isbn-2", "isbn-3"]
+
+
+def test_reset_and_remove(tmp_path, book):
+    path = tmp_path / "crawl.jsonl"
+    checkpoint = CrawlCheckpoint(str(path))
+    checkpoint.book_done(book(1))
+    checkpoint.close()
+    checkpoint.remove()
+    assert not path.exists()
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after(books, count):
+    for i, book_info in enumerate(books):
+        if i == count:
+            raise Interrupted
+        yield book_info
+
+
+@pytest.fixture(scope="module")
+def bookstore():
+    with StubBookstore(total_books=120, latency=0.0) as store:
+        yield store
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_resume_matches_clean_run(bookstore, tmp_path, workers):
+    target = 70
+    clean = FakeNeo4jDriver()
+    Neo4jHandler(driver=clean).insert_books_stream(
+        BookScraper(bookstore.seed_url, workers=workers, requests_per_second=0).iter_books(target), batch_size=10)
+
+    driver = FakeNeo4jDriver()
+    handler = Neo4jHandler(driver=driver)
+    checkpoint = CrawlCheckpoint(str(tmp_path / "crawl.jsonl"), flush_every=5)
+    scraper = BookScraper(bookstore.seed_url, workers=workers, requests_per_second=0, checkpoint=checkpoint)
+    with pytest.raises(Interrupted):
+        # Paczki po 10: po 33 rekordach 30 jest w bazie, 3 tylko w checkpoincie
+        handler.insert_books_stream(interrupt_after(scraper.iter_books(target), 33), batch_size=10,
+                                    on_flush=checkpoint.mark_flushed)
+    checkpoint.close()
+    assert len(driver.graph.books) == 30
+
+    checkpoint = CrawlCheckpoint(str(tmp_path / "crawl.jsonl"), flush_every=5)
+    scraper = BookScraper(bookstore.seed_url, workers=workers, requests_per_second=0, checkpoint=checkpoint)
+    resumed = list(scraper.iter_books(target, resume=True))
+    checkpoint.close()
+    assert len(resumed) == target - 30  # 3 niezapisane z checkpointu + 37 brakujących
+    assert len({b["url"] for b in resumed}) == len(resumed)
+    handler.insert_books_stream(iter(resumed), batch_size=10)
+    assert driver.graph.books == clean.graph.books
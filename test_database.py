@@ -0,0 +1,83 @@
+import pytest
+
+from database import Neo4jHandler
+from fake_neo4j import FakeNeo4jDriver, FakeSession
+from record_store import RecordStore
+
+
+def flushed_batches(driver):
+    return [size for name, size, _ in driver.log if name == "insert_books"]
+
+
+def test_stream_flushes_every_batch_size(clock, book):
+    driver = FakeNeo4jDriver()
+    saved = Neo4jHandler(driver=driver).insert_books_stream((book(n) for n in range(7)), batch_size=3)
+    assert saved == 7
+    assert flushed_batches(driver) == [3, 3, 1]  # Reszta zapisana na końcu strumienia
+    assert len(driver.graph.books) == 7
+
+
+def test_stream_flushes_after_interval(clock, book):
+    def slow_scraper():
+        for n in range(5):
+            if n == 2:
+                clock.now += 5.0  # Trzeci rekord przychodzi dopiero po flush_interval
+            yield book(n)
+
+    driver = FakeNeo4jDriver()
+    Neo4jHandler(driver=driver).insert_books_stream(slow_scraper(), batch_size=100, flush_interval=5.0)
+    # Paczka zamykana rekordem, który nadszedł po terminie; licznik czasu liczy się od tego zapisu
+    assert flushed_batches(driver) == [3, 2]
+
+
+def test_on_flush_after_commit_in_order(clock, book):
+    driver = FakeNeo4jDriver()
+    calls = []
+
+    def on_flush(batch):
+        # Paczka jest już w bazie, zanim zostanie zgłoszona (np. do punktu kontrolnego)
+        assert all(b["isbn"] in driver.graph.books for b in batch)
+        calls.append([b["isbn"] for b in batch])
+
+    Neo4jHandler(driver=driver).insert_books_stream((book(n) for n in range(5)), batch_size=2, on_flush=on_flush)
+    assert calls == [["isbn-0", "isbn-1"], ["isbn-2", "isbn-3"], ["isbn-4"]]
+
+
+def graph(driver):
+    g = driver.graph
+    return g.books, g.authors, g.publishers, g.wrote, g.published_by
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_matches_stream(workers, book):
+    authors, publishers = ["Kafka", "Prus", "Camus"], ["Znak", "Muza"]
+    store = RecordStore.from_records(book(n, author=authors[n % 3], publisher=publishers[n % 2]) for n in range(11))
+
+    streamed = FakeNeo4jDriver()
+    Neo4jHandler(driver=streamed).insert_books_stream(iter(store), batch_size=4)
+    parallel = FakeNeo4jDriver()
+    stats = Neo4jHandler(driver=parallel).insert_books_parallel(store, workers=workers, batch_size=2)
+
+    assert graph(parallel) == graph(streamed)
+    assert stats["rows"] == len(store)
+    assert stats["retries"] == 0
+    # Faza wymiarów tworzy autorów i wydawnictwa, paczki książek już tylko książki
+    assert stats["nodes_created"] == 11 + 3 + 2
+    assert stats["relationships_created"] == 2 * 11
+    assert stats["batches"] == len([name for name, _, _ in parallel.log if name == "insert_books_premerged"])
+
+
+class RetryingSession(FakeSession):
+    """Każdą transakcję wykonuje dwa razy, jak execute_write po DeadlockDetected (MERGE jest idempotentny)."""
+    def execute_write(self, transaction_function, *args, **kwargs):
+        transaction_function(self, *args, **kwargs)
+        return transaction_function(self, *args, **kwargs)
+
+
+def test_parallel_counts_retries(book):
+    driver = FakeNeo4jDriver()
+    driver.session = lambda **kwargs: RetryingSession(driver)
+    store = RecordStore.from_records(book(n) for n in range(5))
+    stats = Neo4jHandler(driver=driver).insert_books_parallel(store, workers=2, batch_size=2)
+    assert stats["rows"] == 5
+    assert stats["retries"] == stats["batches"]
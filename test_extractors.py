@@ -0,0 +1,27 @@
+import pytest
+
+from extractors import available_extractors, get_extractor
+from parser_fixtures import extract_fixture, load_fixtures, load_golden
+
+# Każdy backend parsowania dostępny w tym środowisku musi dawać dokładnie wzorzec referencyjnego
+# SoupExtractor zapisany w fixtures/expected.json (odświeżany przez `benchmark.py --update-golden`).
+
+FIXTURES = load_fixtures()
+GOLDEN = load_golden()
+
+
+def test_golden_covers_all_fixtures():
+    assert set(GOLDEN) == set(FIXTURES)
+
+
+@pytest.mark.parametrize("backend", available_extractors())
+@pytest.mark.parametrize("page", sorted(FIXTURES))
+def test_backend_matches_golden(backend, page):
+    assert extract_fixture(get_extractor(backend), page, FIXTURES[page]) == GOLDEN[page]
+
+
+@pytest.mark.parametrize("backend", available_extractors())
+def test_missing_field_raises(backend):
+    # Brak pola to wyjątek, nie pusty rekord
+    with pytest.raises(Exception):
+        get_extractor(backend).parse_book("<html><body><h1>Bez ceny i UPC</h1></body></html>")
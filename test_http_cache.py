@@ -0,0 +1,107 @@
+import json
+import threading
+
+from http_cache import ResponseCache
+
+
+def test_fresh_within_ttl(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    assert cache.get_fresh("http://a/1") is None
+    cache.store("http://a/1", "<html>1</html>")
+    clock.now += 59
+    assert cache.get_fresh("http://a/1") == "<html>1</html>"
+    clock.now += 1
+    assert cache.get_fresh("http://a/1") is None  # Przeterminowany - wymaga rewalidacji
+    assert cache.stats()["hits"] == 1
+
+
+def test_revalidation_after_304(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    assert cache.conditional_headers("http://a/1") == {}
+    cache.store("http://a/1", "<html>1</html>", etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    clock.now += 120
+    assert cache.conditional_headers("http://a/1") == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    assert cache.revalidate("http://a/1") == "<html>1</html>"
+    assert cache.get_fresh("http://a/1") == "<html>1</html>"  # 304 odnawia TTL
+    assert cache.revalidate("http://a/2") is None             # Brak wpisu - trzeba pobrać od nowa
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path), ttl=3600, max_bytes=20, touch_interval=0)
+    for page in "123":
+        cache.store(f"http://a/{page}", "x" * 6)
+        clock.now += 1
+    cache.get_fresh("http://a/1")
+    clock.now += 1
+
+    # Kolejność użycia czytana z dysku po restarcie
+    cache = ResponseCache(str(tmp_path), ttl=3600, max_bytes=20)
+    cache.store("http://a/4", "x" * 6)
+    assert cache.get_fresh("http://a/2") is None
+    assert cache.get_fresh("http://a/1") is not None
+    stats = cache.stats()
+    assert (stats["evictions"], stats["entries"], stats["bytes_on_disk"]) == (1, 3, 18)
+    assert sorted(p.name for p in tmp_path.iterdir() if p.suffix == ".html") == sorted(
+        f"{cache._key(f'http://a/{page}')}.html" for page in "134")
+
+
+def test_last_used_saved_at_most_every_touch_interval(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path), ttl=3600, touch_interval=60)
+    cache.store("http://a/1", "x")
+    meta_path = tmp_path / f"{cache._key('http://a/1')}.json"
+
+    def saved_use():
+        return json.loads(meta_path.read_text(encoding="utf-8"))["last_used"]
+
+    clock.now += 30
+    cache.get_fresh("http://a/1")
+    assert saved_use() == 1000.0  # Trafienie zapamiętane tylko w pamięci
+    clock.now += 30
+    cache.get_fresh("http://a/1")
+    assert saved_use() == 1060.0
+
+
+def test_hits_during_eviction_leave_no_orphans(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=3600, max_bytes=4000, touch_interval=0)
+    urls = [f"http://a/{n}" for n in range(40)]
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            for url in urls:
+                body = cache.get_fresh(url)
+                assert body is None or body == url * 10
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for _ in range(20):
+        for url in urls:
+            cache.store(url, url * 10)  # Każdy zapis ponad limit usuwa najdawniej używane wpisy
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    files = {path.name for path in tmp_path.iterdir()}
+    keys = {name[:-len(".json")] for name in files if name.endswith(".json")}
+    assert keys == set(cache.index)
+    assert {f"{key}.html" for key in keys} == {name for name in files if name.endswith(".html")}
+    assert cache.total_bytes == sum(meta["size"] for meta in cache.index.values()) <= cache.max_bytes
+
+
+def test_entry_evicted_while_body_is_read(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path), ttl=3600, max_bytes=10, touch_interval=0)
+    cache.store("http://a/1", "x" * 6)
+    read_body = cache._read_body
+
+    def read_then_evict(key):
+        body = read_body(key)
+        cache.store("http://a/2", "y" * 6)  # Inny wątek usuwa wpis między odczytem treści a zapisem metadanych
+        return body
+
+    monkeypatch.setattr(cache, "_read_body", read_then_evict)
+    assert cache.get_fresh("http://a/1") == "x" * 6
+    assert not (tmp_path / f"{cache._key('http://a/1')}.json").exists()
+    assert set(cache.index) == {cache._key("http://a/2")}
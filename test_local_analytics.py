@@ -0,0 +1,106 @@
+import pytest
+
+import local_analytics
+from database import Neo4jHandler
+from fake_neo4j import FakeNeo4jDriver
+from local_analytics import LocalGraph, LocalQueryExecutor, check_consistency, compare_results
+from queries import QUERIES, QueryExecutor, QueryResults
+
+
+# Powtórzone ISBN (dokładna kopia i zmiana ceny), dwie różne książki o tym samym tytule,
+# remis cen rozstrzygany tytułem
+@pytest.fixture
+def books(book):
+    def record(isbn, title, author, publisher, year, price):
+        return book(isbn, isbn=isbn, title=title, author=author, publisher=publisher, year=year, price=price)
+
+    return [
+        record("A1", "Dżuma", "Camus", "Muza", 2019, 40.0),
+        record("A2", "Proces", "Kafka", "Znak", 2012, 22.5),
+        record("A3", "Zamek", "Kafka", "Znak", 2017, 18.5),
+        record("A4", "Lalka", "Prus", "Iskry", 2016, 31.0),
+        record("A5", "Lalka", "Orzeszkowa", "Muza", 2010, 12.0),
+        record("A1", "Dżuma", "Camus", "Muza", 2019, 18.5),  # ON MATCH SET b.price - liczy się ostatnia cena
+        record("A2", "Proces", "Kafka", "Znak", 2012, 22.5),
+    ]
+
+# Wyniki policzone ręcznie z semantyki zapytań Cypher w queries.py
+EXPECTED = {
+    "price_stats": [{"total": 5, "min_price": 12.0, "avg_price": 20.5, "max_price": 31.0}],
+    "cheap_books": [{"title": "Dżuma", "price": 18.5}, {"title": "Lalka", "price": 12.0},
+                    {"title": "Zamek", "price": 18.5}],
+    "recent_books": [{"title": "Dżuma", "year": 2019, "publisher": "Muza"},
+                     {"title": "Lalka", "year": 2016, "publisher": "Iskry"},
+                     {"title": "Zamek", "year": 2017, "publisher": "Znak"}],
+    "cheapest_books": [{"title": "Lalka", "year": 2010, "price": 12.0},
+                       {"title": "Dżuma", "year": 2019, "price": 18.5},
+                       {"title": "Zamek", "year": 2017, "price": 18.5},
+                       {"title": "Proces", "year": 2012, "price": 22.5},
+                       {"title": "Lalka", "year": 2016, "price": 31.0}],
+    "author_stats": [{"author": "Camus", "avg_price": 18.5, "book_count": 1},
+                     {"author": "Kafka", "avg_price": 20.5, "book_count": 2},
+                     {"author": "Orzeszkowa", "avg_price": 12.0, "book_count": 1},
+                     {"author": "Prus", "avg_price": 31.0, "book_count": 1}],
+    "relations": [{"author": "Camus", "title": "Dżuma", "publisher": "Muza"},
+                  {"author": "Kafka", "title": "Proces", "publisher": "Znak"},
+                  {"author": "Kafka", "title": "Zamek", "publisher": "Znak"},
+                  {"author": "Orzeszkowa", "title": "Lalka", "publisher": "Muza"},
+                  {"author": "Prus", "title": "Lalka", "publisher": "Iskry"}],
+}
+
+
+@pytest.fixture(params=["numpy", "python"])
+def graph(request, monkeypatch, books):
+    if request.param == "numpy" and local_analytics.numpy is None:
+        pytest.skip("numpy nie jest zainstalowany")
+    if request.param == "python":
+        monkeypatch.setattr(local_analytics, "numpy", None)
+    return LocalGraph(books)
+
+
+@pytest.fixture
+def driver(books):
+    driver = FakeNeo4jDriver()
+    Neo4jHandler(driver=driver).insert_books_stream(iter(books), batch_size=3)
+    return driver
+
+
+def test_expected_rows_cover_registry():
+    assert set(EXPECTED) == set(QUERIES)
+
+
+def test_local_backend_matches_expected(graph):
+    results = LocalQueryExecutor(graph).run()
+    assert compare_results(_expected(), results) == []
+    assert results.rows == EXPECTED
+
+
+def test_fake_database_matches_expected(driver):
+    assert compare_results(_expected(), QueryExecutor(driver).run()) == []
+
+
+def test_check_consistency(driver, graph):
+    # Obie strony to implementacje w Pythonie - zgodność z prawdziwym Cypherem sprawdza tylko
+    # `python local_analytics.py <rekordy>` na bazie, do której wgrano te same rekordy
+    assert check_consistency(driver, graph) == []
+
+
+def test_compare_results_reports_differences(graph):
+    results = LocalQueryExecutor(graph).run()
+    results.rows["cheapest_books"] = list(reversed(results.rows["cheapest_books"]))
+    results.rows["author_stats"] = list(reversed(results.rows["author_stats"]))  # Bez ORDER BY - bez znaczenia
+    differences = compare_results(_expected(), results)
+    assert len(differences) == 1 and differences[0].startswith("cheapest_books[0]")
+
+
+def test_catalogue_rows(graph):
+    rows = list(graph.catalogue_rows())
+    assert [(row["title"], row["author"]) for row in rows] == [
+        ("Dżuma", "Camus"), ("Lalka", "Prus"), ("Lalka", "Orzeszkowa"), ("Proces", "Kafka"), ("Zamek", "Kafka")]
+    assert rows[0]["price"] == 18.5
+
+
+def _expected():
+    results = QueryResults()
+    results.rows = {name: rows for name, rows in EXPECTED.items()}
+    return results
@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+import main
+from fake_neo4j import FakeNeo4jDriver
+from record_store import RecordStore
+from stub_bookstore import StubBookstore
+
+# Etapy CLI end-to-end: strony z atrapy księgarni, baza zastąpiona atrapą sterownika.
+
+
+@pytest.fixture(scope="module")
+def bookstore():
+    with StubBookstore(total_books=40, latency=0.0) as store:
+        yield store
+
+
+@pytest.fixture
+def driver(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Cache HTTP, wersja grafu i pliki PDF lądują w katalogu roboczym
+    driver = FakeNeo4jDriver()
+    monkeypatch.setattr(main.Pipeline, "driver", property(lambda self: driver))
+    return driver
+
+
+def run(bookstore, *argv):
+    return main.main([*argv, "--seed-url", bookstore.seed_url, "--rate", "0"])
+
+
+def test_streaming_local_backend_uses_this_run(bookstore, driver):
+    assert run(bookstore, "scrape", "--records", "books.records", "--target", "3") == 0
+    assert run(bookstore, "all", "--backend", "local", "--records", "books.records", "--target", "10") == 0
+    # Plik --records zastąpiony rekordami przebiegu strumieniowego, nie analizowany stary
+    assert len(RecordStore.load("books.records")) == 10
+    assert len(driver.graph.books) == 10
+
+
+def test_streaming_local_backend_without_records_file(bookstore, driver):
+    pipeline = main.Pipeline(main.build_parser().parse_args(
+        ["all", "--backend", "local", "--target", "7", "--seed-url", bookstore.seed_url, "--rate", "0"]))
+    assert main.run_all(pipeline)
+    assert pipeline.results["price_stats"][0]["total"] == 7
+
+
+@pytest.mark.parametrize("loader_workers", ["1", "3"])
+def test_load_from_records_file(bookstore, driver, loader_workers):
+    assert run(bookstore, "scrape", "--records", "books.records", "--target", "12") == 0
+    assert main.main(["load", "--records", "books.records", "--loader-workers", loader_workers]) == 0
+    assert len(driver.graph.books) == 12
+    query = "insert_books" if loader_workers == "1" else "insert_books_premerged"
+    assert query in {name for name, _, _ in driver.log}
+
+
+def test_export_invalidates_cache_only_after_import(bookstore, driver):
+    import bulk_export
+    from query_cache import GraphVersion
+
+    version = GraphVersion(main.GRAPH_VERSION_FILE)
+    assert run(bookstore, "scrape", "--records", "books.records", "--target", "5") == 0
+    assert main.main(["export", "--records", "books.records", "--verify"]) == 0
+    before = version.current()
+    driver.graph = bulk_export.read_graph(main.EXPORT_DIR)  # "neo4j-admin import"
+    assert main.main(["export", "--after-import"]) == 0
+    assert version.current() != before
+
+    driver.graph.books.popitem()
+    assert main.main(["export", "--after-import"]) == 1
+
+
+def test_incremental_state_file(bookstore, driver, capsys):
+    argv = ("all", "--incremental", "--state-file", "known.json", "--target", "8")
+    assert run(bookstore, *argv) == 0
+    assert len(driver.graph.books) == 8
+    driver.log.clear()
+    assert run(bookstore, *argv) == 0
+    # Stan z pliku, nie z bazy; niezmienione książki pominięte
+    assert "known_books" not in {name for name, _, _ in driver.log}
+    assert "pominięto 8 niezmienionych" in capsys.readouterr().out
+
+
+def test_incremental_without_database(bookstore, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+
+    def unavailable(self):
+        raise ConnectionError("Couldn't connect to localhost:7687")
+
+    monkeypatch.setattr(main.Pipeline, "driver", property(unavailable))
+    assert run(bookstore, "scrape", "--incremental", "--records", "books.records") == 1
+    assert "BŁĄD bazy danych: Couldn't connect" in capsys.readouterr().out
+
+
+def test_report_runs_after_failed_analysis(bookstore, driver, monkeypatch, capsys):
+    import analytics
+
+    def broken(self, results=None, plan_mode=None):
+        raise RuntimeError("awaria analizy")
+
+    monkeypatch.setattr(analytics.GraphAnalytics, "run_queries", broken)
+    assert run(bookstore, "all", "--target", "5") == 1
+    assert "BŁĄD podczas analizy: awaria analizy" in capsys.readouterr().out
+    assert os.path.exists("Raport_Zaliczeniowy_Ksiazki.pdf")
+
+
+@pytest.mark.parametrize("content", [None, b"to nie jest plik rekordow"])
+@pytest.mark.parametrize("command", ["load", "export"])
+def test_unreadable_records_file(driver, capsys, content, command):
+    if content is not None:
+        with open("books.records", "wb") as f:
+            f.write(content)
+    assert main.main([command, "--records", "books.records"]) == 1
+    assert "BŁĄD odczytu pliku rekordów" in capsys.readouterr().out
+    assert not driver.graph.books
+
+
+def test_plan_rejected_for_local_backend(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main.main(["analyze", "--backend", "local", "--records", "books.records", "--plan", "profile"])
+    assert exit_info.value.code == 2
+    assert "--plan wymaga backendu cypher" in capsys.readouterr().err
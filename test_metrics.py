@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+import metrics
+from metrics import Metrics
+
+
+@pytest.fixture
+def registry():
+    registry = Metrics(enabled=True, prefix="t")
+    registry.inc("fetch_retries_total")
+    registry.inc("http_responses_total", status=200)
+    registry.inc("http_responses_total", 2, status=200)
+    registry.inc("fetch_failed_total", reason=404)
+    registry.inc("fetch_failed_total", reason="retries_exhausted")  # Ta sama etykieta jako liczba i napis
+    registry.inc("custom_total", path='a"b\\c\nd')
+    registry.observe("fetch_bytes", 100)
+    registry.observe("fetch_bytes", 2000)
+    return registry
+
+
+def test_prometheus_text(registry):
+    assert registry.prometheus_text() == """\
+# HELP t_custom_total custom_total
+# TYPE t_custom_total counter
+t_custom_total{path="a\\"b\\\\c\\nd"} 1
+# HELP t_fetch_failed_total Strony, których nie udało się pobrać, wg przyczyny.
+# TYPE t_fetch_failed_total counter
+t_fetch_failed_total{reason="404"} 1
+t_fetch_failed_total{reason="retries_exhausted"} 1
+# HELP t_fetch_retries_total Ponowienia pobrania po błędzie przejściowym.
+# TYPE t_fetch_retries_total counter
+t_fetch_retries_total 1
+# HELP t_http_responses_total Odpowiedzi HTTP wg kodu statusu.
+# TYPE t_http_responses_total counter
+t_http_responses_total{status="200"} 3
+# HELP t_fetch_bytes Rozmiar pobranej strony w bajtach.
+# TYPE t_fetch_bytes histogram
+t_fetch_bytes_bucket{le="1024"} 1
+t_fetch_bytes_bucket{le="4096"} 2
+t_fetch_bytes_bucket{le="16384"} 2
+t_fetch_bytes_bucket{le="65536"} 2
+t_fetch_bytes_bucket{le="262144"} 2
+t_fetch_bytes_bucket{le="1048576"} 2
+t_fetch_bytes_bucket{le="+Inf"} 2
+t_fetch_bytes_sum 2100.0
+t_fetch_bytes_count 2
+"""
+
+
+def test_json_summary(registry, tmp_path):
+    path = str(tmp_path / "metrics.json")
+    registry.export(path)
+    with open(path, encoding="utf-8") as f:
+        summary = json.load(f)
+    assert summary["counters"]["http_responses_total{status=\"200\"}"] == 3
+    assert summary["histograms"] == {"fetch_bytes": {"count": 2, "sum": 2100.0, "avg": 1050.0, "min": 100, "max": 2000}}
+    registry.export(str(tmp_path / "metrics.prom"))
+    assert (tmp_path / "metrics.prom").read_text(encoding="utf-8") == registry.prometheus_text()
+
+
+def test_span_timing(monkeypatch):
+    ticks = iter([10.0, 10.25, 20.0, 20.5])
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: next(ticks))
+    registry = Metrics(enabled=True)
+    with registry.span("fetch", host="a"):
+        pass
+    with pytest.raises(KeyError):
+        with registry.span("fetch", host="a"):
+            raise KeyError("x")
+    histograms = registry.summary()["histograms"]
+    assert histograms['fetch_seconds{host="a"}']["sum"] == 0.25
+    assert histograms['fetch_seconds{error="KeyError",host="a"}']["sum"] == 0.5
+
+
+def test_disabled_registry_records_nothing():
+    registry = Metrics()
+    registry.inc("fetch_retries_total")
+    registry.observe("fetch_bytes", 100)
+    with registry.span("fetch"):
+        pass
+    assert registry.summary() == {"counters": {}, "histograms": {}}
+    assert registry.prometheus_text() == "\n"
@@ -0,0 +1,162 @@
+import threading
+import time
+
+import pytest
+
+from fake_neo4j import FakeNeo4jDriver, FakeSession
+from queries import PLAN_MODES, QUERIES, QueryExecutor, plan_summary
+from query_cache import GraphVersion, QueryResultCache
+
+BOOKS = [
+    {"isbn": "1", "title": "Alfa", "author": "Nowak", "publisher": "Znak", "year": 2018, "price": 12.5, "url": "u1"},
+    {"isbn": "2", "title": "Beta", "author": "Kowalska", "publisher": "Znak", "year": 2010, "price": 30.0, "url": "u2"},
+    {"isbn": "3", "title": "Gamma", "author": "Nowak", "publisher": "Iskry", "year": 2020, "price": 18.0, "url": "u3"},
+]
+
+# ResultSummary.profile zapytania cheap_books z Neo4j 5 (indeks zakresowy na Book.price),
+# skrócony do pól, które czyta plan_summary, plus kilka pól ignorowanych
+CHEAP_BOOKS_PROFILE = {
+    "operatorType": "ProduceResults@neo4j",
+    "identifiers": ["b", "title", "price"],
+    "args": {"Details": "title, price", "EstimatedRows": 5.0, "planner": "COST", "runtime": "PIPELINED",
+             "PipelineInfo": "In Pipeline 1"},
+    "dbHits": 0, "rows": 5, "pageCacheHits": 0, "pageCacheMisses": 0, "time": 0,
+    "children": [{
+        "operatorType": "Projection@neo4j",
+        "identifiers": ["b", "title", "price"],
+        "args": {"Details": "b.title AS title, b.price AS price", "EstimatedRows": 5.0},
+        "dbHits": 10, "rows": 5,
+        "children": [{
+            "operatorType": "Top@neo4j",
+            "identifiers": ["b"],
+            "args": {"Details": "b.title ASC LIMIT 5", "EstimatedRows": 5.0},
+            "dbHits": 0, "rows": 5,
+            "children": [{
+                "operatorType": "NodeIndexSeekByRange@neo4j",
+                "identifiers": ["b"],
+                "args": {"Details": "RANGE INDEX b:Book(price) WHERE price < $autoint_0", "EstimatedRows": 12.0},
+                "dbHits": 24, "rows": 23,
+                "children": [],
+            }],
+        }],
+    }],
+}
+
+
+def test_plan_summary_of_profile():
+    summary = plan_summary(CHEAP_BOOKS_PROFILE)
+    assert [op["operator"] for op in summary["operators"]] == [
+        "ProduceResults", "Projection", "Top", "NodeIndexSeekByRange"]
+    assert [op["depth"] for op in summary["operators"]] == [0, 1, 2, 3]
+    assert summary["operators"][3]["details"] == "RANGE INDEX b:Book(price) WHERE price < $autoint_0"
+    assert summary["operators"][3]["rows"] == 23
+    assert summary["db_hits"] == 34
+
+
+def test_plan_summary_of_explain_and_branches():
+    # EXPLAIN: bez dbHits/rows; dzieci w kolejności planu, przejście w głąb
+    plan = {"operatorType": "CartesianProduct@neo4j", "args": {}, "children": [
+        {"operatorType": "NodeByLabelScan@neo4j", "args": {"Details": "a:Author"}, "children": []},
+        {"operatorType": "NodeByLabelScan@neo4j", "args": {"Details": "p:Publisher"}, "children": []},
+    ]}
+    summary = plan_summary(plan)
+    assert [(op["operator"], op["depth"], op["details"]) for op in summary["operators"]] == [
+        ("CartesianProduct", 0, None), ("NodeByLabelScan", 1, "a:Author"), ("NodeByLabelScan", 1, "p:Publisher")]
+    assert summary["db_hits"] is None
+    assert plan_summary(None) is None
+
+
+@pytest.fixture
+def driver():
+    driver = FakeNeo4jDriver()
+    driver.graph.insert_books(BOOKS)
+    return driver
+
+
+def test_executor_profile_keeps_rows(driver):
+    plain = QueryExecutor(driver).run()
+    profiled = QueryExecutor(driver, plan_mode="PROFILE").run()
+    assert profiled.rows == plain.rows
+    assert set(profiled.plans) == set(QUERIES)
+    assert all(plan["db_hits"] is not None for plan in profiled.plans.values())
+
+
+def test_executor_explain_returns_plans_without_rows(driver):
+    results = QueryExecutor(driver, plan_mode="EXPLAIN").run()
+    assert all(rows == [] for rows in results.rows.values())
+    assert all(plan["operators"] and plan["db_hits"] is None for plan in results.plans.values())
+
+
+def test_executor_rejects_unknown_plan_mode(driver):
+    with pytest.raises(ValueError):
+        QueryExecutor(driver, plan_mode="ANALYZE")
+    assert "EXPLAIN" in PLAN_MODES
+
+
+class CountingDriver(FakeNeo4jDriver):
+    """Liczy otwarte sesje i najwyższą liczbę sesji otwartych jednocześnie."""
+    def __init__(self):
+        super().__init__()
+        self.sessions = self.active = self.max_active = 0
+        self.counter_lock = threading.Lock()
+
+    def session(self, **kwargs):
+        driver = self
+
+        class Session(FakeSession):
+            def __enter__(self):
+                with driver.counter_lock:
+                    driver.sessions += 1
+                    driver.active += 1
+                    driver.max_active = max(driver.max_active, driver.active)
+                time.sleep(0.02)  # Zapytanie "trwa" - równoległe sesje nakładają się w czasie
+                return self
+
+            def close(self):
+                with driver.counter_lock:
+                    driver.active -= 1
+
+        return Session(self)
+
+
+@pytest.fixture
+def counting_driver():
+    driver = CountingDriver()
+    driver.graph.insert_books(BOOKS)
+    return driver
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return QueryResultCache(GraphVersion(str(tmp_path / ".graph_version")), directory=str(tmp_path / "cache"))
+
+
+def test_executor_one_session_per_query_in_parallel(counting_driver, driver):
+    results = QueryExecutor(counting_driver, max_workers=3).run()
+    assert results.rows == QueryExecutor(driver).run().rows
+    assert counting_driver.sessions == len(QUERIES)
+    assert 1 < counting_driver.max_active <= 3
+
+
+def test_executor_second_run_served_from_cache(counting_driver, cache):
+    first = QueryExecutor(counting_driver, cache=cache).run()
+    assert counting_driver.sessions == len(QUERIES) and not first.cached
+
+    second = QueryExecutor(counting_driver, cache=cache).run()
+    assert counting_driver.sessions == len(QUERIES)  # Ta sama wersja grafu - bez kontaktu z bazą
+    assert second.cached == set(QUERIES)
+    assert second.rows == first.rows
+
+    cache.version.bump()
+    QueryExecutor(counting_driver, cache=cache).run(["price_stats"])
+    assert counting_driver.sessions == len(QUERIES) + 1
+
+
+@pytest.mark.parametrize("plan_mode", PLAN_MODES)
+def test_executor_plan_mode_bypasses_cache(counting_driver, cache, plan_mode):
+    plain = QueryExecutor(counting_driver, cache=cache).run()
+    planned = QueryExecutor(counting_driver, cache=cache, plan_mode=plan_mode).run()
+    assert counting_driver.sessions == 2 * len(QUERIES) and not planned.cached
+    # Wiersze z trybu planu (przy EXPLAIN puste) nie nadpisują zapamiętanych wyników
+    assert QueryExecutor(counting_driver, cache=cache).run().rows == plain.rows
+    assert counting_driver.sessions == 2 * len(QUERIES)
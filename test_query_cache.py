@@ -0,0 +1,59 @@
+from query_cache import GraphVersion, QueryResultCache
+
+QUERY = "MATCH (b:Book) RETURN count(b) AS total"
+ROWS = [{"total": 3}]
+
+
+def cache(tmp_path, **kwargs):
+    version = GraphVersion(str(tmp_path / ".graph_version"))
+    return QueryResultCache(version, **{"uri": "bolt://a:7687", **kwargs})
+
+
+def test_hit_after_put(tmp_path):
+    results = cache(tmp_path)
+    assert results.get(QUERY) is None
+    results.put(QUERY, None, ROWS)
+    assert results.get(QUERY) == ROWS
+    assert results.get(QUERY, {"limit": 5}) is None  # Inne parametry - inny klucz
+    assert (results.hits, results.misses) == (1, 2)
+
+
+def test_miss_after_version_bump(tmp_path):
+    results = cache(tmp_path)
+    results.put(QUERY, None, ROWS)
+    results.version.bump()
+    assert results.get(QUERY) is None
+
+
+def test_keyed_by_server_and_database(tmp_path):
+    directory = str(tmp_path / "cache")
+    cache(tmp_path, directory=directory).put(QUERY, None, ROWS)
+    # Wspólny katalog i token wersji, ale inny serwer albo inna baza
+    assert cache(tmp_path, directory=directory, uri="bolt://b:7687").get(QUERY) is None
+    assert cache(tmp_path, directory=directory, database="archive").get(QUERY) is None
+    assert cache(tmp_path, directory=directory).get(QUERY) == ROWS
+
+
+def test_lru_eviction(tmp_path):
+    results = cache(tmp_path, max_entries=2)
+    for n in range(3):
+        results.put(f"{QUERY} // {n}", None, [{"n": n}])
+        if n == 1:
+            results.get(f"{QUERY} // 0")  # Zapytanie 0 użyte później niż 1
+    assert results.get(f"{QUERY} // 1") is None
+    assert results.get(f"{QUERY} // 0") == [{"n": 0}]
+    assert len(results.entries) == 2
+
+
+def test_disk_survives_restart_and_prunes_old_versions(tmp_path):
+    directory = tmp_path / "cache"
+    results = cache(tmp_path, directory=str(directory))
+    results.put(QUERY, None, ROWS)
+    old_files = set(directory.iterdir())
+    assert cache(tmp_path, directory=str(directory)).get(QUERY) == ROWS  # Nowy proces, pusta pamięć
+
+    results.version.bump()
+    results.put(QUERY, None, [{"total": 4}])
+    files = set(directory.iterdir())
+    assert len(files) == 1 and not files & old_files
+    assert next(iter(files)).name.startswith(f"{results.version.current()}-")
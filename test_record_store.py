@@ -0,0 +1,86 @@
+import json
+import sys
+
+import pytest
+
+from record_store import FIELDS, MAGIC, RecordStore, parquet_available
+
+BOOKS = [
+    {"title": "Zażółć gęślą jaźń", "price": 12.5, "isbn": "a1", "author": "Łukasz Żółw", "publisher": "Znak",
+     "year": 2019, "url": "https://example.com/1"},
+    {"title": "Ünïcödé ☃ – 書", "price": 0.99, "isbn": "b22", "author": "Anna", "publisher": "Muza",
+     "year": -5, "url": "https://example.com/2"},
+    {"title": "", "price": 1e9, "isbn": "c333", "author": "Łukasz Żółw", "publisher": "Znak",
+     "year": 2024, "url": "u"},
+]
+
+
+def test_native_round_trip(tmp_path):
+    path = str(tmp_path / "books.records")
+    RecordStore.from_records(BOOKS).save(path)
+    store = RecordStore.load(path)
+    try:
+        assert len(store) == len(BOOKS)
+        assert list(store) == BOOKS
+        assert store.column("author")[2] == "Łukasz Żółw"
+        assert store.distinct("author") == ["Anna", "Łukasz Żółw"]
+        # Kolumny wskazują na mapowany plik zamiast kopii
+        assert isinstance(store.prices, memoryview) and store.prices.readonly
+    finally:
+        store.close()
+    assert len(store) == 0
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 7, 9])
+def test_sections_are_aligned(tmp_path, count):
+    # Kolumny o długościach niebędących wielokrotnością 8 bajtów (rok: 2 B, teksty dowolne)
+    books = [dict(BOOKS[i % len(BOOKS)], isbn="x" * (i + 1)) for i in range(count)]
+    path = str(tmp_path / "books.records")
+    RecordStore.from_records(books).save(path)
+    with open(path, "rb") as f:
+        assert f.read(len(MAGIC)) == MAGIC
+        header_size = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_size))
+    assert (len(MAGIC) + 8 + header_size) % 8 == 0
+    assert all(start % 8 == 0 for start, _ in header["sections"].values())
+    store = RecordStore.load(path)
+    assert list(store) == books
+    store.close()
+
+
+def test_empty_store(tmp_path):
+    path = str(tmp_path / "empty.records")
+    RecordStore().save(path)
+    store = RecordStore.load(path)
+    assert len(store) == 0 and list(store) == []
+    store.close()
+
+
+def test_rejects_other_files_and_byteorder(tmp_path):
+    path = tmp_path / "books.records"
+    path.write_bytes(b"not a record store")
+    with pytest.raises(ValueError, match="nie jest plikiem RecordStore"):
+        RecordStore.load(str(path))
+
+    RecordStore.from_records(BOOKS).save(str(path))
+    data = path.read_bytes()
+    other = "big" if sys.byteorder == "little" else "little"
+    # Ta sama długość nagłówka - spacje po wartości są poprawnym JSON-em
+    original = f'"byteorder": "{sys.byteorder}"'
+    path.write_bytes(data.replace(original.encode(), f'"byteorder": "{other}"'.ljust(len(original)).encode()))
+    with pytest.raises(ValueError, match="kolejności bajtów"):
+        RecordStore.load(str(path))
+
+
+def test_save_is_atomic(tmp_path):
+    path = tmp_path / "books.records"
+    RecordStore.from_records(BOOKS).save(str(path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["books.records"]
+
+
+@pytest.mark.skipif(not parquet_available(), reason="pyarrow nie jest zainstalowany")
+def test_parquet_round_trip(tmp_path):
+    path = str(tmp_path / "books.parquet")
+    RecordStore.from_records(BOOKS).save(path)
+    assert list(RecordStore.load(path)) == BOOKS
+    assert set(FIELDS) == set(BOOKS[0])
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+import report
+from report import MISSING_VALUE, ReportGenerator
+
+
+def catalogue_rows(count):
+    return [{"title": f"Ksiazka {n:03d}", "author": f"Autor {n % 3}", "publisher": "Znak", "year": 2000 + n % 20,
+             "price": 10.0 + n} for n in range(count)]
+
+
+@pytest.fixture
+def cells(monkeypatch):
+    """Teksty komórek rysowanych na kolejnych stronach: [(numer strony, tekst), ...]."""
+    drawn = []
+    cell = report.PDFReport.cell
+
+    def spy(self, w=None, h=None, text="", *args, **kwargs):
+        drawn.append((self.page_no(), text))
+        return cell(self, w, h, text, *args, **kwargs)
+
+    monkeypatch.setattr(report.PDFReport, "cell", spy)
+    return drawn
+
+
+def test_appendix_split_into_volumes(tmp_path):
+    output = str(tmp_path / "katalog.pdf")
+    stats = ReportGenerator().generate_catalogue_appendix(output, rows=iter(catalogue_rows(5)), rows_per_file=2)
+    assert stats["rows"] == 5
+    assert stats["files"] == [str(tmp_path / f"katalog_{volume:03d}.pdf") for volume in (1, 2, 3)]
+    assert sorted(os.listdir(tmp_path)) == ["katalog_001.pdf", "katalog_002.pdf", "katalog_003.pdf"]
+
+
+def test_appendix_header_on_every_page(tmp_path, cells):
+    stats = ReportGenerator().generate_catalogue_appendix(str(tmp_path / "katalog.pdf"), rows=catalogue_rows(120))
+    assert stats["pages"] > 2
+    header_pages = [page for page, text in cells if text == "Tytul"]
+    assert header_pages == list(range(1, stats["pages"] + 1))
+
+
+def test_appendix_missing_values(tmp_path, cells):
+    rows = [{"title": "Bez autora", "author": None, "publisher": None, "year": 2020, "price": 12.5}]
+    ReportGenerator().generate_catalogue_appendix(str(tmp_path / "katalog.pdf"), rows=rows)
+    texts = [text for _, text in cells]
+    row = texts[texts.index("Bez autora"):][:5]
+    assert row == ["Bez autora", MISSING_VALUE, MISSING_VALUE, "2020", "12.5"]
+    assert "None" not in {text for _, text in cells}
@@ -0,0 +1,168 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from http_cache import ResponseCache
+from retry import CircuitBreaker, HostCircuitBreaker, RetryPolicy, parse_retry_after
+from scraper import BookScraper
+from stub_bookstore import StubBookstore
+
+
+@pytest.fixture
+def stop():
+    return threading.Event()
+
+
+def trip(breaker, failures):
+    for _ in range(failures):
+        breaker.record(False)
+
+
+def test_needs_min_requests(clock):
+    breaker = CircuitBreaker(window=10, failure_ratio=0.5, min_requests=4)
+    trip(breaker, 3)
+    assert breaker.state == CircuitBreaker.CLOSED  # Same błędy, ale za mało prób
+    breaker.record(True)                           # 3/4 >= 0.5
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_trips_at_failure_ratio(clock):
+    breaker = CircuitBreaker(window=10, failure_ratio=0.5, min_requests=4)
+    for success, state in ((True, "closed"), (True, "closed"), (True, "closed"), (False, "closed"),  # 1/4
+                           (False, "closed"),                                                      # 2/5
+                           (False, "open")):                                                       # 3/6
+        breaker.record(success)
+        assert breaker.state == state
+
+
+def test_trips_exactly_at_ratio(clock):
+    breaker = CircuitBreaker(window=4, failure_ratio=0.5, min_requests=4)
+    for success in (True, True, False):
+        breaker.record(success)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(False)  # 2/4 = 0.5
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 1
+
+
+def test_old_results_leave_the_window(clock):
+    breaker = CircuitBreaker(window=4, failure_ratio=0.75, min_requests=4)
+    for success in (False, False, True, True, True, False, False):
+        breaker.record(success)
+    assert breaker.state == CircuitBreaker.CLOSED  # W oknie: True, True, False, False
+
+
+def test_one_probe_at_a_time(clock, stop):
+    breaker = CircuitBreaker(window=2, failure_ratio=0.5, min_requests=2, cooldown=5.0)
+    trip(breaker, 2)
+    clock.now += 5.0
+    assert breaker.wait(stop)              # Pierwszy wątek wysyła żądanie próbne
+    assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.probing
+
+    # Drugi wątek czeka na wynik próby - tu kończy go stop_event
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(breaker.wait(stop, poll=0.01)))
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()
+    stop.set()
+    waiter.join()
+    assert results == [False]
+
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED and not breaker.probing
+    assert breaker.wait(threading.Event())
+
+
+def test_stale_probe_is_replaced(clock, stop):
+    breaker = CircuitBreaker(window=2, failure_ratio=0.5, min_requests=2, cooldown=5.0)
+    trip(breaker, 2)
+    clock.now += 5.0
+    assert breaker.wait(stop)
+    clock.now += 5.1  # Próba bez wyniku dłużej niż cooldown
+    assert breaker.wait(stop)
+
+
+def test_cooldown_doubles_up_to_max_and_resets(clock, stop):
+    breaker = CircuitBreaker(window=2, failure_ratio=0.5, min_requests=2, cooldown=5.0, max_cooldown=15.0)
+    trip(breaker, 2)
+    cooldowns = [breaker.cooldown]
+    for _ in range(3):
+        clock.now += breaker.cooldown
+        assert breaker.wait(stop)
+        breaker.record(False)  # Nieudana próba
+        assert breaker.state == CircuitBreaker.OPEN
+        cooldowns.append(breaker.cooldown)
+    assert cooldowns == [5.0, 10.0, 15.0, 15.0]
+    assert breaker.trips == 4
+
+    clock.now += breaker.cooldown
+    assert breaker.wait(stop)
+    breaker.record(True)
+    assert breaker.cooldown == 5.0 and breaker.state == CircuitBreaker.CLOSED
+
+
+def test_late_results_while_open_are_ignored(clock):
+    breaker = CircuitBreaker(window=2, failure_ratio=0.5, min_requests=2)
+    trip(breaker, 2)
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 1
+
+
+def test_host_breakers_are_separate(clock, stop):
+    breakers = HostCircuitBreaker(window=2, failure_ratio=0.5, min_requests=2)
+    for _ in range(2):
+        breakers.record("http://a.example/x", False)
+    assert breakers.trips() == 1
+    assert breakers.wait("http://b.example/y", stop)
+    assert HostCircuitBreaker(failure_ratio=None).wait("http://a.example/", stop)
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("") is None
+    assert parse_retry_after("jutro") is None
+
+
+def test_parse_retry_after_http_date():
+    future = datetime.now(timezone.utc) + timedelta(seconds=90)
+    assert parse_retry_after(format_datetime(future, usegmt=True)) == pytest.approx(90, abs=2)
+    past = datetime.now(timezone.utc) - timedelta(hours=1)
+    assert parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
+
+
+def test_delay_honours_retry_after_and_cap():
+    policy = RetryPolicy(base_delay=1.0, multiplier=2.0, max_delay=5.0, jitter=False)
+    assert [policy.delay(attempt) for attempt in range(4)] == [1.0, 2.0, 4.0, 5.0]
+    assert policy.delay(0, retry_after=3.0) == 3.0
+    assert policy.delay(0, retry_after=60.0) == 5.0
+    jittered = RetryPolicy(base_delay=1.0, max_delay=5.0, seed=1)
+    assert all(0 <= jittered.delay(3) <= 5.0 for _ in range(50))
+
+
+def test_probe_304_with_lost_cache_entry(clock, stop, tmp_path):
+    with StubBookstore(total_books=5, latency=0.0) as store:
+        url = f"{store.seed_url}catalogue/page-1.html"
+        breakers = HostCircuitBreaker(window=2, failure_ratio=0.5, min_requests=2, cooldown=5.0)
+        cache = ResponseCache(str(tmp_path), ttl=0)  # Każdy wpis przeterminowany - zawsze zapytanie warunkowe
+        scraper = BookScraper(store.seed_url, requests_per_second=0, cache=cache, circuit_breaker=breakers)
+        body = scraper.fetch_page(url)
+        os.remove(tmp_path / f"{cache._key(url)}.html")  # Wpis znika między nagłówkami a odpowiedzią 304
+        for _ in range(2):
+            breakers.record(url, False)
+        clock.now += 5.0  # Pierwsze żądanie po przerwie jest próbne
+
+        results = []
+        fetcher = threading.Thread(target=lambda: results.append(scraper.fetch_page(url)))
+        fetcher.start()
+        fetcher.join(2)
+        scraper.stop_event.set()  # Bez zapisu wyniku próby wątek czekałby na własną próbę
+        fetcher.join()
+    assert results == [body]
+    assert store.not_modified_count == 1
+    assert breakers._breaker(url).state == CircuitBreaker.CLOSED
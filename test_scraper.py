@@ -0,0 +1,148 @@
+import logging
+import math
+import threading
+import time
+
+import pytest
+
+from metrics import METRICS
+from retry import HostCircuitBreaker, RetryPolicy
+from scraper import BookScraper
+from stub_bookstore import BOOKS_PER_PAGE, StubBookstore
+
+# Potok stronicowanie -> wątki pobierające -> bufor porządkujący na atrapie księgarni.
+
+
+@pytest.fixture(scope="module")
+def bookstore():
+    with StubBookstore(total_books=100, latency=0.005) as store:
+        yield store
+
+
+def scraper(bookstore, **kwargs):
+    return BookScraper(bookstore.seed_url, requests_per_second=0, **kwargs)
+
+
+@pytest.fixture(scope="module")
+def sequential_books(bookstore):
+    return scraper(bookstore).run(45)
+
+
+def relative(books, store):
+    return [{**book, "url": book["url"][len(store.seed_url):]} for book in books]
+
+
+def fetch_threads():
+    """Żywe wątki potoku (nazwy wątków zawierają nazwę funkcji docelowej)."""
+    return [thread for thread in threading.enumerate() if thread.name.endswith(("(producer)", "(worker)"))]
+
+
+@pytest.mark.parametrize("workers", [2, 8])
+@pytest.mark.parametrize("target", [5, 25])
+def test_stops_exactly_at_target(bookstore, workers, target):
+    requests_before = bookstore.request_count
+    books_scraper = scraper(bookstore, workers=workers)
+    books = books_scraper.run(target)
+    requests_made = bookstore.request_count - requests_before
+
+    assert len(books) == target
+    # Ponad cel: najwyżej okno potoku (4 książki na wątek) i strony listy, które je zapełniły
+    window = 4 * workers
+    assert target < requests_made <= target + window + math.ceil((target + window) / BOOKS_PER_PAGE)
+    # Pobrane ponad cel URL-e są zwalniane - kolejny przebieg może je pobrać
+    assert books_scraper.scraped_urls == {book["url"] for book in books}
+    assert not books_scraper.stop_event.is_set()
+
+
+def test_whole_catalogue_without_target(bookstore):
+    books = scraper(bookstore, workers=4).run(None)
+    assert len(books) == bookstore.total_books
+    assert len({book["url"] for book in books}) == bookstore.total_books
+
+
+def test_close_stops_fetch_threads(bookstore):
+    books = scraper(bookstore, workers=8).iter_books(None)
+    next(books)
+    next(books)
+    books.close()
+    assert fetch_threads() == []
+
+
+def test_stop_event_ends_run_promptly(bookstore):
+    books_scraper = scraper(bookstore, workers=4)
+    received = 0
+    start = time.perf_counter()
+    for _ in books_scraper.iter_books(None):
+        received += 1
+        if received == 3:
+            books_scraper.stop_event.set()  # Zatrzymanie z zewnątrz, np. przy zamykaniu programu
+    assert received < bookstore.total_books
+    assert time.perf_counter() - start < 5
+    assert fetch_threads() == []
+
+
+def test_worker_error_reaches_consumer(bookstore, monkeypatch):
+    books_scraper = scraper(bookstore, workers=4)
+    scrape_book_details = books_scraper.scrape_book_details
+
+    def broken(book_url):
+        if book_url.endswith("_7/index.html"):
+            raise RuntimeError("awaria wątku")
+        return scrape_book_details(book_url)
+
+    monkeypatch.setattr(books_scraper, "scrape_book_details", broken)
+    with pytest.raises(RuntimeError, match="awaria wątku"):
+        books_scraper.run(50)
+    assert fetch_threads() == []
+
+
+def test_concurrent_result_matches_sequential(bookstore, sequential_books):
+    assert scraper(bookstore, workers=4).run(45) == sequential_books
+
+
+def test_concurrent_order_survives_retries(bookstore, sequential_books):
+    # Co piąte żądanie kończy się 503 - ponowienia przestawiają kolejność ukończenia pobrań
+    with StubBookstore(total_books=100, latency=0.005, failure_rate=0.2, seed=1) as flaky:
+        books = BookScraper(flaky.seed_url, workers=4, requests_per_second=0,
+                            retry_policy=RetryPolicy(attempts=10, base_delay=0.001, max_delay=0.01),
+                            circuit_breaker=HostCircuitBreaker(failure_ratio=None)).run(45)
+        assert flaky.error_count > 0
+    # Druga atrapa działa na innym porcie - porównujemy adresy względne
+    assert relative(books, flaky) == relative(sequential_books, bookstore)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_process_pool_matches_thread_parsing(bookstore, sequential_books, workers):
+    # Pula startuje przez forkserver/spawn - pytest uruchamia testy spod `if __name__ == "__main__":`
+    books_scraper = scraper(bookstore, workers=workers, parse_processes=2, parse_chunk_size=4)
+    assert books_scraper.run(45) == sequential_books
+    assert books_scraper.scraped_urls == {book["url"] for book in sequential_books}
+
+
+def test_rate_limited_pool_fills_chunks(bookstore, sequential_books, monkeypatch):
+    monkeypatch.setattr(METRICS, "enabled", True)
+    monkeypatch.setattr(METRICS, "histograms", {})
+    # Pobieranie (40 stron/s) wolniejsze od parsowania - kolejka pobrań stoi między każdą stroną
+    books_scraper = BookScraper(bookstore.seed_url, workers=2, requests_per_second=40, parse_processes=2,
+                                parse_chunk_size=8, parse_flush_interval=0.25)
+    assert books_scraper.run(45) == sequential_books
+    chunks = METRICS.summary()["histograms"]["parse_chunk_pages"]
+    # Bez minimalnego czasu oczekiwania prawie każda paczka miałaby jedną stronę
+    assert chunks["avg"] >= 4
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_end_of_catalogue_is_not_an_error(bookstore, workers, caplog):
+    caplog.set_level(logging.INFO)
+    books = scraper(bookstore, workers=workers).run(None)
+    assert len(books) == bookstore.total_books
+    assert "Zakończenie paginacji" in caplog.text
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+
+def test_failed_listing_page_is_an_error(caplog):
+    with StubBookstore(total_books=10, latency=0.0, failure_rate=1.0) as broken:
+        books = BookScraper(broken.seed_url, requests_per_second=0,
+                            retry_policy=RetryPolicy(attempts=2, base_delay=0.001)).run(5)
+    assert books == []
+    assert "wyczerpane próby" in caplog.text